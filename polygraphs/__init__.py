@@ -7,6 +7,8 @@ import datetime
 import random as rnd
 import collections
 import json
+import multiprocessing
+from concurrent import futures
 
 import dgl
 import torch
@@ -73,7 +75,7 @@ def _storeresult(params, result):
     # Ensure destination directory exists
     assert os.path.isdir(params.simulation.results)
     # Export results
-    result.store(params.simulation.results)
+    result.store(params.simulation.results, format=params.simulation.format)
 
 
 def _storeparams(params, explorables=None):
@@ -103,7 +105,10 @@ def _storegraph(params, graph, prefix):
     assert os.path.isdir(params.simulation.results)
     # Export DGL graph in binary format
     fname = os.path.join(params.simulation.results, f"{prefix}.bin")
-    dgl.save_graphs(fname, [graph])
+    # Implicit complete graphs have no edges; flag them, so that analysis
+    # restores their edges on load (see `analysis.GraphConverter`)
+    labels = {"implicit": torch.tensor([int(params.network.implicit)])}
+    dgl.save_graphs(fname, [graph], labels)
     # Export DGL graph as JPEG
     #
     # Important note:
@@ -115,6 +120,61 @@ def _storegraph(params, graph, prefix):
     # _, _ = viz.draw(graph, layout="circular", fname=fname)
 
 
+def _prefix(params, idx):
+    """
+    Helper function for naming the files of the idx-th simulation
+    """
+    return f"{(idx + 1):0{len(str(params.simulation.repeats))}d}"
+
+
+def _snapshothooks(params, prefix, nodes=None):
+    """
+    Helper function for creating snapshot hooks
+    """
+    if not params.snapshots.enabled:
+        return []
+    # Expected number of snapshots (if the number of steps is finite)
+    rows = None
+    if params.simulation.steps:
+        rows = params.simulation.steps // params.snapshots.interval + 2
+    # Create snaphot hook
+    return [
+        monitors.SnapshotHook(
+            interval=params.snapshots.interval,
+            messages=params.snapshots.messages,
+            location=params.simulation.results,
+            filename=f"{prefix}.hd5",
+            nodes=nodes,
+            compression=params.snapshots.compression,
+            queuesize=params.snapshots.queuesize,
+            rows=rows,
+        )
+    ]
+
+
+def _closehooks(hooks):
+    """
+    Helper function for closing hooks (e.g. flushing snapshots to disk)
+    """
+    for hook in hooks:
+        hook.close()
+
+
+def _logresult(idx, result):
+    """
+    Helper function for logging the result of the idx-th simulation
+    """
+    log.info(
+        "Sim #{:04d}: "
+        "{:6d} steps "
+        "{:7.2f}s; "
+        "action: {:1s} "
+        "undefined: {:<1} "
+        "converged: {:<1} "
+        "polarized: {:<1} ".format(idx + 1, *result)
+    )
+
+
 def random(seed=0):
     """
     Set random number generator for PolyGraph simulations.
@@ -147,32 +207,96 @@ def explore(params, explorables):
     _storeparams(params, explorables=explorables)
     # Intermediate result collection
     collection = collections.deque()
-    # Run all
-    for config in configurations:
+    # Configurations, their metadata columns, and their seeds
+    tasks = []
+    for idx, config in enumerate(configurations):
         # Store intermediate results?
         config.simulation.results = os.path.join(
             params.simulation.results, "explorations/auto"
         )
         # Set metadata columns
         meta = {key: config.getattr(var.name) for key, var in explorables.items()}
-        # Metadata columns to string
-        log.info(
-            "Explore {} ({} simulations)".format(
-                ", ".join([f"{k} = {v}" for k, v in meta.items()]),
-                config.simulation.repeats,
-            )
+        # Each configuration is seeded deterministically (if `params.seed` is set)
+        # by its position in the exploration, so that results do not depend on
+        # whether (or in which order) configurations run in parallel
+        seed = (params.seed + idx) if params.seed is not None else None
+        tasks.append((config, meta, seed))
+    if params.simulation.workers > 1:
+        # Run all in parallel, in a pool of worker processes
+        outcomes = _explorepool(params, tasks)
+    else:
+        # Run all
+        outcomes = (_explore(config, meta, seed=seed) for config, meta, seed in tasks)
+    writer = None
+    if params.simulation.format == "parquet":
+        # Append results to a Parquet result, one part per configuration, as
+        # each configuration completes, with metadata columns typed by all
+        # their values (parts are complete once appended)
+        writer = metadata.ParquetWriter(
+            os.path.join(params.simulation.results, "data.parquet"),
+            types=metadata.columntypes(
+                {key: var.values for key, var in explorables.items()}
+            ),
         )
-        # Run experiment
-        result = simulate(config, **meta)
+    for result in outcomes:
         collection.append(result)
+        if writer is not None:
+            writer.append(result)
 
     # Merge simulation results
     results = metadata.merge(*collection)
-    # Store simulation results
-    _storeresult(params, results)
+    if writer is None:
+        # Store simulation results
+        _storeresult(params, results)
     return results
 
 
+def _explore(config, meta, seed=None, threads=None):
+    """
+    Runs a single configuration of an exploration.
+    """
+    if threads:
+        # Set number of threads used by PyTorch (in a worker process)
+        torch.set_num_threads(threads)
+    if seed is not None:
+        # Set random number generators
+        random(seed)
+    # Metadata columns to string
+    log.info(
+        "Explore {} ({} simulations)".format(
+            ", ".join([f"{k} = {v}" for k, v in meta.items()]),
+            config.simulation.repeats,
+        )
+    )
+    # Run experiment
+    return simulate(config, **meta)
+
+
+def _explorepool(params, tasks):
+    """
+    Runs all configurations of an exploration in a pool of worker processes.
+    """
+    # Spawn (rather than fork) workers, since forking a process
+    # after PyTorch has started its thread pool is unsafe
+    context = multiprocessing.get_context("spawn")
+    with futures.ProcessPoolExecutor(
+        max_workers=params.simulation.workers, mp_context=context
+    ) as executor:
+        pending = [
+            executor.submit(
+                _explore,
+                config,
+                meta,
+                seed=seed,
+                threads=params.simulation.threads,
+            )
+            for config, meta, seed in tasks
+        ]
+        # Collect results in configuration order
+        for future in pending:
+            yield future.result()
+
+
 @torch.no_grad()
 def simulate(params, op=None, **meta):  # pylint: disable=invalid-name
     """
@@ -203,17 +327,34 @@ def simulate(params, op=None, **meta):  # pylint: disable=invalid-name
     _storeparams(params)
     # Collection of simulation results
     results = metadata.PolyGraphSimulation(uid=uid, **meta)
+    if params.simulation.results and params.simulation.flush:
+        # Append results to disk as repeats complete
+        results.stream(
+            params.simulation.results,
+            format=params.simulation.format,
+            flush=params.simulation.flush,
+        )
+    # Number of repeats simulated at once, as replicas of a batched graph
+    batch = max(1, params.simulation.batch)
+    # Network topology shared by all repeats (if deterministic)
+    topology = _topology(params)
     # Run multiple simulations and collect results
-    for idx in range(params.simulation.repeats):
+    for first in range(0, params.simulation.repeats, batch):
+        replicas = range(first, min(first + batch, params.simulation.repeats))
+        if len(replicas) > 1:
+            # Simulate all replicas in one go
+            _simulatebatch(params, op, replicas, results, topology=topology)
+            continue
+        idx = first
         log.debug("Simulation #{:04d} starts".format(idx + 1))
         # Create a DGL graph with given configuration
-        graph = graphs.create(params.network)
+        graph = _creategraph(params, topology)
         # Set device for graph
         graph = graph.to(device=params.device)
         # Create a model with given configuration
         model = op(graph, params)
         # Export graph (beliefs are initialised)
-        prefix = f"{(idx + 1):0{len(str(params.simulation.repeats))}d}"
+        prefix = _prefix(params, idx)
         _storegraph(params, graph, prefix)
         # Set model in evaluation mode
         model.eval()
@@ -222,18 +363,88 @@ def simulate(params, op=None, **meta):  # pylint: disable=invalid-name
         if params.logging.enabled:
             # Create logging hook
             hooks += [monitors.MonitorHook(interval=params.logging.interval)]
-        if params.snapshots.enabled:
-            # Create snaphot hook
-            hooks += [
-                monitors.SnapshotHook(
-                    interval=params.snapshots.interval,
-                    messages=params.snapshots.messages,
-                    location=params.simulation.results,
-                    filename=f"{prefix}.hd5",
-                )
-            ]
+        hooks += _snapshothooks(params, prefix)
         # Run simulation
-        result = simulate_(
+        try:
+            result = simulate_(
+                graph,
+                model,
+                steps=params.simulation.steps,
+                mistrust=params.mistrust,
+                lowerupper=params.lowerupper,
+                upperlower=params.upperlower,
+                hooks=hooks,
+                interval=params.simulation.interval,
+            )
+        finally:
+            _closehooks(hooks)
+        results.add(*result)
+        _logresult(idx, result)
+    # End repeats
+    # Store simulation results
+    _storeresult(params, results)
+    return results
+
+
+def _topology(params):
+    """
+    Helper function that creates the network once, if its topology is the
+    same for all repeats (otherwise, returns None)
+    """
+    kind = params.network.kind
+    # Random networks are deterministic only if they are seeded
+    seeded = kind in graphs.RANDOM and params.network.getattr(f"{kind}.seed")
+    if kind not in graphs.DETERMINISTIC and not seeded:
+        return None
+    topology = graphs.create(params.network).to(device=params.device)
+    # Build sparse formats once, so that they are shared by all repeats
+    topology.create_formats_()
+    return topology
+
+
+def _creategraph(params, topology=None):
+    """
+    Helper function that creates the network of a repeat, either from scratch
+    or as a clone of a shared topology (that shares its sparse formats)
+    """
+    if topology is None:
+        return graphs.create(params.network)
+    return topology.clone()
+
+
+def _simulatebatch(params, op, replicas, results, topology=None):
+    """
+    Runs multiple simulations at once, as replicas of a single batched
+    (block-diagonal) graph, and adds their results to the collection.
+    """
+    log.debug(
+        "Simulations #{:04d}-#{:04d} start".format(replicas[0] + 1, replicas[-1] + 1)
+    )
+    # Create a DGL graph per replica and batch them together
+    graph = dgl.batch([_creategraph(params, topology) for _ in replicas])
+    # Set device for graph
+    graph = graph.to(device=params.device)
+    # Create a model with given configuration
+    model = op(graph, params)
+    # Export graph of each replica (beliefs are initialised)
+    prefixes = [_prefix(params, idx) for idx in replicas]
+    for prefix, replica in zip(prefixes, dgl.unbatch(graph)):
+        _storegraph(params, replica, prefix)
+    # Set model in evaluation mode
+    model.eval()
+    # Create hooks; logging monitors the batch as a whole, while
+    # snapshots are taken for each replica separately
+    hooks = []
+    if params.logging.enabled:
+        hooks += [monitors.MonitorHook(interval=params.logging.interval)]
+    size = graph.num_nodes() // len(replicas)
+    replicahooks = [
+        _snapshothooks(params, prefix, nodes=slice(i * size, (i + 1) * size))
+        for i, prefix in enumerate(prefixes)
+    ]
+    # Run simulations
+    try:
+        collection = simulatebatch_(
             graph,
             model,
             steps=params.simulation.steps,
@@ -241,29 +452,35 @@ def simulate(params, op=None, **meta):  # pylint: disable=invalid-name
             lowerupper=params.lowerupper,
             upperlower=params.upperlower,
             hooks=hooks,
+            replicahooks=replicahooks,
+            interval=params.simulation.interval,
         )
+    finally:
+        _closehooks(hooks + [hook for group in replicahooks for hook in group])
+    for idx, result in zip(replicas, collection):
         results.add(*result)
-        log.info(
-            "Sim #{:04d}: "
-            "{:6d} steps "
-            "{:7.2f}s; "
-            "action: {:1s} "
-            "undefined: {:<1} "
-            "converged: {:<1} "
-            "polarized: {:<1} ".format(idx + 1, *result)
-        )
-    # End repeats
-    # Store simulation results
-    _storeresult(params, results)
-    return results
+        _logresult(idx, result)
 
 
 def simulate_(
-    graph, model, steps=1, hooks=None, mistrust=0.0, lowerupper=0.5, upperlower=0.99
+    graph,
+    model,
+    steps=1,
+    hooks=None,
+    mistrust=0.0,
+    lowerupper=0.5,
+    upperlower=0.99,
+    interval=1,
 ):
     """
     Runs a simulation either for a finite number of steps or until convergence.
 
+    Termination conditions are evaluated every step, but synchronised with
+    the host only every `interval` steps (and at the last step, or whenever
+    hooks run), with a single device synchronisation per check. Steps and
+    results are the same as if they were checked every step (see
+    `_Terminations`).
+
     Returns:
         A 4-tuple that consists of (in order):
             a) number of simulation steps
@@ -271,41 +488,55 @@ def simulate_(
             c) whether the network has converged or not
             d) whether the network is polarised or not
     """
+    hooks = hooks or []
 
     def cond(step):
         return step < steps if steps else True
 
+    def check(step):
+        return (
+            step % interval == 0
+            or not cond(step)
+            or any(hook.isdue(step) for hook in hooks)
+        )
+
+    terminations = _Terminations(
+        mistrust=mistrust, upperlower=upperlower, lowerupper=lowerupper
+    )
     clock = timer.Timer()
     clock.start()
     step = 0
-    terminated = None
+    terminated = (False, False, False)
     while cond(step):
         step += 1
         # Forward operation on the graph
         _ = model(graph)
-        # Monitor progress
-        if hooks:
-            for hook in hooks:
-                hook.mayberun(step, graph)
-        # Check termination conditions:
+        # Check termination conditions (without synchronising):
         # - Are beliefs undefined (contain nan or inf)?
         # - Has the network converged?
         # - Is it polarised?
-        terminated = (
-            undefined(graph),
-            converged(graph, upperlower=upperlower, lowerupper=lowerupper),
-            polarized(
-                graph, upperlower=upperlower, lowerupper=lowerupper, mistrust=mistrust
-            ),
-        )
-        if any(terminated):
+        terminations.update(step, graph.ndata["beliefs"].view(1, -1))
+        if not check(step):
+            continue
+        ((first, flags),) = terminations.sync()
+        if first is not None and first < step:
+            # Terminated since the last check; restore beliefs at that step
+            graph.ndata["beliefs"] = terminations.frozen.view_as(
+                graph.ndata["beliefs"]
+            )
+            step = first
+        else:
+            # Monitor progress
+            for hook in hooks:
+                hook.mayberun(step, graph)
+        if first is not None:
+            terminated = flags
             break
     duration = clock.dt()
     if not terminated[0]:
         # Proper exit
-        if hooks:
-            for hook in hooks:
-                hook.conclude(step, graph)
+        for hook in hooks:
+            hook.conclude(step, graph)
         # Which action did the network decide to take?
         act = consensus(graph, lowerupper=lowerupper)
     else:
@@ -324,6 +555,231 @@ def simulate_(
     ) + terminated
 
 
+def simulatebatch_(
+    graph,
+    model,
+    steps=1,
+    hooks=None,
+    replicahooks=None,
+    mistrust=0.0,
+    lowerupper=0.5,
+    upperlower=0.99,
+    interval=1,
+):
+    """
+    Runs a batch of simulations, one per replica of a batched graph, either for
+    a finite number of steps or until each replica converges. All replicas are
+    advanced with a single forward operation per step; once a replica has
+    terminated, its beliefs remain frozen while the rest continue. Termination
+    conditions are checked every `interval` steps (see `simulate_`).
+
+    Args:
+        hooks: Hooks that monitor the batch as a whole
+        replicahooks: A list of hooks per replica
+
+    Returns:
+        A list of 4-tuples (see `simulate_`), one per replica.
+    """
+    replicas = graph.batch_size
+    # All replicas must be of the same size
+    sizes = graph.batch_num_nodes()
+    assert torch.all(torch.eq(sizes, sizes[0])), "Replicas must have the same size"
+    hooks = hooks or []
+    if replicahooks is None:
+        replicahooks = [[] for _ in range(replicas)]
+    assert len(replicahooks) == replicas
+
+    def cond(step):
+        return step < steps if steps else True
+
+    def check(step):
+        return (
+            step % interval == 0
+            or not cond(step)
+            or any(hook.isdue(step) for hook in hooks)
+            or any(hook.isdue(step) for group in replicahooks for hook in group)
+        )
+
+    # Per-replica results
+    results = [None] * replicas
+    terminations = _Terminations(
+        mistrust=mistrust, upperlower=upperlower, lowerupper=lowerupper
+    )
+
+    clock = timer.Timer()
+    clock.start()
+    step = 0
+    while cond(step):
+        step += 1
+        # Forward operation on all replicas
+        _ = model(graph)
+        # Beliefs per replica
+        beliefs = graph.ndata["beliefs"].view(replicas, -1)
+        if terminations.frozen is not None:
+            # Restore beliefs of terminated replicas
+            beliefs = torch.where(
+                terminations.done.unsqueeze(1), terminations.frozen, beliefs
+            )
+            graph.ndata["beliefs"] = beliefs.reshape(-1)
+        # Check termination conditions for all replicas at once
+        terminations.update(step, beliefs)
+        # Monitor progress
+        for hook in hooks:
+            hook.mayberun(step, graph)
+        if not check(step):
+            continue
+        for idx, (first, flags) in enumerate(terminations.sync()):
+            if results[idx] is not None:
+                continue
+            if first is None or first == step:
+                for hook in replicahooks[idx]:
+                    hook.mayberun(step, graph)
+            if first is not None:
+                results[idx] = _concludereplica(
+                    graph,
+                    beliefs[idx],
+                    first,
+                    clock.lap(),
+                    flags,
+                    hooks=replicahooks[idx],
+                    lowerupper=lowerupper,
+                )
+        if all(result is not None for result in results):
+            break
+    duration = clock.dt()
+    # Proper exit for monitors of the batch as a whole
+    for hook in hooks:
+        hook.conclude(step, graph)
+    # Replicas that did not terminate within the given number of steps
+    beliefs = graph.ndata["beliefs"].view(replicas, -1)
+    for idx, result in enumerate(results):
+        if result is None:
+            results[idx] = _concludereplica(
+                graph,
+                beliefs[idx],
+                step,
+                duration,
+                (False, False, False),
+                hooks=replicahooks[idx],
+                lowerupper=lowerupper,
+            )
+    return results
+
+
+class _Terminations:
+    """
+    Evaluates termination conditions (see `terminated_`) of one or more
+    simulation replicas every step, without synchronising with the host.
+
+    For each replica, it keeps the first step at which any condition holds,
+    the conditions that hold at that step, and the beliefs at that step, so
+    that checking them every few steps (see `sync`) yields the same steps and
+    results as checking them every step.
+    """
+
+    def __init__(self, **kwargs):
+        # Options of `terminated_`
+        self.kwargs = kwargs
+        # First step at which each replica terminated (or 0), its conditions,
+        # and its beliefs
+        self.first = None
+        self.flags = None
+        self.frozen = None
+
+    @property
+    def done(self):
+        """
+        Returns whether each replica has terminated.
+        """
+        return torch.gt(self.first, 0)
+
+    def update(self, step, beliefs):
+        """
+        Evaluates termination conditions of beliefs (one row per replica) at
+        given step.
+        """
+        terminated = terminated_(beliefs, **self.kwargs)
+        if self.first is None:
+            self.first = torch.zeros(
+                beliefs.shape[0], dtype=torch.long, device=beliefs.device
+            )
+            self.flags = torch.zeros_like(terminated)
+            self.frozen = beliefs.clone()
+        # Replicas that terminate at this step
+        newly = torch.any(terminated, dim=1) & ~self.done
+        self.first = self.first.masked_fill(newly, step)
+        self.flags = torch.where(newly.unsqueeze(1), terminated, self.flags)
+        self.frozen = torch.where(newly.unsqueeze(1), beliefs, self.frozen)
+
+    def sync(self):
+        """
+        Returns the first step at which each replica terminated (or None) and
+        the conditions that held at that step, with a single synchronisation.
+        """
+        values = torch.cat((self.first.unsqueeze(1), self.flags.long()), dim=1)
+        return [
+            (row[0] or None, tuple(bool(flag) for flag in row[1:]))
+            for row in values.tolist()
+        ]
+
+
+def _concludereplica(
+    graph, beliefs, step, duration, flags, hooks=None, lowerupper=0.99
+):
+    """
+    Helper function that concludes a batched simulation replica.
+    """
+    if not flags[0]:
+        # Proper exit
+        for hook in hooks or []:
+            hook.conclude(step, graph)
+        # Which action did the replica decide to take?
+        if torch.all(torch.gt(beliefs, lowerupper)):
+            act = "B"
+        elif torch.all(torch.le(beliefs, 0.5)):
+            act = "A"
+        else:
+            act = "?"
+    else:
+        # Beliefs are undefined, and so is the action
+        act = "?"
+    return (step, duration, act) + tuple(flags)
+
+
+def terminated_(beliefs, mistrust=0.0, upperlower=0.5, lowerupper=0.99):
+    """
+    Evaluates all termination conditions for a 2-D tensor of beliefs, one row
+    per simulation replica.
+
+    Returns:
+        A boolean tensor of shape (replicas, 3), whose columns denote whether
+        beliefs are undefined, converged, or polarized, respectively.
+    """
+    # pylint: disable=invalid-name
+    # Are beliefs undefined (contain nan or inf)?
+    undefined_ = torch.any(~torch.isfinite(beliefs), dim=1)
+    upper = torch.gt(beliefs, lowerupper)
+    lower = torch.le(beliefs, upperlower)
+    # Has the network converged?
+    converged_ = torch.all(upper, dim=1) | torch.all(lower, dim=1)
+    # Is it polarised?
+    if mistrust:
+        # All nodes have decided which action to take, and there is at least
+        # one strong believer that action B is better and one disbeliever
+        c = torch.all(upper | lower, dim=1)
+        b = torch.any(upper, dim=1)
+        a = torch.any(lower, dim=1)
+        inf = torch.tensor(float("inf"), dtype=beliefs.dtype, device=beliefs.device)
+        delta = (
+            torch.where(upper, beliefs, inf).min(dim=1).values
+            - torch.where(lower, beliefs, -inf).max(dim=1).values
+        )
+        polarized_ = a & b & c & torch.ge(delta * mistrust, 1)
+    else:
+        polarized_ = torch.zeros_like(converged_)
+    return torch.stack((undefined_, converged_, polarized_), dim=1)
+
+
 def undefined(graph):
     """
     Returns `True` is graph beliefs contain undefined values (`nan` or `inf`).
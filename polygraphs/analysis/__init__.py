@@ -1,7 +1,9 @@
 import os
 from .graph_converter import GraphConverter, Graphs
-from .belief_processor import BeliefProcessor, Beliefs
+from .csr import CSRGraph
+from .belief_processor import BeliefArray, BeliefProcessor, Beliefs
 from .simulation_processor import SimulationProcessor
+from .statistics import belief_statistics
 from .utils import *
 
 # Cache data directory for all results
@@ -24,6 +26,17 @@ class Processor(SimulationProcessor):
         If not provided, a new instance will be created.
     - belief_processor (Beliefs, optional): An instance of Beliefs class for belief processing.
         If not provided, a new instance will be created.
+    - workers (int): Number of threads that scan simulation folders.
+    - manifest (bool or str): Persist an index (a JSON file) of the scanned folders of each
+        root folder, so that re-opening results only rescans folders that have changed.
+        Indices are stored in `~/polygraphs-cache/manifests`, or in the given directory.
+    - cache_size (int): Maximum number of graphs (resp. beliefs) kept in memory; unbounded if None.
+    - cache_bytes (int): Maximum (approximate) size of graphs (resp. beliefs) kept in memory in bytes;
+        unbounded if None. Least-recently-used items are evicted first.
+    - prefetch (int): Number of next graphs and beliefs to load on a background thread,
+        whenever one is accessed.
+    - dedupe (bool): If True, share a single (read-only) networkx graph among simulations
+        with identical topologies.
 
     This class initializes with the specified root folder path, along with optional
     instances of Graphs and Beliefs classes. It then processes the simulations
@@ -39,6 +52,12 @@ class Processor(SimulationProcessor):
         config_check=True,
         graph_converter=None,
         belief_processor=None,
+        workers=8,
+        manifest=True,
+        cache_size=None,
+        cache_bytes=None,
+        prefetch=0,
+        dedupe=False,
     ):
         # Initialize with default Graphs and Beliefs instances if not provided
         if graph_converter is None:
@@ -46,12 +65,26 @@ class Processor(SimulationProcessor):
         if belief_processor is None:
             belief_processor = BeliefProcessor()
         # Call the constructor of parent classes with specified instances
-        super().__init__(include, exclude, config_check)
+        super().__init__(include, exclude, config_check, workers, manifest)
         # Process simulations in the specified root folder path
         self.process_simulations(root_folder_path)
         # Objects to store loaded beliefs and graphs
-        self.graphs = Graphs(self.dataframe, graph_converter)
-        self.beliefs = Beliefs(self.dataframe, belief_processor, self.graphs)
+        self.graphs = Graphs(
+            self.dataframe,
+            graph_converter,
+            maxsize=cache_size,
+            maxbytes=cache_bytes,
+            prefetch=prefetch,
+            dedupe=dedupe,
+        )
+        self.beliefs = Beliefs(
+            self.dataframe,
+            belief_processor,
+            self.graphs,
+            maxsize=cache_size,
+            maxbytes=cache_bytes,
+            prefetch=prefetch,
+        )
 
     def add(self, *methods):
         """
@@ -70,6 +103,16 @@ class Processor(SimulationProcessor):
         for method in methods:
             column(method)
 
+    def belief_statistics(self, *columns, **kwargs):
+        """
+        Returns statistics of beliefs (fraction believing B, mean, variance, and
+        polarization gap) for each iteration of all simulations, as a tidy DataFrame.
+        Columns (e.g. "op") of the simulation DataFrame are added to the result.
+
+        See `polygraphs.analysis.statistics.belief_statistics` for keyword arguments.
+        """
+        return belief_statistics(self, columns=columns, **kwargs)
+
     @property
     def sims(self):
         """Get the processed DataFrame."""
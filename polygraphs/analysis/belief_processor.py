@@ -1,84 +1,174 @@
+import numpy as np  # Importing numpy library for belief arrays
 import pandas as pd  # Importing pandas library for data manipulation
 import h5py  # Importing h5py library for working with HDF5 files
+import dgl  # Importing Deep Graph Library (DGL) for .bin file graphs
+
+from .cache import CachedSequence
+
+
+def _rows(selection):
+    """
+    Returns an HDF5 selection of given rows (a slice if they are consecutive,
+    otherwise an increasing index array).
+    """
+    if len(selection) == 0 or np.all(np.diff(selection) == 1):
+        start = int(selection[0]) if len(selection) else 0
+        return slice(start, start + len(selection))
+    if not np.all(np.diff(selection) > 0):
+        raise IndexError("Iterations must be selected in increasing order")
+    return selection
+
+
+class BeliefArray:
+    """
+    The beliefs of a simulation as a dense [iterations, nodes] float32 array
+
+    The long-format (MultiIndex) DataFrame of beliefs is only built on demand,
+    by calling `frame()`.
+    """
+
+    def __init__(self, iterations, nodes, values):
+        # Simulation step of each row
+        self.iterations = np.asarray(iterations, dtype=np.int64)
+        # Node of each column
+        self.nodes = np.asarray(nodes)
+        # Beliefs, one row per iteration
+        self.values = values
+        assert self.values.shape == (len(self.iterations), len(self.nodes))
+        self._frame = None
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def __array__(self, dtype=None, copy=None):
+        return self.values if dtype is None else self.values.astype(dtype)
+
+    def frame(self):
+        """
+        Returns beliefs as a DataFrame indexed by iteration and node.
+        """
+        if self._frame is None:
+            # Create a MultiIndex for DataFrame indexing with iteration number and node as indices
+            index = pd.MultiIndex.from_product(
+                [self.iterations.tolist(), self.nodes.tolist()],
+                names=["iteration", "node"],
+            )
+            # Flatten beliefs, iteration by iteration
+            values = pd.array(np.ravel(self.values), dtype="Float32")
+            self._frame = pd.DataFrame({"beliefs": values}, index=index)
+        return self._frame
 
 
 class BeliefProcessor:
-    def get_beliefs(self, hd5_file_path, graph):
+    def get_array(self, hd5_file_path, graph, iterations=None, nodes=None):
+        """
+        Returns the beliefs of a simulation as a `BeliefArray`, reading all
+        snapshots in a single pass. The first row holds the initial beliefs
+        (iteration 0) from the .bin file graph.
+
+        The graph is either a loaded (networkx or CSR) graph, or the DGL graph
+        of the .bin file.
+
+        Optionally, `iterations` (resp. `nodes`) selects rows (resp. columns)
+        by position, e.g. `slice(0, 10)`; only selected rows and columns are
+        read from the HDF5 file.
+        """
+        # Nodes of the graph, and initial beliefs from the .bin file graph
+        if isinstance(graph, dgl.DGLGraph):
+            initial = np.asarray(graph.ndata["beliefs"], dtype=np.float32)
+            labels = np.arange(graph.num_nodes())
+        else:
+            initial = np.asarray(graph.pg["ndata"]["beliefs"], dtype=np.float32)
+            labels = np.asarray(list(graph.nodes))
+        columns = np.arange(len(labels))
+        if nodes is not None:
+            columns = columns[nodes]
+
         # Open the HDF5 file in read mode
         with h5py.File(hd5_file_path, "r") as fp:
-            # Extract the keys (iteration numbers) from the 'beliefs' group in the HDF5 file
-            _keys = sorted(map(int, fp["beliefs"].keys()))
-            # Initialize a list to store iteration number and corresponding beliefs
-            # with the initial beliefs from the .bin file graph
-            iterations = [(0, graph.pg["ndata"]["beliefs"].tolist())]
-
-            # Iterate over each key (iteration number) in the HDF5 file
-            for key in _keys:
-                # Retrieve beliefs data for the current iteration
-                beliefs = fp["beliefs"][str(key)]
-
-                # Append the iteration number and beliefs data to the list
-                iterations.append((key, list(beliefs)))
-
-        # Create a MultiIndex for DataFrame indexing with iteration number and node as indices
-        index = pd.MultiIndex.from_product(
-            [[0, *_keys], list(graph.nodes)], names=["iteration", "node"]
-        )
-
-        # Create an empty DataFrame with the defined MultiIndex
-        iterations_df = pd.DataFrame(index=index, columns=["beliefs"], dtype="Float32")
-
-        # Populate the DataFrame with beliefs data for each iteration
-        for key, beliefs in iterations:
-            iterations_df.loc[key, "beliefs"] = beliefs
+            if isinstance(fp["beliefs"], h5py.Dataset):
+                # Beliefs of all iterations are stored in a single dataset,
+                # one row per iteration
+                keys = fp["iterations"][:]
+            else:
+                # Extract the keys (iteration numbers) from the 'beliefs' group in the HDF5 file
+                keys = np.array(sorted(map(int, fp["beliefs"].keys())), dtype=np.int64)
+
+            # Select rows (row 0 holds the initial beliefs)
+            rows = np.arange(len(keys) + 1)
+            if iterations is not None:
+                rows = rows[iterations]
+            # Snapshot rows to read
+            selection = rows[rows > 0] - 1
+
+            # Range of selected columns
+            first, last = (columns.min(), columns.max() + 1) if len(columns) else (0, 0)
+
+            values = np.empty((len(rows), len(columns)), dtype=np.float32)
+            # Rows that hold the initial beliefs
+            values[rows == 0] = initial[columns]
+            if isinstance(fp["beliefs"], h5py.Dataset):
+                # Read selected rows and range of columns (a hyperslab) at once
+                data = fp["beliefs"][_rows(selection), first:last]
+                values[rows > 0] = data[:, columns - first]
+            else:
+                # Read selected datasets, one per iteration
+                positions = np.flatnonzero(rows > 0)
+                for position, key in zip(positions, keys[selection]):
+                    data = fp["beliefs"][str(key)][first:last]
+                    values[position] = data[columns - first]
+
+        return BeliefArray(np.concatenate(([0], keys))[rows], labels[columns], values)
 
-        # Return the populated DataFrame containing beliefs data for each iteration
-        return iterations_df
+    def get_beliefs(self, hd5_file_path, graph):
+        # Return a DataFrame of beliefs for each iteration, indexed by iteration and node
+        return self.get_array(hd5_file_path, graph).frame()
 
 
-class Beliefs:
+class Beliefs(CachedSequence):
     """
     The Beliefs class stores the beliefs of simulations that have been
     explicitly loaded for analysis using the Belief Processor
 
     This class provides an iterator and get item to access beliefs
+
+    Loaded beliefs are kept in a bounded LRU cache (see `CachedSequence`).
     """
 
-    def __init__(self, dataframe, belief_processor, graphs):
+    def __init__(
+        self,
+        dataframe,
+        belief_processor,
+        graphs,
+        maxsize=None,
+        maxbytes=None,
+        prefetch=0,
+    ):
+        super().__init__(len(dataframe), maxsize, maxbytes, prefetch)
         self.hd5_file_path = dataframe["hd5_file_path"]
         self.belief_processor = belief_processor
         self.graphs = graphs
-        self.beliefs = [None] * len(dataframe)
-        self.index = 0
 
-    def __getitem__(self, index):
-        if index > len(self.beliefs):
-            raise IndexError("Simulation index out of range")
-        return self.get(index)
-
-    def __len__(self):
-        return len(self.beliefs)
-
-    def __iter__(self):
-        return self
-
-    def __next__(self):
-        if self.index >= len(self.beliefs):
-            self.index = 0
-            raise StopIteration
-        value = self.get(self.index)
-        self.index += 1
-        return value
-
-    def get(self, index):
-        # Return a saved beliefs dataframe using its index or load from file
-        if self.beliefs[index] is not None:
-            return self.beliefs[index]
-        elif index < len(self.beliefs):
-            self.beliefs[index] = self.belief_processor.get_beliefs(
-                self.hd5_file_path[index],
-                self.graphs[index],
-            )
-            return self.beliefs[index]
-        else:
+    def load(self, index):
+        # Load beliefs dataframe from index
+        return self.belief_processor.get_beliefs(
+            self.hd5_file_path[index],
+            self.graphs[index],
+        )
+
+    def nbytes(self, value):
+        # Size of beliefs dataframe (including its index)
+        return int(value.memory_usage(index=True).sum())
+
+    def array(self, index, iterations=None, nodes=None):
+        # Return beliefs as a dense [iterations, nodes] array, optionally
+        # reading only selected iterations and nodes (not saved)
+        if not -len(self) <= index < len(self):
             raise IndexError("Simulation index out of range")
+        return self.belief_processor.get_array(
+            self.hd5_file_path[index % len(self)],
+            self.graphs[index],
+            iterations=iterations,
+            nodes=nodes,
+        )
@@ -0,0 +1,166 @@
+import threading  # Importing threading library for thread-safe caching
+import collections  # Importing collections library for ordered dictionaries
+from concurrent import futures  # Importing futures library for prefetching
+
+
+class LRUCache:
+    """
+    A thread-safe, least-recently-used cache, bounded by number of entries
+    and (approximate) size in bytes
+
+    When either bound is exceeded, least-recently-used entries are evicted;
+    the most recent entry is always kept, even if it exceeds the size bound.
+    """
+
+    def __init__(self, maxsize=None, maxbytes=None):
+        # Maximum number of entries (None for unbounded)
+        self.maxsize = maxsize
+        # Maximum size of entries in bytes (None for unbounded)
+        self.maxbytes = maxbytes
+        # Entries, as (value, size) pairs, from least to most recently used
+        self._entries = collections.OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def nbytes(self):
+        # Return the approximate size of all entries in bytes
+        return self._nbytes
+
+    def get(self, key, default=None):
+        # Return an entry, marking it as most recently used
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value, nbytes=0):
+        # Add (or replace) an entry, and evict least-recently-used entries
+        with self._lock:
+            self.pop(key)
+            self._entries[key] = (value, nbytes)
+            self._nbytes += nbytes
+            while len(self._entries) > 1 and self._exceeded():
+                _, (_, size) = self._entries.popitem(last=False)
+                self._nbytes -= size
+
+    def pop(self, key, default=None):
+        # Remove an entry and return its value
+        with self._lock:
+            if key not in self._entries:
+                return default
+            value, nbytes = self._entries.pop(key)
+            self._nbytes -= nbytes
+            return value
+
+    def clear(self):
+        # Remove all entries
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def _exceeded(self):
+        if self.maxsize is not None and len(self._entries) > self.maxsize:
+            return True
+        return self.maxbytes is not None and self._nbytes > self.maxbytes
+
+
+class CachedSequence:
+    """
+    Base class for sequences of simulation objects (e.g. graphs or beliefs)
+    that are loaded on demand and kept in a bounded LRU cache
+
+    Optionally, accessing an item prefetches the next `prefetch` items on a
+    background thread. Subclasses implement `load` and `nbytes`.
+    """
+
+    def __init__(self, length, maxsize=None, maxbytes=None, prefetch=0):
+        self.length = length
+        self.cache = LRUCache(maxsize=maxsize, maxbytes=maxbytes)
+        # Number of items to prefetch
+        self.prefetch = prefetch
+        # Pending prefetches, by index
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self.index = 0
+
+    def load(self, index):
+        # Return item at given index (not cached)
+        raise NotImplementedError
+
+    def nbytes(self, value):
+        # Return the approximate size of an item in bytes
+        return 0
+
+    def __getitem__(self, index):
+        return self.get(index)
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.index >= self.length:
+            self.index = 0
+            raise StopIteration
+        value = self.get(self.index)
+        self.index += 1
+        return value
+
+    def get(self, index):
+        # Return a saved item using its index or load from file
+        if not -self.length <= index < self.length:
+            raise IndexError("Simulation index out of range")
+        index = index % self.length
+        # Prefetch the next items
+        for position in range(index + 1, index + 1 + self.prefetch):
+            if position < self.length:
+                self._submit(position)
+        value = self.cache.get(index)
+        if value is None:
+            with self._lock:
+                future = self._pending.get(index)
+            # Wait for pending prefetch, if any (it may have just completed)
+            value = future.result() if future is not None else self.cache.get(index)
+        if value is None:
+            value = self._fetch(index)
+        return value
+
+    def _fetch(self, index):
+        value = self.load(index)
+        self.cache.put(index, value, self.nbytes(value))
+        return value
+
+    def _prefetch(self, index):
+        try:
+            if index in self.cache:
+                return self.cache.get(index)
+            return self._fetch(index)
+        except Exception:  # pylint: disable=broad-except
+            # Errors are raised when the item is accessed
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop(index, None)
+
+    def _submit(self, index):
+        with self._lock:
+            if index in self._pending or index in self.cache:
+                return
+            if self._executor is None:
+                self._executor = futures.ThreadPoolExecutor(max_workers=1)
+            self._pending[index] = self._executor.submit(self._prefetch, index)
+
+    def clear(self):
+        # Remove all saved items
+        self.cache.clear()
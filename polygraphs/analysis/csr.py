@@ -0,0 +1,143 @@
+import dgl  # Importing Deep Graph Library (DGL) for .bin file graphs
+import numpy as np  # Importing numpy library for CSR arrays
+import networkx as nx  # Importing networkx library for working with graphs
+
+
+class CSRGraph:
+    """
+    A lightweight, undirected graph of a simulation, stored as compressed
+    sparse row (CSR) arrays
+
+    Like the networkx graphs of the GraphConverter, self-loops and parallel
+    edges are removed, and node and edge data from the .bin file are kept in
+    the `pg` dictionary. Conversion to networkx only happens when requested
+    (see `to_networkx`).
+
+    The neighbours of node `i` are `indices[indptr[i]:indptr[i + 1]]`, in
+    increasing order. Optional node labels map positions to nodes of the
+    original graph (e.g. for subgraphs).
+    """
+
+    def __init__(self, indptr, indices, nodes=None, pg=None):
+        # Row pointers and column indices of (symmetric) adjacency matrix
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        # Node labels
+        if nodes is None:
+            nodes = np.arange(len(self.indptr) - 1)
+        self.nodes = np.asarray(nodes)
+        assert len(self.nodes) == len(self.indptr) - 1
+        # Node and edge data
+        self.pg = pg if pg is not None else {"ndata": {}, "edata": {}}
+        # Networkx graph, created on demand (shared by views)
+        self._networkx = [None]
+        # Graph of which this graph is a view (if any)
+        self._graph = None
+
+    @classmethod
+    def fromdgl(cls, graph):
+        """
+        Returns a CSR graph of given DGL graph, ignoring edge directions,
+        self-loops, and parallel edges.
+        """
+        # Remove self-loops (and their edge data)
+        graph = dgl.remove_self_loop(graph)
+        size = graph.num_nodes()
+        src, dst = (tensor.numpy().astype(np.int64) for tensor in graph.edges())
+        # Symmetric, sorted, and unique (row, column) pairs
+        keys = np.unique(np.concatenate((src * size + dst, dst * size + src)))
+        rows, indices = np.divmod(keys, size) if size else (keys, keys)
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+        return cls(indptr, indices, pg={"ndata": graph.ndata, "edata": graph.edata})
+
+    def number_of_nodes(self):
+        return len(self.indptr) - 1
+
+    def number_of_edges(self):
+        return len(self.indices) // 2
+
+    def degree(self, nodes=None):
+        """
+        Returns the degree of all (or given) nodes, by position.
+        """
+        degrees = np.diff(self.indptr)
+        return degrees if nodes is None else degrees[nodes]
+
+    def neighbors(self, node):
+        """
+        Returns the neighbours of a node, by position.
+        """
+        return self.indices[self.indptr[node] : self.indptr[node + 1]]
+
+    def subgraph(self, nodes):
+        """
+        Returns the subgraph induced by given nodes (by position). Node data
+        are sliced accordingly; edge data are not kept.
+        """
+        nodes = np.unique(np.asarray(nodes, dtype=np.int64))
+        # Position of each node in the subgraph (or -1)
+        position = np.full(self.number_of_nodes(), -1, dtype=np.int64)
+        position[nodes] = np.arange(len(nodes))
+        # Edges between selected nodes, in CSR order
+        degrees = self.degree(nodes)
+        rows = np.repeat(np.arange(len(nodes)), degrees)
+        offsets = np.cumsum(degrees) - degrees
+        edges = np.arange(len(rows)) + np.repeat(self.indptr[nodes] - offsets, degrees)
+        columns = position[self.indices[edges]]
+        mask = columns >= 0
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows[mask], minlength=len(nodes)), out=indptr[1:])
+        ndata = {key: self.pg["ndata"][key][nodes] for key in self.pg["ndata"]}
+        return CSRGraph(
+            indptr, columns[mask], self.nodes[nodes], {"ndata": ndata, "edata": {}}
+        )
+
+    def to_scipy(self):
+        """
+        Returns the adjacency matrix as a `scipy.sparse` CSR matrix.
+        """
+        import scipy.sparse  # pylint: disable=import-outside-toplevel
+
+        size = self.number_of_nodes()
+        data = np.ones(len(self.indices), dtype=np.float32)
+        return scipy.sparse.csr_matrix(
+            (data, self.indices, self.indptr), shape=(size, size)
+        )
+
+    def to_networkx(self):
+        """
+        Returns a (read-only) networkx graph, with node and edge data in `pg`.
+        The networkx graph is created once, and shared by all copies.
+        """
+        if self._networkx[0] is None:
+            graph = nx.Graph()
+            graph.add_nodes_from(self.nodes.tolist())
+            rows = np.repeat(np.arange(self.number_of_nodes()), self.degree())
+            # Add each edge once
+            mask = rows < self.indices
+            graph.add_edges_from(
+                zip(
+                    self.nodes[rows[mask]].tolist(),
+                    self.nodes[self.indices[mask]].tolist(),
+                )
+            )
+            self._networkx[0] = graph
+        view = self._networkx[0].copy(as_view=True)
+        view.pg = self.pg
+        return view
+
+    def copy(self, as_view=False):
+        """
+        Returns a copy of the graph. A view shares CSR arrays and the networkx
+        graph (if any) with this graph.
+        """
+        if as_view:
+            graph = CSRGraph(self.indptr, self.indices, self.nodes, dict(self.pg))
+            # pylint: disable=protected-access
+            graph._networkx = self._networkx
+            graph._graph = self._graph or self
+            return graph
+        return CSRGraph(
+            self.indptr.copy(), self.indices.copy(), self.nodes.copy(), dict(self.pg)
+        )
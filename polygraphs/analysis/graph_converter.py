@@ -1,12 +1,67 @@
+import hashlib  # Importing hashlib library for hashing graph topologies
+import threading  # Importing threading library for thread-safe deduplication
+import weakref  # Importing weakref library for shared graph topologies
 import dgl  # Importing Deep Graph Library (DGL) for graph manipulation
+import torch  # Importing PyTorch library for tensor operations
 import networkx as nx  # Importing networkx library for working with graphs
 
+from .cache import CachedSequence
+from .csr import CSRGraph
+
+# Approximate size of networkx graph nodes and (undirected) edges in bytes
+_NODE_BYTES = 220
+_EDGE_BYTES = 150
+
+
+def _topology(graph, implicit=False):
+    """
+    Returns a digest of the nodes and edges of a DGL graph (and of whether
+    it is an implicit complete graph, whose edges are not stored).
+    """
+    src, dst = graph.edges()
+    digest = hashlib.sha1(f"{graph.num_nodes()}:{int(implicit)}".encode())
+    digest.update(src.numpy().tobytes())
+    digest.update(dst.numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _complete(graph):
+    """
+    Returns a fully-connected copy of an (implicit, i.e. edgeless) DGL graph,
+    without self-loops, with the node data of the original graph.
+    """
+    size = graph.num_nodes()
+    src, dst = torch.meshgrid(torch.arange(size), torch.arange(size), indexing="ij")
+    mask = src != dst
+    result = dgl.graph((src[mask], dst[mask]), num_nodes=size)
+    result.ndata.update(graph.ndata)
+    return result
+
 
 class GraphConverter:
-    def get_graph_object(self, filepath):
-        # Load graph object from the specified filepath using dgl
-        graph, _ = dgl.load_graphs(filepath)
-        return graph[0]
+    """
+    Loads the .bin file graphs of simulations, either as networkx graphs or,
+    if `lazy` is True, as lightweight CSR graphs (see `CSRGraph`) that are
+    converted to networkx graphs on demand.
+    """
+
+    def __init__(self, lazy=False):
+        self.lazy = lazy
+
+    def get_dgl_object(self, filepath):
+        # Load graph object from the specified filepath using dgl, and whether
+        # it is an implicit complete graph (whose edges are not stored)
+        graph, labels = dgl.load_graphs(filepath)
+        implicit = "implicit" in labels and bool(labels["implicit"].any())
+        return graph[0], implicit
+
+    def get_graph_object(self, filepath, edges=True):
+        # Load graph object from the specified filepath; the edges of implicit
+        # complete graphs are restored only if needed (there are N^2 of them)
+        graph, implicit = self.get_dgl_object(filepath)
+        if implicit and edges:
+            graph = _complete(graph)
+        return graph
 
     def convert_graph_networkx(self, graph):
         # Remove self-loops from the graph and convert it to a networkx Graph object
@@ -20,51 +75,83 @@ class GraphConverter:
         # Get a networkx Graph object from the specified filepath
         return self.convert_graph_networkx(self.get_graph_object(filepath))
 
+    def convert_graph_csr(self, graph):
+        # Convert graph to a CSR graph (without self-loops), with edge and node data
+        return CSRGraph.fromdgl(graph)
 
-class Graphs:
+    def get_csr_object(self, filepath):
+        # Get a CSR graph object from the specified filepath
+        return self.convert_graph_csr(self.get_graph_object(filepath))
+
+
+class Graphs(CachedSequence):
     """
     The Graphs class stores the graphs of simulations that have been
     explicitly loaded for analysis using the GraphConverter
 
     This class provides an iterator and get item to access graphs
+
+    Loaded graphs are kept in a bounded LRU cache (see `CachedSequence`).
+    If `dedupe` is True, simulations with identical topologies share a single
+    (networkx or CSR) graph: each simulation gets a read-only view of it, with
+    its own node and edge data (`pg`).
     """
 
-    def __init__(self, dataframe, graph_converter):
+    def __init__(
+        self,
+        dataframe,
+        graph_converter,
+        maxsize=None,
+        maxbytes=None,
+        prefetch=0,
+        dedupe=False,
+    ):
+        super().__init__(len(dataframe), maxsize, maxbytes, prefetch)
         self.bin_file_path = dataframe["bin_file_path"]
         self.graph_converter = graph_converter
-        self.graphs = [None] * len(dataframe)
-        self.index = 0
-
-    def __getitem__(self, index):
-        if index > len(self.graphs):
-            raise IndexError("Simulation index out of range")
-        return self.get(index)
-
-    def __len__(self):
-        return len(self.graphs)
-
-    def __iter__(self):
-        return self
-
-    def __next__(self):
-        if self.index >= len(self.graphs):
-            self.index = 0
-            raise StopIteration
-        value = self.get(self.index)
-        self.index += 1
-        return value
+        self.dedupe = dedupe
+        # Shared networkx graphs, by topology (kept while in use)
+        self._topologies = weakref.WeakValueDictionary()
+        self._topologies_lock = threading.Lock()
 
     def load(self, index):
         # Load graph file from index
-        graph = self.graph_converter.get_networkx_object(self.bin_file_path[index])
-        self.graphs[index] = graph
-
-    def get(self, index):
-        # Return a NX graph
-        if self.graphs[index] is not None:
-            return self.graphs[index]
-        elif index < len(self.graphs):
-            self.load(index)
-            return self.graphs[index]
+        lazy = getattr(self.graph_converter, "lazy", False)
+        if not self.dedupe:
+            if lazy:
+                return self.graph_converter.get_csr_object(self.bin_file_path[index])
+            return self.graph_converter.get_networkx_object(self.bin_file_path[index])
+        # Edges of implicit complete graphs are restored only once per topology
+        graph, implicit = self.graph_converter.get_dgl_object(
+            self.bin_file_path[index]
+        )
+        key = _topology(graph, implicit)
+        with self._topologies_lock:
+            shared = self._topologies.get(key)
+        if shared is None:
+            if implicit:
+                graph = _complete(graph)
+            if lazy:
+                shared = self.graph_converter.convert_graph_csr(graph)
+            else:
+                shared = self.graph_converter.convert_graph_networkx(graph)
+            with self._topologies_lock:
+                shared = self._topologies.setdefault(key, shared)
+        # Create a read-only view of the shared graph, with its own data (of
+        # the graph without self-loops, as if it were converted)
+        graph = dgl.remove_self_loop(graph)
+        view = shared.copy(as_view=True)
+        view.pg = {"ndata": graph.ndata, "edata": graph.edata}
+        return view
+
+    def nbytes(self, value):
+        # Approximate size of graph and its node and edge data
+        if isinstance(value, CSRGraph):
+            size = value.indptr.nbytes + value.indices.nbytes + value.nodes.nbytes
         else:
-            raise IndexError("Simulation index out of range")
+            size = _NODE_BYTES * value.number_of_nodes()
+            size += _EDGE_BYTES * value.number_of_edges()
+        for data in value.pg.values():
+            for key in data:
+                size += data[key].nelement() * data[key].element_size()
+        return size
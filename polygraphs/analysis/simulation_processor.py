@@ -1,12 +1,102 @@
+import os
+import hashlib
+import tempfile
 import pandas as pd
 import json
 from pathlib import Path, PosixPath, PurePath
+from concurrent import futures
 import warnings
 
+# Cache directory for manifests, i.e. JSON files that index the processed
+# simulation folders of a root folder (one per root folder)
+_MANIFESTCACHE = "~/polygraphs-cache/manifests"
+_MANIFEST_VERSION = 2
+
+
+def _listdir(path):
+    """
+    Returns a folder's subfolders, and whether it contains a configuration file.
+    """
+    subfolders = []
+    configured = False
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subfolders.append(entry.path)
+                elif entry.name == "configuration.json":
+                    configured = True
+    except (FileNotFoundError, PermissionError) as e:
+        warnings.warn(f"Error accessing folder: {e}", RuntimeWarning)
+    return path, subfolders, configured
+
+
+# Types of path columns in the data frame of a folder (see `read_subfolder`)
+_PATHS = {"bin_file_path": str, "hd5_file_path": str, "config_json_path": Path}
+
+
+def _tojson(value):
+    """
+    Returns JSON-serialisable value of manifest entries, e.g. of numpy
+    scalars in data frames, or of paths.
+    """
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def _encode(entry):
+    """
+    Returns JSON-serialisable manifest entry.
+    """
+    frame = entry["frame"]
+    return {
+        "signature": list(entry["signature"]),
+        "config_path": str(entry["config_path"]),
+        "config": entry["config"],
+        "frame": None if frame is None else frame.to_dict(orient="list"),
+    }
+
+
+def _decode(entry):
+    """
+    Returns manifest entry from its JSON representation (see `_encode`).
+    """
+    config_path = Path(entry["config_path"])
+    frame = entry["frame"]
+    if frame is not None:
+        frame = pd.DataFrame(frame)
+        # Paths are stored as strings; restore them as they are scanned
+        for column, cls in _PATHS.items():
+            if column in frame:
+                frame[column] = [cls(value) for value in frame[column]]
+    return {
+        "signature": tuple(entry["signature"]),
+        "config_path": config_path,
+        "config": entry["config"],
+        "frame": frame,
+    }
+
+
+def _signature(path):
+    """
+    Returns the modification times of a simulation folder and its result files.
+    """
+    signature = []
+    for name in (None, "configuration.json", "data.csv", "data.parquet"):
+        try:
+            filename = path if name is None else os.path.join(path, name)
+            signature.append(os.stat(filename).st_mtime_ns)
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
 
 class SimulationProcessor:
 
-    def __init__(self, include=None, exclude=None, config_check=True):
+    def __init__(
+        self, include=None, exclude=None, config_check=True, workers=8, manifest=True
+    ):
         """
         Initialize SimulationProcessor with optional include and exclude parameters.
 
@@ -14,12 +104,17 @@ class SimulationProcessor:
         - include (dict): Dictionary specifying key-value pairs to include directories based on config.json.
         - exclude (dict): Dictionary specifying key-value pairs to exclude directories based on config.json.
         - ignore_config (bool): Check config folder location in simulation.results
+        - workers (int): Number of threads that scan simulation folders
+        - manifest (bool or str): Persist an index of scanned folders, so that only changed ones are rescanned.
+            Manifests are stored in `~/polygraphs-cache/manifests`, or in the given directory
         """
         self.dataframe = pd.DataFrame()  # DataFrame to store processed simulation data
         self.configs = {}  # Dictionary to save config files
         self.include = include if include else {}
         self.exclude = exclude if exclude else {}
         self.config_check = config_check
+        self.workers = max(1, workers)
+        self.manifest = manifest
         self.initial_columns = ["bin_file_path", "hd5_file_path", "config_json_path"]
 
     def load_config(self, config_json_path):
@@ -58,6 +153,104 @@ class SimulationProcessor:
         else:
             return Path(path).resolve()
 
+    def find_folders(self, root):
+        """
+        Returns all folders below root (inclusive) that contain a configuration
+        file, listing folders in parallel.
+        """
+        folders = []
+        with futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {executor.submit(_listdir, str(root))}
+            while pending:
+                done, pending = futures.wait(
+                    pending, return_when=futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    path, subfolders, configured = future.result()
+                    if configured:
+                        folders.append(path)
+                    pending.update(
+                        executor.submit(_listdir, subfolder) for subfolder in subfolders
+                    )
+        return [Path(folder) for folder in sorted(folders)]
+
+    def manifest_path(self, root):
+        """
+        Returns manifest file of root folder, named after its (hashed) path.
+        """
+        directory = _MANIFESTCACHE if self.manifest is True else self.manifest
+        digest = hashlib.sha256(str(root).encode("utf-8")).hexdigest()
+        return Path(os.path.expanduser(directory)) / f"{digest}.json"
+
+    def load_manifest(self, root):
+        """
+        Returns manifest entries of root folder, by folder path.
+        """
+        try:
+            with open(self.manifest_path(root), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest["version"] == _MANIFEST_VERSION:
+                return {
+                    folder: _decode(entry)
+                    for folder, entry in manifest["entries"].items()
+                }
+        except (OSError, ValueError, KeyError, TypeError):
+            # Missing, unreadable, or invalid manifest; rescan all folders
+            pass
+        return {}
+
+    def store_manifest(self, root, entries):
+        """
+        Stores manifest entries of root folder (atomically).
+        """
+        filename = self.manifest_path(root)
+        manifest = {
+            "version": _MANIFEST_VERSION,
+            "root": str(root),
+            "entries": {folder: _encode(entry) for folder, entry in entries.items()},
+        }
+        try:
+            filename.parent.mkdir(parents=True, exist_ok=True)
+            handle, temporary = tempfile.mkstemp(dir=filename.parent, suffix=".part")
+            try:
+                with os.fdopen(handle, "w", encoding="utf-8") as f:
+                    json.dump(manifest, f, default=_tojson)
+                os.replace(temporary, filename)
+            finally:
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+        except OSError:
+            # Read-only cache directory; skip indexing
+            pass
+
+    def scan_folder(self, folder, manifest=None):
+        """
+        Returns the manifest entry of a simulation folder, i.e. its signature
+        (modification times), configuration, and data frame (before include,
+        exclude, and configuration checks). Entries are reused from the given
+        manifest if the folder has not changed.
+        """
+        signature = _signature(folder)
+        entry = (manifest or {}).get(str(folder))
+        if entry is not None and entry["signature"] == signature:
+            return entry
+        try:
+            config_path = folder / "configuration.json"
+            config_data = self.load_config(config_path)
+            frame = self.read_subfolder(folder, config_path, config_data)
+            if isinstance(frame, pd.DataFrame):
+                frame = frame.dropna(axis=1, how="all")
+        except (FileNotFoundError, PermissionError) as e:
+            # Handle exceptions if there are issues accessing folders
+            warnings.warn(f"Error accessing folder: {e}", RuntimeWarning)
+            return None
+        return {
+            "signature": signature,
+            "config_path": config_path,
+            "config": config_data,
+            "frame": frame,
+        }
+
     def process_simulations(self, path):
         """
         Process simulation data from the specified path.
@@ -69,45 +262,54 @@ class SimulationProcessor:
         - None
 
         This method walks through the directory tree starting from the specified path,
-        identifies subfolders that represent individual simulation runs (identified by
-        valid UUID folder names), processes each subfolder using the `process_subfolder`
-        method, and aggregates the results into a single DataFrame stored in `self.dataframe`.
-        """
-        # Initialize a list to store paths of subfolders representing individual simulations
-        # Include the root folder as one of the folder to search for simulations
-        folders = []
-        if isinstance(path, list):
-            _folders = []
-            for _path in path:
-                _ = self.expand_path(_path)
-                _folders.extend((_, *[x for x in _.rglob("*/")]))
-
-            # Maks sure that folders are unique
-            _folders_set = set(str(f) for f in _folders)
-            folders = [Path(f) for f in _folders_set]
-        else:
-            _ = self.expand_path(path)
-            folders = [_, *[x for x in _.rglob("*/")]]
-
-        # Initialize an empty DataFrame to store processed simulation data
-        result_df = pd.DataFrame(columns=self.initial_columns)
+        identifies subfolders that represent individual simulation runs (i.e. that contain
+        a configuration file), processes them in a pool of threads, and concatenates
+        the results into a single DataFrame stored in `self.dataframe`.
 
-        # Process each subfolder and concatenate the results into the result DataFrame
-        for folder in folders:
-            try:
-                subfolder_df = self.process_subfolder(folder)
-                # Add folder if we get a dataframe with simulations
-                if isinstance(subfolder_df, pd.DataFrame):
-                    result_df = pd.concat(
-                        [result_df, subfolder_df.dropna(axis=1, how="all")],
-                        ignore_index=True,
+        Unless disabled, a manifest of each root folder (see `manifest_path`) indexes
+        processed subfolders, so that subsequent calls only process subfolders that
+        have changed.
+        """
+        roots = path if isinstance(path, list) else [path]
+        # Manifest entries, by folder (unique across roots)
+        entries = {}
+        for root in roots:
+            root = self.expand_path(root)
+            folders = [
+                folder
+                for folder in self.find_folders(root)
+                if str(folder) not in entries
+            ]
+            manifest = self.load_manifest(root) if self.manifest else {}
+            with futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+                scanned = list(
+                    executor.map(
+                        lambda folder: self.scan_folder(folder, manifest), folders
                     )
-            except (FileNotFoundError, PermissionError) as e:
-                # Handle exceptions if there are issues accessing folders
-                warnings.warn(f"Error accessing folder: {e}", RuntimeWarning)
+                )
+            current = {
+                str(folder): entry
+                for folder, entry in zip(folders, scanned)
+                if entry is not None
+            }
+            if self.manifest and current != manifest:
+                self.store_manifest(root, current)
+            entries.update(current)
+
+        # Select folders that meet the criteria, and concatenate their data frames once
+        frames = []
+        for folder, entry in entries.items():
+            if not self.accept_subfolder(Path(folder), entry["config"]):
+                continue
+            if isinstance(entry["frame"], pd.DataFrame):
+                frames.append(entry["frame"])
+                # Store config in self.configs if we didnt skip directory
+                self.configs[entry["config_path"]] = entry["config"]
 
         # Store the aggregated DataFrame in the class attribute `self.dataframe`
-        self.dataframe = result_df
+        self.dataframe = pd.concat(
+            [pd.DataFrame(columns=self.initial_columns), *frames], ignore_index=True
+        )
         self.format_known_column_types()
         self.reorder_columns()
 
@@ -133,6 +335,23 @@ class SimulationProcessor:
         # Load the configuration JSON file
         config_data = self.load_config(config_path)
 
+        # Check configuration file and inclusion/exclusion criteria
+        if not self.accept_subfolder(subfolder_path, config_data):
+            return
+
+        df = self.read_subfolder(subfolder_path, config_path, config_data)
+        if df is not None:
+            # Store config in self.configs if we didnt skip directory
+            self.configs[config_path] = config_data
+
+        # Return the processed DataFrame
+        return df
+
+    def accept_subfolder(self, subfolder_path, config_data):
+        """
+        Returns whether a subfolder passes the configuration check and meets
+        the inclusion/exclusion criteria.
+        """
         # Find base directory (UUID) of simulation directory in configuration file
         config_directory = config_data.get("simulation", {}).get("results", "")
         config_base_dir = PurePath(config_directory).parts[-1]
@@ -145,14 +364,20 @@ class SimulationProcessor:
                 UserWarning,
             )
             if self.config_check == True:
-                return
+                return False
 
         # Check if the subfolder meets the inclusion/exclusion criteria
         if self.include or self.exclude:
             # Skip directory if it meets criteria
             if not self.should_include(config_data) or self.should_exclude(config_data):
-                return
+                return False
+        return True
 
+    def read_subfolder(self, subfolder_path, config_path, config_data):
+        """
+        Returns DataFrame of a subfolder's simulations, or None if it contains no
+        relevant files.
+        """
         # Filter and sort HDF5 files based on their numerical order
         _hd5_files = sorted(subfolder_path.glob("*.hd5"))
 
@@ -167,8 +392,8 @@ class SimulationProcessor:
             # Find corresponding .bin files for each .hd5 file
             _bin_file = sim.with_suffix(".bin")
             if _bin_file.exists():
-                hd5_files.append(str(sim))
-                bin_files.append(str(_bin_file))
+                hd5_files.append(_PATHS["hd5_file_path"](sim))
+                bin_files.append(_PATHS["bin_file_path"](_bin_file))
 
         # Initialize an empty DataFrame to store processed data
         df = pd.DataFrame()
@@ -177,7 +402,7 @@ class SimulationProcessor:
         # Add paths to HDF5 files to the DataFrame
         df["hd5_file_path"] = hd5_files
         # Add configuration JSON file path to the DataFrame
-        df["config_json_path"] = config_path
+        df["config_json_path"] = _PATHS["config_json_path"](config_path)
 
         # Extract parameters from the configuration JSON file
         df["trials"] = config_data.get("trials")
@@ -186,11 +411,15 @@ class SimulationProcessor:
         df["op"] = config_data.get("op")
         df["epsilon"] = config_data.get("epsilon")
 
-        # Check if there is a data.csv file in the subfolder
+        # Check if there is a data.csv (or data.parquet) file in the subfolder
         csv_file = subfolder_path / "data.csv"
+        parquet_file = subfolder_path / "data.parquet"
 
-        if csv_file.exists():
-            csv_df = pd.read_csv(csv_file)
+        if csv_file.exists() or parquet_file.exists():
+            if csv_file.exists():
+                csv_df = pd.read_csv(csv_file)
+            else:
+                csv_df = pd.read_parquet(parquet_file)
             num_files = len(hd5_files)
 
             # Skip folder if rows in CSV doesn't match the number of binary and HDF5 files
@@ -211,9 +440,6 @@ class SimulationProcessor:
             # Extract unique identifier (UID) from the subfolder path
             df["uid"] = subfolder_path.name
 
-        # Store config in self.configs if we didnt skip directory
-        self.configs[config_path] = config_data
-
         # Return the processed DataFrame
         return df
 
@@ -0,0 +1,137 @@
+"""
+Group-level belief statistics of simulations, per iteration
+"""
+
+import multiprocessing  # Importing multiprocessing library for worker processes
+from concurrent import futures  # Importing futures library for process pools
+
+import numpy as np  # Importing numpy library for belief reductions
+import pandas as pd  # Importing pandas library for data manipulation
+
+from .belief_processor import BeliefProcessor
+from .graph_converter import GraphConverter
+
+# Statistics computed for each iteration
+COLUMNS = ("fraction", "mean", "variance", "gap")
+
+
+def statistics(values, threshold=0.5, upperlower=0.5, lowerupper=0.99):
+    """
+    Returns statistics of beliefs, given as an [iterations, nodes] array,
+    for each iteration (row):
+
+        fraction: fraction of nodes that believe B is better (belief > threshold)
+        mean:     mean belief
+        variance: (population) variance of beliefs
+        gap:      polarization gap, i.e. the difference between the weakest
+                  strong believer (belief > lowerupper) and the strongest
+                  disbeliever (belief <= upperlower); NaN if either is missing
+
+    The polarization gap is the quantity that, multiplied by mistrust, decides
+    whether a network is polarized at the end of a simulation.
+    """
+    values = np.asarray(values)
+    mean = values.mean(axis=1, dtype=np.float64)
+    variance = values.var(axis=1, dtype=np.float64)
+    fraction = np.count_nonzero(values > threshold, axis=1) / max(values.shape[1], 1)
+    upper = values > lowerupper
+    lower = values <= upperlower
+    weakest = np.where(upper, values, np.inf).min(axis=1, initial=np.inf)
+    strongest = np.where(lower, values, -np.inf).max(axis=1, initial=-np.inf)
+    gap = np.where(upper.any(axis=1) & lower.any(axis=1), weakest - strongest, np.nan)
+    return {"fraction": fraction, "mean": mean, "variance": variance, "gap": gap}
+
+
+def _simulation(hd5_file_path, bin_file_path, belief_processor, chunksize, options):
+    """
+    Returns statistics of a simulation, reading its beliefs a chunk of
+    iterations at a time.
+    """
+    # Initial beliefs are stored in the .bin file graph (edges are not needed)
+    graph = GraphConverter().get_graph_object(bin_file_path, edges=False)
+    iterations, results = [], []
+    start = 0
+    while not iterations or len(iterations[-1]) == chunksize:
+        beliefs = belief_processor.get_array(
+            hd5_file_path, graph, iterations=slice(start, start + chunksize)
+        )
+        iterations.append(beliefs.iterations)
+        results.append(statistics(beliefs.values, **options))
+        start += chunksize
+    return _concatenate(iterations, results)
+
+
+def _concatenate(iterations, results):
+    """
+    Concatenates iterations and their statistics.
+    """
+    return np.concatenate([np.empty(0, np.int64), *iterations]), {
+        column: np.concatenate([np.empty(0), *(result[column] for result in results)])
+        for column in COLUMNS
+    }
+
+
+def belief_statistics(
+    source,
+    columns=(),
+    indices=None,
+    workers=None,
+    chunksize=1024,
+    belief_processor=None,
+    **options,
+):
+    """
+    Returns statistics of beliefs (see `statistics`) for each iteration of
+    many simulations, as a tidy DataFrame with one row per simulation and
+    iteration.
+
+    Parameters:
+    - source (Processor or pandas.DataFrame): Simulations, i.e. a processor or its dataframe.
+    - columns (list): Columns of the simulation dataframe to add to the result (e.g. "op").
+    - indices (list): Simulations (dataframe index labels) to consider; all if None.
+    - workers (int): Number of worker processes; simulations are processed one at a time if None.
+    - chunksize (int): Number of iterations read from a simulation file at a time.
+    - belief_processor (BeliefProcessor): Reads beliefs of a simulation.
+    - options: Thresholds of `statistics` (threshold, upperlower, and lowerupper).
+
+    Beliefs are read from snapshot files as [iterations, nodes] arrays, one
+    file (and chunk of iterations) at a time, so that memory usage does not
+    grow with the number of simulations.
+    """
+    dataframe = getattr(source, "dataframe", source)
+    if indices is not None:
+        dataframe = dataframe.loc[list(indices)]
+    if belief_processor is None:
+        # Use the belief processor of a processor, if any
+        beliefs = getattr(source, "beliefs", None)
+        belief_processor = getattr(beliefs, "belief_processor", BeliefProcessor())
+    tasks = [
+        (row.hd5_file_path, row.bin_file_path, belief_processor, chunksize, options)
+        for row in dataframe.itertuples()
+    ]
+    if workers:
+        # Spawn (rather than fork) workers, since forking a process
+        # after PyTorch has started its thread pool is unsafe
+        context = multiprocessing.get_context("spawn")
+        with futures.ProcessPoolExecutor(
+            max_workers=workers, mp_context=context
+        ) as executor:
+            results = list(executor.map(_simulation, *zip(*tasks))) if tasks else []
+    else:
+        results = [_simulation(*task) for task in tasks]
+
+    # Concatenate statistics of all simulations at once
+    lengths = [len(iterations) for iterations, _ in results]
+    iterations, values = (
+        _concatenate(*zip(*results)) if results else _concatenate([], [])
+    )
+    frame = pd.DataFrame(
+        {
+            "simulation": np.repeat(dataframe.index.to_numpy(), lengths),
+            "iteration": iterations,
+            **values,
+        }
+    )
+    for column in columns:
+        frame[column] = np.repeat(dataframe[column].to_numpy(), lengths)
+    return frame
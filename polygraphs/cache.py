@@ -0,0 +1,169 @@
+"""
+Persistent cache of PolyGraph networks
+
+Networks are stored with `dgl.save_graphs`, under a key derived from their
+hyper-parameters (and the contents of any local file they are read from), so
+that they are shared across repeats, configurations, and processes.
+"""
+import os
+import json
+import hashlib
+import tempfile
+
+import dgl
+import networkx as nx
+import torch
+
+from .datasets.dataset import _DATACACHE
+from .logger import getlogger
+
+log = getlogger()
+
+# Cache directory for all graphs
+_GRAPHCACHE = "~/polygraphs-cache/graphs"
+
+# Network kinds whose size is determined by the network itself
+_SIZED = ("sample", "karate", "snap", "ogb", "francisbacon", "gml")
+
+# Hashes of local files, by filename, size, and modification time
+_hashes = {}
+
+
+def _filehash(filename):
+    """
+    Returns SHA-256 hash of a local file's contents.
+    """
+    stat = os.stat(filename)
+    memo = (filename, stat.st_size, stat.st_mtime_ns)
+    if memo not in _hashes:
+        digest = hashlib.sha256()
+        with open(filename, "rb") as stream:
+            for block in iter(lambda: stream.read(1 << 20), b""):
+                digest.update(block)
+        _hashes[memo] = digest.hexdigest()
+    return _hashes[memo]
+
+
+def _dataset(params):
+    """
+    Returns the dataset that a network is read from (if any).
+    """
+    # pylint: disable=import-outside-toplevel
+    if params.kind == "snap":
+        from .datasets import snap
+
+        return snap.getbyname(params.snap.name)
+    if params.kind == "ogb":
+        from .datasets import ogb
+
+        return ogb.Collab()
+    return None
+
+
+def _files(params):
+    """
+    Returns local files that a network is read from. Files of datasets are
+    local copies of their (possibly remote) origins, once fetched.
+    """
+    if params.kind == "gml" and params.gml.path:
+        return [os.path.abspath(os.path.expanduser(params.gml.path))]
+    if params.kind == "francisbacon":
+        filename = os.path.join(
+            os.path.expanduser(_DATACACHE), "francisbacon", "francisbacon.gml.gz"
+        )
+        return [filename]
+    dataset = _dataset(params)
+    if dataset is not None:
+        return [value.filename(dataset.folder) for value in dataset.files.values()]
+    return []
+
+
+def key(params):
+    """
+    Returns the cache key of a network, given its hyper-parameters, or None
+    if the network cannot be cached (e.g. its file is missing).
+    """
+    kind = params.kind
+    config = {
+        "kind": kind,
+        "directed": params.directed,
+        "selfloop": params.selfloop,
+        "engine": params.engine,
+        "implicit": params.implicit,
+        # Generated networks may differ across library versions
+        "versions": [dgl.__version__, nx.__version__],
+    }
+    if kind not in _SIZED:
+        config["size"] = params.size
+    if kind in params:
+        # Network-specific configuration (e.g. params.random)
+        config[kind] = getattr(params, kind)
+    files = _files(params)
+    if not all(os.path.isfile(filename) for filename in files):
+        # Let the network constructor fetch (or report) missing files
+        return None
+    config["files"] = [_filehash(filename) for filename in files]
+    body = json.dumps(config, default=lambda x: x.ht, sort_keys=True)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def _filename(name):
+    return os.path.join(os.path.expanduser(_GRAPHCACHE), f"{name}.bin")
+
+
+def load(name):
+    """
+    Returns cached graph and its size, or None if not found.
+    """
+    filename = _filename(name)
+    try:
+        graphs, labels = dgl.load_graphs(filename)
+    except (OSError, dgl.DGLError):
+        return None
+    # Mark entry as recently used
+    os.utime(filename)
+    return graphs[0], int(labels["size"].item())
+
+
+def store(name, graph, size, capacity=None):
+    """
+    Stores graph in cache (atomically) and evicts least recently used entries
+    until the cache is at most `capacity` megabytes.
+    """
+    directory = os.path.expanduser(_GRAPHCACHE)
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".part")
+    os.close(handle)
+    try:
+        dgl.save_graphs(temporary, [graph], {"size": torch.tensor([size])})
+        os.replace(temporary, _filename(name))
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    if capacity is not None:
+        evict(capacity)
+
+
+def evict(capacity):
+    """
+    Evicts least recently used entries until the cache is at most `capacity`
+    megabytes.
+    """
+    directory = os.path.expanduser(_GRAPHCACHE)
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.endswith(".bin"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    # Oldest entries first
+    for _, size, path in sorted(entries):
+        if total <= capacity * (1 << 20):
+            break
+        try:
+            os.remove(path)
+            log.debug("Evicted graph %s from cache", os.path.basename(path))
+        except FileNotFoundError:
+            # Entry evicted by another process
+            pass
+        total -= size
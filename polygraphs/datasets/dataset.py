@@ -4,6 +4,7 @@ PolyGraph datasets and dataset files
 import os
 import abc
 import urllib
+import concurrent.futures
 import six
 
 from . import utils as datautils
@@ -15,24 +16,21 @@ _DATACACHE = "~/polygraphs-cache/data"
 class PolyGraphDatasetFile:
     """
     A dataset file (either remote, local, or a local copy)
+
+    Remote origins are validated lazily, when they are fetched. An optional
+    SHA-256 checksum verifies downloads.
     """
 
-    def __init__(self, origin):
+    def __init__(self, origin, checksum=None):
         # File origin must be a string
         assert isinstance(origin, str)
 
         self._origin = origin
         self._remote = bool(urllib.parse.urlparse(origin).scheme)
+        self._checksum = checksum
 
-        # Validate origin
-        if self._remote:
-            # Ensure origin is a valid remote location
-            try:
-                ctx = urllib.request.urlopen(origin)
-                ctx.close()
-            except urllib.error.URLError as err:
-                raise Exception("Invalid file origin: {}".format(origin)) from err
-        else:
+        # Validate local origin (remote origins are validated upon fetch)
+        if not self._remote:
             # Ensure origin is a valid file
             if not os.path.isfile(origin):
                 raise Exception("Invalid file origin: {}".format(origin))
@@ -58,6 +56,17 @@ class PolyGraphDatasetFile:
         """
         return not self._remote
 
+    def filename(self, folder):
+        """
+        Returns local file of origin, i.e. the file in given local folder
+        that a remote origin is (or would be) downloaded to.
+        """
+        if self.local:
+            return self.origin
+        return os.path.join(
+            folder, os.path.basename(urllib.parse.urlparse(self.origin).path)
+        )
+
     def fetch(self, folder):
         """
         Downloads remote origin to local folder.
@@ -68,11 +77,12 @@ class PolyGraphDatasetFile:
         # Ensure local folder exists
         assert os.path.isdir(folder)
         # Construct destination file
-        filename = os.path.join(
-            folder, os.path.basename(urllib.parse.urlparse(self.origin).path)
-        )
+        filename = self.filename(folder)
         # Maybe download file
-        datautils.download(self.origin, filename)
+        try:
+            datautils.download(self.origin, filename, checksum=self._checksum)
+        except urllib.error.URLError as err:
+            raise Exception("Invalid file origin: {}".format(self.origin)) from err
         # File no longer considered remote
         self._origin = filename
         self._remote = False
@@ -84,7 +94,7 @@ class PolyGraphDataset(metaclass=abc.ABCMeta):
     Base class from which all datasets are derived
     """
 
-    def __init__(self, folder=None, directed=True, **kwargs):
+    def __init__(self, folder=None, directed=True, checksums=None, **kwargs):
 
         # Ensure local folder is set and it does not start with a tilde
         folder = os.path.expanduser(folder or ".")
@@ -106,8 +116,9 @@ class PolyGraphDataset(metaclass=abc.ABCMeta):
         self.directed = directed
 
         # The rest of the keyword argument are named dataset files;
-        # let's parse them
+        # let's parse them (with their SHA-256 checksums, if any)
         self.files = {}
+        checksums = checksums or {}
 
         for name, value in six.iteritems(kwargs):
             # Value must be a string
@@ -115,17 +126,24 @@ class PolyGraphDataset(metaclass=abc.ABCMeta):
             # Name must not correspond to an attribute (e.g. 'self.folder' or 'self.files')
             assert not hasattr(self, name)
             # Add (or update) dataset file
-            self.files[name] = PolyGraphDatasetFile(value)
+            self.files[name] = PolyGraphDatasetFile(value, checksum=checksums.get(name))
 
         # Make named datasets accessible with the dot notation
         self.__dict__.update(self.files)
 
-    def fetchall(self):
+    def fetchall(self, workers=4):
         """
-        Downloads all dataset files.
+        Downloads all dataset files, concurrently.
         """
-        for _, value in six.iteritems(self.files):
-            value.fetch(self.folder)
+        remote = [value for value in self.files.values() if value.remote]
+        if not remote:
+            return
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(workers, len(remote))
+        ) as executor:
+            # Re-raise the first error, if any
+            for _ in executor.map(lambda value: value.fetch(self.folder), remote):
+                pass
 
     @abc.abstractproperty
     def collection(self):
@@ -7,9 +7,9 @@ import pandas as pd
 import numpy as np
 import torch
 import dgl
-import networkx as nx
 
 from .dataset import PolyGraphDataset
+from . import gml
 
 class FrancisBacon(PolyGraphDataset):
     """
@@ -42,12 +42,11 @@ class FrancisBacon(PolyGraphDataset):
         gml_file = os.path.join(self.folder, "francisbacon.gml.gz")
         assert os.path.isfile(gml_file), "File not found: francisbacon.gml.gz"
 
-        # Load graph from GML file
-        G = nx.read_gml(gml_file, destringizer=int)
-
-        # Load graph using edge list so that we preserve node ids
-        edges = [torch.tensor((edge[0], edge[1])) for edge in list(nx.to_edgelist(G))]
-        graph = dgl.graph(edges)
+        # Load edges from GML file, mapping normalised node ids back to
+        # the original ones so that we preserve them
+        edges, ids = gml.read(gml_file)
+        edges = torch.from_numpy(ids[edges])
+        graph = dgl.graph((edges[0], edges[1]))
         # Convert to a bi-directed DGL graph because this is an undirected graph
         graph = dgl.to_bidirected(graph)
 
@@ -0,0 +1,179 @@
+"""
+PolyGraph GML edge reader
+
+Extracts edges from GML files as NumPy arrays, without building a networkx
+graph. The result is the same as reading the file with `nx.read_gml` (with
+node labels converted to integers) and normalising node identifiers (from 0
+to N) in order of first appearance in `nx.to_edgelist`.
+
+Results are cached in a binary sidecar file next to the GML file (e.g.
+`network.gml.npz` for `network.gml`), which is invalidated when the GML file
+changes.
+"""
+import os
+import re
+import gzip
+
+import numpy as np
+
+
+# GML tokens: comments, strings, list delimiters, and keys or numbers
+_TOKENS = re.compile(r'#[^\n]*|"[^"\n]*"|[\[\]]|[^\s\[\]"#]+')
+
+
+def _open(filename):
+    if filename.endswith(".gz"):
+        return gzip.open(filename, "rt", encoding="utf-8")
+    return open(filename, "r", encoding="utf-8")
+
+
+def _tokenize(filename, chunksize=1 << 24):
+    """
+    Yields lists of GML tokens, reading the file in chunks.
+    """
+    with _open(filename) as stream:
+        remainder = ""
+        while True:
+            chunk = stream.read(chunksize)
+            if not chunk:
+                break
+            chunk = remainder + chunk
+            # Tokens do not span lines; keep the last (incomplete) line
+            # for the next chunk
+            cut = chunk.rfind("\n") + 1
+            remainder = chunk[cut:]
+            yield _TOKENS.findall(chunk, 0, cut)
+        yield _TOKENS.findall(remainder)
+
+
+def _integer(token):
+    """
+    Returns a GML integer, or string converted to integer.
+    """
+    if token.startswith('"'):
+        token = token[1:-1]
+    try:
+        return int(token)
+    except ValueError as error:
+        raise ValueError("GML File: Node IDs should be specified as integers") from error
+
+
+def _parse(filename):
+    """
+    Returns node identifiers, labels, and edges (as source and target node
+    identifiers), in order of appearance, and whether the graph is directed
+    or a multigraph.
+    """
+    ids, labels, sources, targets = [], [], [], []
+    flags = {"directed": False, "multigraph": False}
+    # Keys of enclosing lists, and current record (node or edge) attributes
+    path = []
+    record = None
+    key = None
+    for tokens in _tokenize(filename):
+        for token in tokens:
+            if token[0] == "#":
+                # Comment
+                continue
+            if key is None:
+                if token == "]":
+                    if len(path) == 2 and record is not None:
+                        # End of node or edge record
+                        if path[1] == "node":
+                            if "label" not in record:
+                                raise ValueError("GML File: Node has no 'label'")
+                            ids.append(record.get("id"))
+                            labels.append(record["label"])
+                        else:
+                            sources.append(record.get("source"))
+                            targets.append(record.get("target"))
+                        record = None
+                    path.pop()
+                else:
+                    key = token
+                continue
+            # Value of current key
+            if token == "[":
+                path.append(key)
+                if len(path) == 2 and path[0] == "graph" and key in ("node", "edge"):
+                    record = {}
+            elif record is not None and len(path) == 2:
+                if key in ("id", "label", "source", "target"):
+                    record[key] = token
+            elif path == ["graph"] and key in flags:
+                flags[key] = bool(int(token))
+            key = None
+    if None in ids or None in sources or None in targets:
+        raise ValueError("GML File: Invalid node or edge")
+    return ids, labels, sources, targets, flags["directed"], flags["multigraph"]
+
+
+def _firstindex(keys):
+    """
+    Returns, for each key, the index of its first occurrence.
+    """
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    return first[inverse.reshape(-1)]
+
+
+def _extract(filename):
+    """
+    Returns normalised edges, as a 2 x E array, and the original identifiers
+    (i.e. labels) of normalised nodes.
+    """
+    ids, labels, sources, targets, directed, multigraph = _parse(filename)
+    ids = np.array([int(token) for token in ids], dtype=np.int64)
+    labels = np.array([_integer(token) for token in labels], dtype=np.int64)
+    if len(np.unique(ids)) < len(ids) or len(np.unique(labels)) < len(labels):
+        raise ValueError("GML File: Duplicate node identifiers")
+    # Map edge endpoints to node positions (in order of declaration)
+    order = np.argsort(ids, kind="stable")
+    endpoints = np.array([sources, targets], dtype=np.int64).reshape(2, -1)
+    position = np.searchsorted(ids, endpoints, sorter=order).clip(max=len(ids) - 1)
+    position = order[position] if len(ids) else position
+    if endpoints.size and not np.array_equal(ids[position], endpoints):
+        raise ValueError("GML File: Edge refers to undefined node")
+    src, dst = position
+    if not directed:
+        # Undirected edges are listed from the endpoint declared first
+        src, dst = np.minimum(src, dst), np.maximum(src, dst)
+    pairs = src * len(ids) + dst
+    first = _firstindex(pairs)
+    if not multigraph and not np.array_equal(first, np.arange(len(pairs))):
+        raise ValueError("GML File: Duplicate edge (not a multigraph)")
+    # Edges are listed by source node, then by first appearance of each
+    # neighbour (and parallel edges are grouped together)
+    index = np.lexsort((np.arange(len(pairs)), first, src))
+    src, dst = src[index], dst[index]
+    # Normalise node identifiers (from 0 to N), in order of first appearance
+    # (source followed by destination node, edge by edge)
+    nodes = np.stack((src, dst), axis=1).reshape(-1)
+    unique, first, inverse = np.unique(nodes, return_index=True, return_inverse=True)
+    rank = np.empty(len(unique), dtype=np.int64)
+    rank[np.argsort(first, kind="stable")] = np.arange(len(unique))
+    edges = rank[inverse.reshape(-1)].reshape(-1, 2).T
+    return np.ascontiguousarray(edges), labels[unique[np.argsort(rank)]]
+
+
+def read(filename):
+    """
+    Returns normalised edges of a GML file, as a 2 x E array, and the original
+    identifiers (i.e. labels) of normalised nodes.
+    """
+    stat = os.stat(filename)
+    stamp = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+    cached = f"{filename}.npz"
+    if os.path.isfile(cached):
+        with np.load(cached) as entry:
+            if np.array_equal(entry["stamp"], stamp):
+                return entry["edges"], entry["ids"]
+    edges, ids = _extract(filename)
+    try:
+        # Cache normalised edges next to the GML file (atomically)
+        with open(f"{cached}.part", "wb") as stream:
+            np.savez(stream, edges=edges, ids=ids, stamp=stamp)
+        os.replace(f"{cached}.part", cached)
+    except OSError:
+        # Read-only location; skip caching
+        pass
+    return edges, ids
@@ -2,6 +2,7 @@
 PolyGraph OGB datasets
 """
 import os
+from urllib.parse import urljoin
 
 import pandas as pd
 import numpy as np
@@ -12,6 +13,9 @@ from .dataset import PolyGraphDataset
 from .utils import unzip
 
 
+_OGB = "http://snap.stanford.edu/ogb/"
+
+
 class Collab(PolyGraphDataset):
     """
     The ogbl-collab dataset from https://ogb.stanford.edu/docs/linkprop/#ogbl-collab.
@@ -27,7 +31,7 @@ class Collab(PolyGraphDataset):
     """
 
     def __init__(self):
-        origin = "http://snap.stanford.edu/ogb/data/linkproppred/collab.zip"
+        origin = urljoin(_OGB, "data/linkproppred/collab.zip")
         super().__init__(directed=False, data=origin)
 
     @property
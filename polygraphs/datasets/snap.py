@@ -2,10 +2,11 @@
 PolyGraph SNAP datasets
 """
 
-from collections import deque, defaultdict
+import os
 import gzip
 from urllib.parse import urljoin
 import numpy as np
+import pandas as pd
 import torch
 import dgl
 
@@ -22,8 +23,10 @@ class SNAPDataset(PolyGraphDataset):
 
     def __init__(self, folder, directed=True, edges=None, **extra):
 
-        # Lookup table for normalising node identifier to 0 to N
-        self.tbl = defaultdict(lambda: len(self.tbl))
+        # Original node identifiers, indexed by normalised identifier (0 to N),
+        # and their sort order (for reverse lookups)
+        self.nodes = None
+        self.order = None
 
         super().__init__(folder=folder, directed=directed, edges=edges, **extra)
 
@@ -31,33 +34,69 @@ class SNAPDataset(PolyGraphDataset):
     def collection(self):
         return "snap"
 
-    def __read_edges(self):
+    def __read_edges(self, chunksize=1 << 24):
         # pylint: disable=no-member
         """
-        Reads edges (u, v) from dataset file and returns two lists,
+        Reads edges (u, v) from dataset file and returns two arrays,
         U and V for source and destination nodes, respectively.
         """
-        src, dst = deque(), deque()
+        src, dst = [], []
+
+        # Read gzip file as txt, in chunks. Each line has two numbers, the source
+        # (u) and destination node id (v), followed by timestamps for temporal
+        # graphs (ignored)
+        reader = pd.read_csv(
+            self.edges.origin,
+            sep=r"\s+",
+            comment="#",
+            header=None,
+            usecols=[0, 1],
+            dtype=np.int64,
+            chunksize=chunksize,
+        )
+        with reader:
+            for chunk in reader:
+                src.append(chunk[0].to_numpy())
+                dst.append(chunk[1].to_numpy())
+
+        src = np.concatenate(src) if src else np.empty(0, dtype=np.int64)
+        dst = np.concatenate(dst) if dst else np.empty(0, dtype=np.int64)
+
+        # Normalise node identifiers (from 0 to N), in order of first appearance
+        # among source nodes, followed by destination nodes
+        nodes, first, inverse = np.unique(
+            np.concatenate((src, dst)), return_index=True, return_inverse=True
+        )
+        order = np.argsort(first, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        inverse = rank[inverse.reshape(-1)]
 
-        # Read gzip file as txt
-        with gzip.open(
-            self.edges.origin, mode="rt"
-        ) as txt:  # pylint: disable=no-member
-            for line in txt:
-                # Ignore comments
-                if line.startswith("#"):
-                    continue
-                # Each line has two numbers, the source (u) and destination node
-                # id (v), we catch timestamps for temporal graphs with t
-                u, v, *t = list(map(int, line.split()))  # pylint: disable=invalid-name
-                src.append(u)
-                dst.append(v)
+        return inverse.reshape(2, -1), nodes[order]
 
-        # Normalise node identifiers (from 0 to N)
-        src = [self.tbl[node] for node in src]
-        dst = [self.tbl[node] for node in dst]
+    def __cached(self):
+        # pylint: disable=no-member
+        """
+        Returns the filenames of cached (normalised) edges and node identifiers,
+        and of the stamp (size and modification time) of the dataset file they
+        were read from.
+        """
+        return (
+            f"{self.edges.origin}.edges.npy",
+            f"{self.edges.origin}.nodes.npy",
+            f"{self.edges.origin}.stamp.npy",
+        )
 
-        return src, dst
+    def index(self, nodes):
+        """
+        Returns normalised identifiers (from 0 to N) of original node identifiers.
+        """
+        if self.order is None:
+            self.order = np.argsort(self.nodes, kind="stable")
+        result = self.order[np.searchsorted(self.nodes, nodes, sorter=self.order)]
+        # All node identifiers should be present in the dataset
+        assert np.array_equal(self.nodes[result], nodes), "Invalid node identifier"
+        return result
 
     def read(self):
         """
@@ -66,13 +105,36 @@ class SNAPDataset(PolyGraphDataset):
         # Fetch all dataset files
         self.fetchall()
 
-        # Create two symmetric lists for source and destination nodes, respectively,
-        # representing edges from src[i] to dst[i]
-        src, dst = self.__read_edges()
+        edgefile, nodefile, stampfile = self.__cached()
+        stat = os.stat(self.edges.origin)
+        stamp = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+        # Cached edges are invalidated when the dataset file changes
+        valid = all(os.path.isfile(f) for f in (edgefile, nodefile, stampfile))
+        if not (valid and np.array_equal(np.load(stampfile), stamp)):
+            # Create two arrays for source and destination nodes, respectively,
+            # representing edges from src[i] to dst[i]
+            edges, nodes = self.__read_edges()
+            # Cache normalised edges next to the dataset file (atomically); the
+            # stamp is written last, once edges and node identifiers are cached
+            for filename, array in (
+                (nodefile, nodes),
+                (edgefile, edges),
+                (stampfile, stamp),
+            ):
+                with open(f"{filename}.part", "wb") as stream:
+                    np.save(stream, array)
+                os.replace(f"{filename}.part", filename)
+
+        # Memory-map cached edges (copy-on-write, since tensors are writable)
+        # and node identifiers
+        edges = np.load(edgefile, mmap_mode="c")
+        self.nodes = np.load(nodefile, mmap_mode="r")
+        self.order = None
 
         # Create DGL graph from edges
         return dgl.graph(
-            (torch.Tensor(src).to(torch.int64), torch.Tensor(dst).to(torch.int64))
+            (torch.from_numpy(edges[0]), torch.from_numpy(edges[1])),
+            num_nodes=len(self.nodes),
         )
 
 
@@ -269,15 +331,9 @@ class LiveJournal(SNAPDataset):
                     continue
                 # Each line contains a list of numbers, indicating which nodes
                 # belong to the j-th community
-                community = list(map(int, line.split()))
-                for node in community:
-                    # All node ids should be present in the translation table
-                    # assert node in self.tbl
-                    # Get canonical index
-                    i = self.tbl[node]
-                    # Each entry should be unique (thus set once)
-                    # assert not group[i][j]
-                    group[i][j] = 1
+                community = np.array(line.split(), dtype=np.int64)
+                # Get canonical indices
+                group[self.index(community), j] = 1
 
         # Set node features
         graph.ndata["group"] = torch.from_numpy(group)
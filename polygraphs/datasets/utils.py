@@ -6,6 +6,14 @@ import sys
 
 # For downloads
 import urllib
+import hashlib
+import contextlib
+
+try:
+    # For download locks (POSIX only)
+    import fcntl
+except ImportError:
+    fcntl = None
 
 # For unzip
 import zipfile
@@ -53,43 +61,112 @@ class _ProgressBar:  # pylint: disable=too-few-public-methods
             self.previous = slot
 
 
-def download(url, filename):
+def sha256(filename, blocksize=1 << 20):
+    """
+    Returns SHA-256 hash of a local file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(filename, "rb") as stream:
+        for block in iter(lambda: stream.read(blocksize), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@contextlib.contextmanager
+def _lock(filename):
+    """
+    Holds an exclusive lock on given (lock) file, waiting for other processes
+    or threads to release it first. Locks are released when their holder exits,
+    even if it is killed. On platforms without `fcntl`, files are not locked.
+    """
+    with open(filename, "a", encoding="utf-8") as stream:
+        if fcntl is not None:
+            fcntl.flock(stream.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(stream.fileno(), fcntl.LOCK_UN)
+
+
+def download(url, filename, checksum=None, blocksize=1 << 20):
     """
     Downloads a remote file, denoted by given URL, to a local file.
+
+    The file is downloaded to a partial file first (`[file].part`). If a
+    previous download was interrupted, it resumes from the end of the partial
+    file (provided that the server supports range requests). If a SHA-256
+    checksum is given, the download is verified before the partial file is
+    renamed. Concurrent downloads of the same file (e.g. by workers) wait on
+    a lock file (`[file].lock`), so that only one of them writes to it.
     """
     if os.path.isfile(filename):
         # File already exists; do not download
         log.info("File '%s' already exists", filename)
         return
+    with _lock(f"{filename}.lock"):
+        # File may have been downloaded while waiting for the lock
+        if os.path.isfile(filename):
+            log.info("File '%s' already exists", filename)
+            return
+        _download(url, filename, checksum, blocksize)
 
+
+def _download(url, filename, checksum, blocksize):
+    """
+    Downloads a remote file (see `download`), holding its lock.
+    """
     # Pretty print download message
     components = urllib.parse.urlparse(url)
     log.info(
         "Downloading '%s' from %s", os.path.basename(components.path), components.netloc
     )
 
-    # Create rudimentary progress bar (and report hook)
+    # Create rudimentary progress bar
     reporter = _ProgressBar()
 
-    def reporthook(nb, bs, fs):  # pylint: disable=invalid-name
-        reporter.update(nb, bs, fs)
+    partial = f"{filename}.part"
+    # Number of bytes downloaded thus far
+    offset = os.path.getsize(partial) if os.path.isfile(partial) else 0
+
+    request = urllib.request.Request(url)
+    if offset:
+        log.info("Resuming download from byte %d", offset)
+        request.add_header("Range", f"bytes={offset}-")
 
     clock = Timer()
     clock.start()
     # Try download
     try:
-        urllib.request.urlretrieve(url, filename, reporthook=reporthook)
-    except KeyboardInterrupt:
-        # Try remove downloaded file
-        if os.path.exists(filename):
-            os.remove(filename)
-        raise
+        with urllib.request.urlopen(request) as response:
+            if offset and response.status != 206:
+                # Range request ignored; start over
+                offset = 0
+            # Total file size (or -1, if unknown)
+            total = offset + response.length if response.length is not None else -1
+            with open(partial, "ab" if offset else "wb") as stream:
+                count = offset
+                for block in iter(lambda: response.read(blocksize), b""):
+                    stream.write(block)
+                    count += len(block)
+                    if total > 0:
+                        reporter.update(count, 1, total)
+    except urllib.error.HTTPError as err:
+        # Partial file is already complete
+        if not (offset and err.code == 416):
+            raise
+    # Verify download
+    if checksum is not None and sha256(partial) != checksum.lower():
+        os.remove(partial)
+        raise Exception(f"Invalid checksum: {os.path.basename(filename)}")
+    os.replace(partial, filename)
     log.info("Download complete (%.2fs)", clock.dt())
 
 
 def unzip(filename, folder=None):
     """
-    Extracts contents of ZIP archive to folder.
+    Extracts contents of ZIP archive to folder, unless they have already been
+    extracted (i.e. a completion marker exists for the same archive).
     """
     # Check that filename is a valid ZIP file
     assert zipfile.is_zipfile(filename)
@@ -106,6 +183,16 @@ def unzip(filename, folder=None):
         log.info("Creating directory %s", folder)
         os.makedirs(folder)
 
+    # Completion marker, identifying the archive by its size and modification time
+    marker = os.path.join(folder, f".{tail}.extracted")
+    stat = os.stat(filename)
+    stamp = f"{stat.st_size} {stat.st_mtime_ns}"
+    if os.path.isfile(marker):
+        with open(marker, "r", encoding="utf-8") as stream:
+            if stream.read() == stamp:
+                log.info("Archive '%s' already extracted", tail)
+                return
+
     # Pretty print unzip message
     log.info("Extracting '%s'", tail)
 
@@ -114,6 +201,9 @@ def unzip(filename, folder=None):
     clock.start()
     with zipfile.ZipFile(filename, "r") as ctx:
         ctx.extractall(folder)
+    # Mark extraction as complete
+    with open(marker, "w", encoding="utf-8") as stream:
+        stream.write(stamp)
     log.info("Unzip complete (%.2fs)", clock.dt())
 
 
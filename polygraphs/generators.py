@@ -0,0 +1,233 @@
+"""
+Native graph generators
+
+Generators construct edges as NumPy arrays directly, rather than via networkx
+graphs, and return DGL graphs. Undirected graphs are returned as bi-directed
+graphs (i.e. with edges in both directions), without self-loops.
+"""
+import numpy as np
+import torch
+import dgl
+
+
+def rng(seed=None):
+    """
+    Returns a NumPy random generator. If seed is not set, the generator is
+    seeded from NumPy's global RNG (e.g. see `polygraphs.random`).
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed
+    if not seed:
+        seed = np.random.randint(np.iinfo(np.int64).max)
+    return np.random.default_rng(seed)
+
+
+def _simple(src, dst, size, directed=False):
+    """
+    Removes self-loops and duplicate edges (keeping the first occurrence of
+    each edge, in order).
+    """
+    keep = src != dst
+    src, dst = src[keep], dst[keep]
+    if directed:
+        keys = src * size + dst
+    else:
+        keys = np.minimum(src, dst) * size + np.maximum(src, dst)
+    _, unique = np.unique(keys, return_index=True)
+    unique.sort()
+    return src[unique], dst[unique]
+
+
+def _graph(src, dst, size, directed=False):
+    """
+    Returns a DGL graph from source and destination node arrays; undirected
+    graphs are bi-directed.
+    """
+    if not directed:
+        src, dst = np.concatenate((src, dst)), np.concatenate((dst, src))
+    src = torch.from_numpy(src.astype(np.int64))
+    dst = torch.from_numpy(dst.astype(np.int64))
+    return dgl.graph((src, dst), num_nodes=size)
+
+
+def complete(size):
+    """
+    Returns an undirected fully-connected graph.
+    """
+    src, dst = np.nonzero(~np.eye(size, dtype=bool))
+    return _graph(src, dst, size, directed=True)
+
+
+def cycle(size, directed=False):
+    """
+    Returns a cycle graph.
+    """
+    src = np.arange(size)
+    src, dst = _simple(src, (src + 1) % size, size, directed=directed)
+    return _graph(src, dst, size, directed=directed)
+
+
+def line(size, directed=False):
+    """
+    Returns a line graph.
+    """
+    src = np.arange(size - 1)
+    return _graph(src, src + 1, size, directed=directed)
+
+
+def star(size):
+    """
+    Returns an undirected star graph, whose centre is node 0.
+    """
+    dst = np.arange(1, size)
+    return _graph(np.zeros_like(dst), dst, size)
+
+
+def wheel(size):
+    """
+    Returns an undirected wheel graph, whose centre is node 0.
+    """
+    # Spokes, from the centre to nodes 1 to N - 1
+    spokes = np.arange(1, size)
+    # Rim, a cycle of nodes 1 to N - 1
+    rim = spokes % (size - 1) + 1
+    src = np.concatenate((np.zeros_like(spokes), spokes))
+    dst = np.concatenate((spokes, rim))
+    src, dst = _simple(src, dst, size)
+    return _graph(src, dst, size)
+
+
+def grid(rows, columns):
+    """
+    Returns an undirected 2-D grid graph; node (i, j) is indexed i * columns + j.
+    """
+    index = np.arange(rows * columns).reshape(rows, columns)
+    src = np.concatenate((index[:, :-1].ravel(), index[:-1, :].ravel()))
+    dst = np.concatenate((index[:, 1:].ravel(), index[1:, :].ravel()))
+    return _graph(src, dst, rows * columns)
+
+
+def random(size, probability, directed=False, seed=None):
+    """
+    Returns an Erdos-Renyi graph, G(n, p).
+
+    Instead of flipping a coin for each of the n(n - 1) (or n(n - 1) / 2) node
+    pairs, the gaps between successive edges are drawn from a geometric
+    distribution (Batagelj and Brandes, 2005).
+    """
+    generator = rng(seed)
+    # Number of candidate node pairs
+    pairs = size * (size - 1) if directed else size * (size - 1) // 2
+    if probability >= 1:
+        index = np.arange(pairs)
+    elif probability <= 0:
+        index = np.empty(0, dtype=np.int64)
+    else:
+        # Draw gaps in blocks (slightly more than the expected number of edges)
+        block = int(pairs * probability + 4 * np.sqrt(pairs * probability) + 16)
+        chunks = []
+        last = -1
+        while last < pairs:
+            gaps = generator.geometric(probability, size=block)
+            chunk = last + np.cumsum(gaps)
+            chunks.append(chunk)
+            last = chunk[-1]
+        index = np.concatenate(chunks)
+        index = index[index < pairs]
+    if directed:
+        # Pair index k maps to (u, v), for all v != u
+        src, offset = np.divmod(index, size - 1)
+        dst = offset + (offset >= src)
+    else:
+        # Pair index k maps to (u, v), for v < u (in lower-triangular order)
+        src = ((1 + np.sqrt(1 + 8 * index.astype(np.float64))) // 2).astype(np.int64)
+        # Correct any rounding errors
+        src -= src * (src - 1) // 2 > index
+        src += (src + 1) * src // 2 <= index
+        dst = index - src * (src - 1) // 2
+    return _graph(src, dst, size, directed=directed)
+
+
+def barabasialbert(size, attachments, seed=None):
+    """
+    Returns an undirected graph according to the Barabasi–Albert preferential
+    attachment model.
+
+    The graph starts as a star of m + 1 nodes. Each new node attaches to m
+    existing nodes, chosen with probability proportional to their degree.
+    All edge endpoints are kept in a single array, where each new endpoint is
+    a copy of a uniformly chosen earlier endpoint (Batagelj and Brandes, 2005).
+    Copies of copies are resolved all at once, by pointer jumping. Duplicate
+    attachments of a new node are removed, so a few nodes may end up with
+    fewer than m edges.
+    """
+    generator = rng(seed)
+    m = attachments  # pylint: disable=invalid-name
+    # Initial star graph of m + 1 nodes (m edges, centred at node 0)
+    initial = 2 * m
+    # Nodes that attach to the graph, m times each
+    sources = np.repeat(np.arange(m + 1, size), m)
+    # Edge endpoints: (source, target) pairs, flattened
+    endpoints = np.empty(initial + 2 * len(sources), dtype=np.int64)
+    endpoints[0:initial:2] = 0
+    endpoints[1:initial:2] = np.arange(1, m + 1)
+    endpoints[initial::2] = sources
+    # Each target copies a random endpoint of the graph before the source node
+    # attached to it
+    previous = initial + 2 * m * (sources - (m + 1))
+    pointers = np.arange(len(endpoints))
+    pointers[initial + 1 :: 2] = np.floor(
+        generator.random(len(sources)) * previous
+    ).astype(np.int64)
+    # Resolve copies of copies (source endpoints and initial endpoints point
+    # to themselves)
+    while True:
+        jumped = pointers[pointers]
+        if np.array_equal(jumped, pointers):
+            break
+        pointers = jumped
+    targets = endpoints[pointers[initial + 1 :: 2]]
+    # Remove duplicate attachments
+    src = np.concatenate((endpoints[0:initial:2], sources))
+    dst = np.concatenate((endpoints[1:initial:2], targets))
+    src, dst = _simple(src, dst, size)
+    return _graph(src, dst, size)
+
+
+def wattsstrogatz(size, knn, probability, seed=None, rounds=100):
+    """
+    Returns an undirected Watts–Strogatz small-world graph.
+
+    Each node is connected to its k nearest neighbours in a ring lattice; then
+    each edge (u, v) is rewired to (u, w) with probability p, where w is chosen
+    uniformly at random. Rewired edges that would create self-loops or
+    duplicate edges are re-drawn (up to a number of rounds; if conflicts
+    remain, they keep their original endpoint).
+    """
+    generator = rng(seed)
+    nodes = np.arange(size)
+    # Ring lattice: node u connects to u + 1, ..., u + k // 2
+    src = np.tile(nodes, knn // 2)
+    dst = (src + np.repeat(np.arange(1, knn // 2 + 1), size)) % size
+    # Edges to rewire
+    rewire = generator.random(len(src)) < probability
+    original = dst.copy()
+    for _ in range(rounds):
+        if not np.any(rewire):
+            break
+        dst[rewire] = generator.integers(0, size, size=int(rewire.sum()))
+        # Undirected edge keys
+        keys = np.minimum(src, dst) * size + np.maximum(src, dst)
+        # Edges (in order) whose key has already appeared
+        _, first = np.unique(keys, return_index=True)
+        duplicate = np.ones(len(keys), dtype=bool)
+        duplicate[first] = False
+        # A rewired edge conflicts if it is a self-loop or a duplicate; when a
+        # rewired edge duplicates an edge that is not rewired, it is redrawn
+        conflict = (src == dst) | duplicate
+        conflict |= rewire & np.isin(keys, keys[duplicate])
+        rewire &= conflict
+    # Unresolved conflicts keep their original endpoint
+    dst[rewire] = original[rewire]
+    src, dst = _simple(src, dst, size)
+    return _graph(src, dst, size)
@@ -9,14 +9,50 @@ import dgl
 import numpy as np
 import os
 import torch
-from collections import defaultdict
 
 from .hyperparameters import HyperParameters
 from . import datasets
+from . import cache
+from . import generators
+
+
+# Network kinds whose topology is the same every time they are created
+DETERMINISTIC = (
+    "sample",
+    "complete",
+    "cycle",
+    "star",
+    "line",
+    "grid",
+    "wheel",
+    "karate",
+    "snap",
+    "ogb",
+    "gml",
+    "francisbacon",
+)
+
+# Network kinds that are random, unless they are seeded
+RANDOM = ("random", "wattsstrogatz", "barabasialbert")
+
+# Engines that generate networks (see `polygraphs.generators`)
+ENGINES = ("networkx", "native")
 
 
 def _isconnected(graph):
-    return nx.is_strongly_connected(dgl.to_networkx(graph))
+    """
+    Returns True if the given graph is strongly connected, i.e. if all nodes
+    are reachable from node 0, both along and against the edges.
+    """
+    size = graph.num_nodes()
+    if size == 0:
+        return False
+    for g in (graph, dgl.reverse(graph)):
+        # Breadth-first search, one frontier at a time
+        reachable = sum(len(frontier) for frontier in dgl.bfs_nodes_generator(g, 0))
+        if reachable < size:
+            return False
+    return True
 
 
 def _buckleup(graph, exist_ok=False):
@@ -57,14 +93,17 @@ def sample(params):
     return sample_(selfloop=params.selfloop)
 
 
-def wheel_(size, selfloop=True):
+def wheel_(size, selfloop=True, engine="networkx"):
     """
     Returns an undirected wheel graph.
     """
     # Check network size
     assert size > 1
-    # Get graph from networkx
-    graph = dgl.from_networkx(nx.wheel_graph(size))
+    if engine == "native":
+        graph = generators.wheel(size)
+    else:
+        # Get graph from networkx
+        graph = dgl.from_networkx(nx.wheel_graph(size))
     # Try adding self-loops
     if selfloop:
         graph = _buckleup(graph)
@@ -75,19 +114,22 @@ def wheel(params):
     """
     Returns an undirected wheel graph from hyper-parameters.
     """
-    return wheel_(params.size, selfloop=params.selfloop)
+    return wheel_(params.size, selfloop=params.selfloop, engine=params.engine)
 
 
-def cycle_(size, directed=False, selfloop=True):
+def cycle_(size, directed=False, selfloop=True, engine="networkx"):
     """
     Returns a cycle graph.
     """
     # Check network size
     assert size > 1
-    # Get networkx constructor
-    constructor = nx.DiGraph if directed else nx.Graph
-    # Get graph from networkx
-    graph = dgl.from_networkx(nx.cycle_graph(size, create_using=constructor))
+    if engine == "native":
+        graph = generators.cycle(size, directed=directed)
+    else:
+        # Get networkx constructor
+        constructor = nx.DiGraph if directed else nx.Graph
+        # Get graph from networkx
+        graph = dgl.from_networkx(nx.cycle_graph(size, create_using=constructor))
     # Try adding self-loops
     if selfloop:
         graph = _buckleup(graph)
@@ -98,17 +140,25 @@ def cycle(params):
     """
     Returns a cycle graph from hyper-parameters.
     """
-    return cycle_(params.size, directed=params.directed, selfloop=params.selfloop)
+    return cycle_(
+        params.size,
+        directed=params.directed,
+        selfloop=params.selfloop,
+        engine=params.engine,
+    )
 
 
-def star_(size, selfloop=True):
+def star_(size, selfloop=True, engine="networkx"):
     """
     Returns an undirected star graph.
     """
     # Check network size
     assert size > 1
-    # Get graph from networkx. The graph has n + 1 nodes for integer n, so substract 1
-    graph = dgl.from_networkx(nx.star_graph(size - 1))
+    if engine == "native":
+        graph = generators.star(size)
+    else:
+        # Get graph from networkx. The graph has n + 1 nodes for integer n, so substract 1
+        graph = dgl.from_networkx(nx.star_graph(size - 1))
     # Try adding self-loops
     if selfloop:
         graph = _buckleup(graph)
@@ -119,19 +169,22 @@ def star(params):
     """
     Returns an undirected star graph.
     """
-    return star_(params.size, selfloop=params.selfloop)
+    return star_(params.size, selfloop=params.selfloop, engine=params.engine)
 
 
-def line_(size, directed=False, selfloop=True):
+def line_(size, directed=False, selfloop=True, engine="networkx"):
     """
     Return a line graph.
     """
     # Check network size
     assert size > 1
-    # Get networkx constructor
-    constructor = nx.DiGraph if directed else nx.Graph
-    # Get graph from networkx
-    graph = dgl.from_networkx(nx.path_graph(size, create_using=constructor))
+    if engine == "native":
+        graph = generators.line(size, directed=directed)
+    else:
+        # Get networkx constructor
+        constructor = nx.DiGraph if directed else nx.Graph
+        # Get graph from networkx
+        graph = dgl.from_networkx(nx.path_graph(size, create_using=constructor))
     # Try adding self-loops
     if selfloop:
         graph = _buckleup(graph)
@@ -142,10 +195,15 @@ def line(params):
     """
     Return a line graph from hyper-parameters.
     """
-    return line_(params.size, directed=params.directed, selfloop=params.selfloop)
+    return line_(
+        params.size,
+        directed=params.directed,
+        selfloop=params.selfloop,
+        engine=params.engine,
+    )
 
 
-def grid_(size, selfloop=True):
+def grid_(size, selfloop=True, engine="networkx"):
     """
     Returns a 2-D square grid graph.
     """
@@ -154,8 +212,11 @@ def grid_(size, selfloop=True):
     # Check network size is a perfect square (approximate solution)
     assert size == math.pow(int(math.sqrt(size) + 0.5), 2)
     rows = columns = int(math.sqrt(size))
-    # Get graph from networkx
-    graph = dgl.from_networkx(nx.grid_2d_graph(rows, columns))
+    if engine == "native":
+        graph = generators.grid(rows, columns)
+    else:
+        # Get graph from networkx
+        graph = dgl.from_networkx(nx.grid_2d_graph(rows, columns))
     # Try adding self-loops
     if selfloop:
         graph = _buckleup(graph)
@@ -166,26 +227,40 @@ def grid(params):
     """
     Returns a 2-D square grid graph from hyper-parameters.
     """
-    return grid_(params.size, selfloop=params.selfloop)
+    return grid_(params.size, selfloop=params.selfloop, engine=params.engine)
 
 
-def random_(size, probability, tries=100, seed=None, directed=False, selfloop=True):
+def random_(
+    size,
+    probability,
+    tries=100,
+    seed=None,
+    directed=False,
+    selfloop=True,
+    engine="networkx",
+):  # pylint: disable=too-many-arguments
     """
     Returns an Erdos-Renyi graph.
     """
     # Check network size
     assert size > 1
-    # If seed is not set, use NumPy's global RNG
-    if not seed:
+    if engine == "native":
+        # Draw all attempts from the same generator
+        seed = generators.rng(seed)
+    elif not seed:
+        # If seed is not set, use NumPy's global RNG
         seed = np.random
     attempt = 0
     success = False
     while True:
         attempt += 1
-        # Get graph from networkx
-        graph = dgl.from_networkx(
-            nx.erdos_renyi_graph(size, probability, seed=seed, directed=directed)
-        )
+        if engine == "native":
+            graph = generators.random(size, probability, directed=directed, seed=seed)
+        else:
+            # Get graph from networkx
+            graph = dgl.from_networkx(
+                nx.erdos_renyi_graph(size, probability, seed=seed, directed=directed)
+            )
         if _isconnected(graph):
             # Connected graph found; exit loop
             success = True
@@ -219,17 +294,26 @@ def random(params):
         seed=params.random.seed,
         directed=params.directed,
         selfloop=params.selfloop,
+        engine=params.engine,
     )
 
 
-def complete_(size, selfloop=True):
+def complete_(size, selfloop=True, engine="networkx", implicit=False):
     """
-    Returns an undirected fully-connected graph.
+    Returns an undirected fully-connected graph. If implicit, the graph has no
+    edges; ops aggregate evidence over all nodes instead (see `ops.core`).
     """
     # Check network size
     assert size > 1
-    # Get graph from networkx
-    graph = dgl.from_networkx(nx.complete_graph(size))
+    if implicit:
+        # Neither edges nor self-loops are materialised
+        empty = torch.zeros((0,), dtype=torch.int64)
+        return dgl.graph((empty, empty), num_nodes=size)
+    if engine == "native":
+        graph = generators.complete(size)
+    else:
+        # Get graph from networkx
+        graph = dgl.from_networkx(nx.complete_graph(size))
     # Try adding self-loops
     if selfloop:
         graph = _buckleup(graph)
@@ -240,7 +324,12 @@ def complete(params):
     """
     Returns an undirected fully-connected graph from hyper-parameters.
     """
-    return complete_(params.size, selfloop=params.selfloop)
+    return complete_(
+        params.size,
+        selfloop=params.selfloop,
+        engine=params.engine,
+        implicit=params.implicit,
+    )
 
 
 def karate_(selfloop=True):
@@ -265,7 +354,7 @@ def karate(params):
 
 
 def wattsstrogatz_(
-    size, knn, probability, tries=100, seed=None, selfloop=True
+    size, knn, probability, tries=100, seed=None, selfloop=True, engine="networkx"
 ):  # pylint: disable=too-many-arguments
     """
     Returns a connected Watts–Strogatz small-world graph.
@@ -274,15 +363,25 @@ def wattsstrogatz_(
     assert size > 1
     # Check neighbourhood size
     assert knn > 1
-    # If seed is not set, use NumPy's global RNG
-    if not seed:
-        seed = np.random
-    # Get graph from networkx
-    graph = dgl.from_networkx(
-        nx.connected_watts_strogatz_graph(
-            size, knn, probability, tries=tries, seed=seed
+    if engine == "native":
+        # Draw all attempts from the same generator
+        seed = generators.rng(seed)
+        for _ in range(tries):
+            graph = generators.wattsstrogatz(size, knn, probability, seed=seed)
+            if _isconnected(graph):
+                break
+        else:
+            raise Exception("Maximum number of tries exceeded")
+    else:
+        # If seed is not set, use NumPy's global RNG
+        if not seed:
+            seed = np.random
+        # Get graph from networkx
+        graph = dgl.from_networkx(
+            nx.connected_watts_strogatz_graph(
+                size, knn, probability, tries=tries, seed=seed
+            )
         )
-    )
     # Try adding self-loops
     if selfloop:
         graph = _buckleup(graph)
@@ -300,10 +399,11 @@ def wattsstrogatz(params):
         tries=params.wattsstrogatz.tries,
         seed=params.wattsstrogatz.seed,
         selfloop=params.selfloop,
+        engine=params.engine,
     )
 
 
-def barabasialbert_(size, attachments, seed=None, selfloop=True):
+def barabasialbert_(size, attachments, seed=None, selfloop=True, engine="networkx"):
     """
     Returns a random graph according to the Barabasi–Albert preferential attachment model.
     """
@@ -311,11 +411,16 @@ def barabasialbert_(size, attachments, seed=None, selfloop=True):
     assert size > 1
     # Check neighbourhood size
     assert attachments > 0
-    # If seed is not set, use NumPy's global RNG
-    if not seed:
-        seed = np.random
-    # Get graph from networkx
-    graph = dgl.from_networkx(nx.barabasi_albert_graph(size, attachments, seed=seed))
+    if engine == "native":
+        graph = generators.barabasialbert(size, attachments, seed=seed)
+    else:
+        # If seed is not set, use NumPy's global RNG
+        if not seed:
+            seed = np.random
+        # Get graph from networkx
+        graph = dgl.from_networkx(
+            nx.barabasi_albert_graph(size, attachments, seed=seed)
+        )
     # Try adding self-loops
     if selfloop:
         graph = _buckleup(graph)
@@ -332,6 +437,7 @@ def barabasialbert(params):
         params.barabasialbert.attachments,
         seed=params.barabasialbert.seed,
         selfloop=params.selfloop,
+        engine=params.engine,
     )
 
 
@@ -388,31 +494,20 @@ def gml(params):
     # Resolve GML file
     gml_file = os.path.abspath(os.path.expanduser(params.gml.path))
     assert os.path.isfile(gml_file), "GML file not found"
-    # Load graph from GML file
-    G = nx.read_gml(gml_file, destringizer=int)
-    # Load graph using edge list so that we preserve node ids
-    edges = []
-
-    for edge in list(nx.to_edgelist(G)):
-        try:
-            edges.append((int(edge[0]), int(edge[1])))
-        except:
-            raise ValueError("GML File: Node IDs should be specified as integers")
-
-    # Create normalised table
-    tbl = defaultdict(lambda: len(tbl))
+    from .datasets import gml as reader
+    # Load normalised edges (from 0 to N) and original node ids from GML file
+    edges, ids = reader.read(gml_file)
 
-    # Normalise node identifiers (from 0 to N) using default dict
-    normalised_edges = [(tbl[edge[0]], tbl[edge[1]]) for edge in edges]
-
-    graph = dgl.graph(normalised_edges)
+    graph = dgl.graph(
+        (torch.from_numpy(edges[0]), torch.from_numpy(edges[1])), num_nodes=len(ids)
+    )
 
     # Convert to a bi-directed DGL graph for undirected graphs
     if not params.gml.directed:
         graph = dgl.to_bidirected(graph)
 
     # Save original node ids as a node attribute
-    graph.ndata['gml_id'] = torch.tensor(list(tbl.keys()))
+    graph.ndata['gml_id'] = torch.from_numpy(ids)
     return graph
 
 
@@ -426,5 +521,20 @@ def create(params):
     constructor = members.get(params.kind)
     if constructor is None:
         raise Exception(f"Invalid graph type: {params.kind}")
+    if params.engine not in ENGINES:
+        raise Exception(f"Invalid graph engine: {params.engine}")
+    if params.implicit and params.kind != "complete":
+        raise Exception(f"Invalid implicit graph type: {params.kind}")
+    # Maybe reuse a cached graph (unless graph is random and unseeded)
+    cacheable = params.kind not in RANDOM or params.getattr(f"{params.kind}.seed")
+    name = cache.key(params) if params.cache.enabled and cacheable else None
+    if name is not None:
+        entry = cache.load(name)
+        if entry is not None:
+            graph, params.size = entry
+            return graph
     # Construct DGL graph
-    return constructor(params=params)
+    graph = constructor(params=params)
+    if name is not None:
+        cache.store(name, graph, params.size, capacity=params.cache.capacity)
+    return graph
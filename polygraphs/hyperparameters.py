@@ -311,6 +311,8 @@ class SnapshotHyperParameters(HyperParameters):
         params.enabled
         params.interval
         params.messages
+        params.compression
+        params.queuesize
     """
 
     def __init__(self):
@@ -318,6 +320,10 @@ class SnapshotHyperParameters(HyperParameters):
         self.add(enabled=False)
         self.add(interval=1)
         self.add(messages=False)
+        # HDF5 compression filter (e.g. "gzip" or "lzf")
+        self.add(compression=None)
+        # Maximum number of snapshots pending to be written to disk
+        self.add(queuesize=16)
 
 
 class NetworkHyperParameters(HyperParameters):
@@ -328,6 +334,8 @@ class NetworkHyperParameters(HyperParameters):
         params.size
         params.directed
         params.selfloop
+        params.engine
+        params.implicit
 
         params.random.seed
         params.random.probability
@@ -345,6 +353,9 @@ class NetworkHyperParameters(HyperParameters):
 
         params.ogb.name
         params.ogb.extras
+
+        params.cache.enabled
+        params.cache.capacity
     """
 
     def __init__(self):
@@ -354,6 +365,10 @@ class NetworkHyperParameters(HyperParameters):
         self.add(directed=False)
         # Whether to connect each vertex to itself or not
         self.add(selfloop=True)
+        # Library that generates networks ("networkx" or "native")
+        self.add(engine="networkx")
+        # Whether complete networks are implicit (i.e. have no edges) or not
+        self.add(implicit=False)
         # Network-specific configurations
         self.add(random=HyperParameters(seed=None, tries=100, probability=1.0))
         self.add(
@@ -364,6 +379,8 @@ class NetworkHyperParameters(HyperParameters):
         self.add(snap=HyperParameters(name=None))
         self.add(ogb=HyperParameters(name="collab"))
         self.add(gml=HyperParameters(name=None, path=None, directed=False))
+        # Persistent cache of networks (capacity in MB)
+        self.add(cache=HyperParameters(enabled=False, capacity=1024))
 
 
 class InitHyperParameters(HyperParameters):
@@ -396,15 +413,55 @@ class SimulationHyperParameters(HyperParameters):
     Configuration parameters include:
 
         params.results
+        params.format
+        params.flush
         params.repeats
         params.steps
+        params.interval
+        params.batch
+        params.workers
+        params.threads
     """
 
     def __init__(self):
         super().__init__()
         self.add(results="auto")
+        # Result file format ("csv" or "parquet")
+        self.add(format="csv")
+        # Number of repeats between (synced) appends to the result file; if
+        # None, results are stored once all repeats complete
+        self.add(flush=None)
         self.add(repeats=1)
         self.add(steps=0)
+        # Number of steps between (synchronised) termination checks; steps and
+        # results are the same as if termination was checked every step
+        self.add(interval=1)
+        # Number of repeats to simulate at once, as replicas of a batched graph
+        self.add(batch=1)
+        # Number of worker processes exploring configurations in parallel
+        self.add(workers=1)
+        # Number of PyTorch threads per worker process
+        self.add(threads=1)
+
+
+class BayesHyperParameters(HyperParameters):
+    """
+    Configuration parameters include:
+
+        params.backend
+        params.compile
+        params.lookup
+    """
+
+    def __init__(self):
+        super().__init__()
+        # Posterior updates in log-odds space ("stable") or probability space
+        # ("classic"); the former is more accurate when likelihoods underflow
+        self.add(backend="stable")
+        # Compiler for Bayes/Jeffrey update kernels (None, "script", or "inductor")
+        self.add(compile=None)
+        # Whether to look up log-binomial coefficients in a precomputed table
+        self.add(lookup=True)
 
 
 class PolyGraphHyperParameters(HyperParameters):
@@ -413,6 +470,7 @@ class PolyGraphHyperParameters(HyperParameters):
 
         params.device
         params.op
+        params.engine
         params.seed
         params.epsilon
         params.trials
@@ -422,6 +480,10 @@ class PolyGraphHyperParameters(HyperParameters):
         params.mistrust
         params.antiupdating
 
+        params.bayes.backend
+        params.bayes.compile
+        params.bayes.lookup
+
         params.init.kind
         params.init.value
 
@@ -440,6 +502,10 @@ class PolyGraphHyperParameters(HyperParameters):
         params.simulation.results
         params.simulation.repeats
         params.simulation.steps
+        params.simulation.interval
+        params.simulation.batch
+        params.simulation.workers
+        params.simulation.threads
     """
 
     def __init__(self):
@@ -451,6 +517,10 @@ class PolyGraphHyperParameters(HyperParameters):
         # Operator name
         self.add(op=None)
 
+        # Message-passing engine ("udf", "masked", or "spmm"); see the
+        # `engines` supported by each op
+        self.add(engine="udf")
+
         # Parameter related to randomness
         self.add(seed=0)
 
@@ -471,6 +541,9 @@ class PolyGraphHyperParameters(HyperParameters):
         self.add(trust=0.0)
         self.add(unreliablenodes=[])
 
+        # Belief update configuration
+        self.add(bayes=BayesHyperParameters())
+
         # Parameters related to belief initilisation
         self.add(init=InitHyperParameters())
         # Logging configuration
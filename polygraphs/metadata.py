@@ -16,6 +16,143 @@ _default_columns = (
     "polarized",
 )
 
+# Column types in columnar (Parquet) results; other columns (e.g. metadata)
+# are typed by their values
+_column_types = {
+    "steps": "int64",
+    "duration": "float64",
+    "action": "string",
+    "undefined": "bool",
+    "converged": "bool",
+    "polarized": "bool",
+    "uid": "string",
+}
+
+# Result file formats
+_formats = {"csv": "data.csv", "parquet": "data.parquet"}
+
+
+def _pyarrow():
+    """
+    Returns pyarrow and its Parquet module (an optional dependency).
+    """
+    try:
+        import pyarrow  # pylint: disable=import-outside-toplevel
+        import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        raise ImportError(
+            "Parquet results require pyarrow (e.g. pip install polygraphs[parquet])"
+        ) from error
+    return pyarrow, pyarrow.parquet
+
+
+def _table(frame, types=None):
+    """
+    Returns an Arrow table of given data frame, with typed columns. Optionally,
+    `types` maps (metadata) column names to Arrow types.
+    """
+    pa, _ = _pyarrow()
+    types = types or {}
+    fields = []
+    for column in frame.columns:
+        if column in types:
+            dtype = types[column]
+        elif column in _column_types:
+            dtype = pa.type_for_alias(_column_types[column])
+        else:
+            dtype = pa.array(frame[column]).type
+        fields.append(pa.field(column, dtype))
+    return pa.Table.from_pandas(frame, schema=pa.schema(fields), preserve_index=False)
+
+
+def columntypes(values):
+    """
+    Returns Arrow types of (metadata) columns, given all their possible values
+    (e.g. exploration options), so that their type is the same across results.
+    """
+    pa, _ = _pyarrow()
+    return {key: pa.array(list(value)).type for key, value in six.iteritems(values)}
+
+
+def read(*paths, filters=None, columns=None):
+    """
+    Reads Parquet simulation results into a single data frame.
+
+    A path is either a Parquet result (`data.parquet`, a directory of parts)
+    or a directory. If a directory contains `data.parquet` (e.g. the results
+    of an exploration), only that result is read; otherwise, all `data.parquet`
+    results below it are.
+
+    Filters, e.g. `[("converged", "==", True), ("epsilon", ">", 0.01)]`, are
+    pushed down to the Parquet reader, which skips row groups whose column
+    statistics rule them out.
+    """
+    _, pq = _pyarrow()
+    filenames = []
+    for path in paths:
+        path = os.path.expanduser(path)
+        if os.path.isfile(path) or os.path.basename(path) == _formats["parquet"]:
+            filenames.extend(_parts(path))
+        elif os.path.exists(os.path.join(path, _formats["parquet"])):
+            filenames.extend(_parts(os.path.join(path, _formats["parquet"])))
+        else:
+            for root, directories, files in sorted(os.walk(path)):
+                if _formats["parquet"] in files + directories:
+                    filenames.extend(_parts(os.path.join(root, _formats["parquet"])))
+    assert filenames, "No Parquet results found"
+    dataset = pq.ParquetDataset(filenames, filters=filters)
+    return dataset.read(columns=columns).to_pandas()
+
+
+def _parts(filename):
+    """
+    Returns the files of a Parquet result, which is a directory of parts (or a
+    single file, for results stored by earlier versions).
+    """
+    if os.path.isdir(filename):
+        return sorted(
+            os.path.join(filename, name)
+            for name in os.listdir(filename)
+            if name.endswith(".parquet")
+        )
+    return [filename]
+
+
+def _writepart(table, directory, index):
+    """
+    Writes an Arrow table as a part of a Parquet result. Parts are written to
+    hidden files first (which Parquet readers ignore), synced, and renamed.
+    """
+    _, pq = _pyarrow()
+    os.makedirs(directory, exist_ok=True)
+    name = f"part-{index:05d}.parquet"
+    temporary = os.path.join(directory, f".{name}")
+    pq.write_table(table, temporary)
+    _sync(temporary)
+    os.replace(temporary, os.path.join(directory, name))
+
+
+def _remove(filename):
+    """
+    Removes a Parquet result, if any.
+    """
+    if os.path.isdir(filename):
+        for name in _parts(filename):
+            os.remove(name)
+    elif os.path.exists(filename):
+        os.remove(filename)
+
+
+def _sync(filename):
+    """
+    Flushes file contents to disk.
+    """
+    descriptor = os.open(filename, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
 
 def merge(*results):
     """
@@ -73,6 +210,12 @@ class PolyGraphSimulation:
         # Data frame of simulation results. Once results are converted
         # to a data frame, the collection becomes read-only.
         self._frame = None
+        # Streaming destination, format, number of results per append,
+        # and number of appends thus far (see `stream`)
+        self._stream = None
+        self._format = None
+        self._flush = None
+        self._appends = 0
 
     @property
     def frame(self):
@@ -81,20 +224,32 @@ class PolyGraphSimulation:
         """
         return self._export()
 
+    def _toframe(self, rows):
+        """
+        Returns data frame of given results, with metadata columns.
+        """
+        frame = pd.DataFrame(rows, columns=self._columns)
+        if self._meta:
+            # Append metadata as new columns
+            for key, value in six.iteritems(self._meta):
+                frame[key] = value
+        if self._uid:
+            # Append uuid as a new column
+            frame["uid"] = self._uid
+        return frame
+
     def _export(self):
         """
         Exports collection or results to a data frame.
         """
         if self._frame is None:
-            # Create data frame from collection
-            self._frame = pd.DataFrame(self._queue, columns=self._columns)
-            if self._meta:
-                # Append metadata as new columns
-                for key, value in six.iteritems(self._meta):
-                    self._frame[key] = value
-            if self._uid:
-                # Append uuid as a new column
-                self._frame["uid"] = self._uid
+            if self._stream is not None:
+                # Read streamed results back from disk
+                self._append()
+                self._frame = self._readback()
+            else:
+                # Create data frame from collection
+                self._frame = self._toframe(self._queue)
         return self._frame
 
     def add(self, *values):
@@ -107,13 +262,72 @@ class PolyGraphSimulation:
         # Ensure that number of values equals number of columns
         assert len(self._columns) == len(values)
         self._queue.append(values)
+        if self._stream is not None and len(self._queue) >= self._flush:
+            self._append()
 
-    def store(self, directory=None, filename=None, overwrite_ok=True):
+    def stream(self, directory, format="csv", flush=1):
+        # pylint: disable=redefined-builtin
         """
-        Stores collection to disk.
+        Streams results to disk: every `flush` results are appended to the
+        result file in `directory` and synced, instead of being kept in memory
+        until the collection is stored. Thus, partial results survive crashes.
+
+        CSV results are appended to a single file; Parquet results are written
+        as parts (one per append) of the `data.parquet` directory.
         """
+        if format not in _formats:
+            raise ValueError(f"Invalid result format: {format}")
+        assert os.path.isdir(directory)
+        assert self._frame is None and not self._queue
+        self._stream = os.path.join(directory, _formats[format])
+        self._format = format
+        self._flush = max(1, flush)
+        self._appends = 0
+
+    def _append(self):
+        """
+        Appends queued results to the result file, and syncs it to disk.
+        """
+        if not self._queue:
+            return
+        frame = self._toframe(self._queue)
+        if self._format == "parquet":
+            _writepart(_table(frame), self._stream, self._appends)
+        else:
+            with open(self._stream, "a", encoding="utf-8") as stream:
+                # Write header with the first results only
+                frame.to_csv(stream, index=False, header=self._appends == 0)
+                stream.flush()
+                os.fsync(stream.fileno())
+        self._appends += 1
+        self._queue.clear()
+
+    def _readback(self):
+        """
+        Returns data frame of streamed results.
+        """
+        if self._appends == 0:
+            # No results
+            return self._toframe([])
+        if self._format == "parquet":
+            _, pq = _pyarrow()
+            return pq.ParquetDataset(_parts(self._stream)).read().to_pandas()
+        return pd.read_csv(self._stream)
+
+    def store(self, directory=None, filename=None, overwrite_ok=True, format="csv"):
+        # pylint: disable=redefined-builtin
+        """
+        Stores collection to disk, either as a CSV file or as a Parquet result,
+        i.e. a directory of parts (here, a single one).
+        """
+        if format not in _formats:
+            raise ValueError(f"Invalid result format: {format}")
+        if self._stream is not None:
+            # Results are already on disk; append remaining ones
+            self._append()
+            return
         if filename is None:
-            destination = "data.csv"
+            destination = _formats[format]
         else:
             destination = filename
         if directory is not None:
@@ -125,5 +339,44 @@ class PolyGraphSimulation:
         assert not (not overwrite_ok and os.path.exists(destination))
         # Export collection to data frame
         _ = self._export()
-        # Store data frame to a csv file
-        self._frame.to_csv(destination, index=False)
+        if format == "parquet":
+            # Store data frame as a Parquet result, with typed columns
+            _remove(destination)
+            _writepart(_table(self._frame), destination, 0)
+        else:
+            # Store data frame to a csv file
+            self._frame.to_csv(destination, index=False)
+
+
+class ParquetWriter:
+    """
+    Appends collections of simulation results to a Parquet result, one part
+    per collection (e.g. one per configuration of an exploration).
+    """
+
+    def __init__(self, filename, types=None):
+        self._filename = filename
+        # Arrow types of (metadata) columns, if known in advance
+        self._types = types
+        # Number of parts written thus far
+        self._appends = 0
+
+    def append(self, result):
+        """
+        Appends a `PolyGraphSimulation` collection as a new part.
+        """
+        table = _table(result.frame, self._types)
+        _writepart(table, self._filename, self._appends)
+        self._appends += 1
+
+    def close(self):
+        """
+        Closes the Parquet result. Parts are complete once appended, so this
+        is a no-op; it is kept so that writers can be used as context managers.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -3,11 +3,19 @@ Monitoring infrastructure
 """
 import os
 import abc
+import queue
+import threading
+import numpy as np
 import torch
 import h5py
 
 from . import timer
 
+# Layout of snapshot files (see `SnapshotHook`), stored as attribute "layout".
+# Files without the attribute have one dataset per snapshot, named after its
+# step, in groups "beliefs" and "payoffs"
+LAYOUT = 2
+
 
 class BasicHook(metaclass=abc.ABCMeta):
     """
@@ -30,6 +38,12 @@ class BasicHook(metaclass=abc.ABCMeta):
     def _run(self, step, polygraph):
         raise NotImplementedError
 
+    def isdue(self, step):
+        """
+        Returns whether the monitor runs at given simulation step.
+        """
+        return self._isvalid(step)
+
     def mayberun(self, step, polygraph):
         """
         Monitors progress at given simulation step.
@@ -49,6 +63,11 @@ class BasicHook(metaclass=abc.ABCMeta):
             return
         self._run(step, polygraph)
 
+    def close(self):
+        """
+        Releases any resources held by the monitor (e.g. open files).
+        """
+
 
 class MonitorHook(BasicHook):
     """
@@ -92,9 +111,28 @@ class MonitorHook(BasicHook):
 class SnapshotHook(BasicHook):
     """
     Periodic logger for agent beliefs
+
+    Snapshots are stored in a single HDF5 file that remains open until the
+    hook is closed. Beliefs (resp. payoffs) of all snapshots are rows of a
+    chunked, resizable dataset of shape [snapshots, N] (resp. [snapshots, N, 2]),
+    while dataset "iterations" holds the simulation step of each snapshot.
+    The file attribute "layout" is set to `LAYOUT`.
+
+    Snapshots are written by a background thread, a chunk at a time; the
+    simulation only blocks when more than `queuesize` snapshots are pending.
     """
 
-    def __init__(self, messages=False, location=None, filename="data.hd5", **kwargs):
+    def __init__(
+        self,
+        messages=False,
+        location=None,
+        filename="data.hd5",
+        nodes=None,
+        compression=None,
+        queuesize=16,
+        rows=None,
+        **kwargs,
+    ):
         super().__init__(**kwargs)
         # Store snapshots in user-specified directory
         assert location and os.path.isdir(location)
@@ -102,25 +140,138 @@ class SnapshotHook(BasicHook):
         self._filename = os.path.join(location, filename)
         # Whether to snapshot messages or not
         self._messages = messages
+        # Which nodes to snapshot (e.g. a replica of a batched graph)
+        self._nodes = slice(None) if nodes is None else nodes
+        # Dataset compression filter (e.g. "gzip" or "lzf")
+        self._compression = compression
+        # Maximum number of pending snapshots
+        self._queuesize = queuesize
+        # Number of rows to pre-allocate (e.g. expected number of snapshots)
+        self._capacity = rows
+        # File handle, pending snapshots, and writer thread (created lazily)
+        self._file = None
+        self._queue = None
+        self._thread = None
+        # Number of snapshots written so far, and snapshots yet to be written
+        self._rows = 0
+        self._buffer = []
+        # Exception raised by the writer thread (if any)
+        self._error = None
+
+    def _open(self, beliefs, payoffs):
+        """
+        Creates HDF5 file and datasets, and starts the writer thread.
+        """
+        self._file = h5py.File(self._filename, "w")
+        self._file.attrs["layout"] = LAYOUT
+        size = beliefs.shape[0]
+        # Number of rows per chunk (about 1MB per chunk)
+        chunk = max(1, (1 << 20) // max(1, beliefs.nbytes))
+        if not self._capacity:
+            self._capacity = chunk
+        self._file.create_dataset(
+            "iterations",
+            shape=(self._capacity,),
+            maxshape=(None,),
+            dtype="i8",
+            chunks=(max(chunk, 64),),
+        )
+        self._file.create_dataset(
+            "beliefs",
+            shape=(self._capacity, size),
+            maxshape=(None, size),
+            dtype=beliefs.dtype,
+            chunks=(chunk, size),
+            compression=self._compression,
+        )
+        if payoffs is not None:
+            self._file.create_dataset(
+                "payoffs",
+                shape=(self._capacity,) + payoffs.shape,
+                maxshape=(None,) + payoffs.shape,
+                dtype=payoffs.dtype,
+                chunks=(chunk,) + payoffs.shape,
+                compression=self._compression,
+            )
+        self._queue = queue.Queue(maxsize=self._queuesize)
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def _write(self, step, beliefs, payoffs):
+        """
+        Buffers a snapshot, and writes buffered snapshots a chunk at a time.
+        """
+        self._buffer.append((step, beliefs, payoffs))
+        if len(self._buffer) == self._file["beliefs"].chunks[0]:
+            self._flush()
+
+    def _flush(self):
+        """
+        Writes buffered snapshots as the next rows of each dataset.
+        """
+        if not self._buffer:
+            return
+        first, last = self._rows, self._rows + len(self._buffer)
+        if last > self._capacity:
+            # Grow datasets geometrically
+            self._capacity = max(last, 2 * self._capacity)
+            for dataset in self._file.values():
+                dataset.resize(self._capacity, axis=0)
+        steps, beliefs, payoffs = zip(*self._buffer)
+        self._file["iterations"][first:last] = steps
+        self._file["beliefs"][first:last] = np.stack(beliefs)
+        if self._messages:
+            self._file["payoffs"][first:last] = np.stack(payoffs)
+        self._rows = last
+        self._buffer = []
+
+    def _loop(self):
+        """
+        Writes pending snapshots until closed.
+        """
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self._error is not None:
+                # Drain the queue, so that the simulation never blocks
+                continue
+            try:
+                self._write(*item)
+            except Exception as error:  # pylint: disable=broad-except
+                self._error = error
+        try:
+            self._flush()
+        except Exception as error:  # pylint: disable=broad-except
+            self._error = error
+
+    def _raise(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError(f"Failed to write {self._filename}") from error
 
     def _run(self, step, polygraph):
-        # Create dataset file, or read/write if exists
-        f = h5py.File(self._filename, "a")  # pylint: disable=invalid-name
-
-        # Store beliefs
-        beliefs = polygraph.ndata["beliefs"].cpu().numpy()
-        # Create or modify group
-        grp = f.require_group("beliefs")
-        # Create new dataset
-        grp.create_dataset(str(step), data=beliefs)
-        
-        # Store messages
+        self._raise()
+        # Copy beliefs (and messages), since they may be modified while pending
+        beliefs = polygraph.ndata["beliefs"][self._nodes].cpu().numpy().copy()
+        payoffs = None
         if self._messages:
-            payoffs = polygraph.ndata["payoffs"].cpu().numpy()
-            # Create or modify group
-            grp = f.require_group("payoffs")
-            # Create new dataset
-            grp.create_dataset(str(step), data=payoffs)
-
-        # Close file
-        f.close()
+            payoffs = polygraph.ndata["payoffs"][self._nodes].cpu().numpy().copy()
+        if self._file is None:
+            self._open(beliefs, payoffs)
+        self._queue.put((step, beliefs, payoffs))
+
+    def close(self):
+        """
+        Writes all pending snapshots, trims datasets, and closes file.
+        """
+        if self._file is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        # Remove any pre-allocated rows that were never written
+        for dataset in self._file.values():
+            dataset.resize(self._rows, axis=0)
+        self._file.close()
+        self._file = None
+        self._raise()
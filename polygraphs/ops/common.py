@@ -42,6 +42,16 @@ class BalaGoyalOp(core.PolyGraphOp):
     Learning from neighbours (Bala & Goyal, 1998)
     """
 
+    # Evidence is aggregated with sparse matrix products (see `aggregate`)
+    engines = ("udf", "masked", "spmm", "implicit")
+
+    def sourcemask(self, graph):
+        """
+        Returns a 1-D boolean tensor indicating whether each node has evidence
+        to report (the node-level equivalent of `filterfn`).
+        """
+        return torch.gt(graph.ndata["payoffs"][:, 1], 0.0)
+
     def filterfn(self):
         """
         Filters out edges whose source has no evidence to report
@@ -52,6 +62,25 @@ class BalaGoyalOp(core.PolyGraphOp):
 
         return function
 
+    def aggregate(self, graph):
+        """
+        Sums the payoffs of valid neighbours (see `gather`), then updates
+        beliefs with `applyfn`.
+        """
+        # Prior, P(H)
+        prior = graph.ndata["beliefs"]
+        # Only nodes with evidence to report send messages
+        mask = self.sourcemask(graph).unsqueeze(1)
+        evidence = self.gather(graph, graph.ndata["payoffs"] * mask)
+        # Nodes that received at least one message
+        received = torch.gt(evidence[:, 1], 0.0)
+        graph.ndata["payoffs"] = torch.where(
+            received.unsqueeze(1), evidence, graph.ndata["payoffs"]
+        )
+        graph.apply_nodes(self.applyfn())
+        # Nodes that received no messages keep their prior
+        graph.ndata["beliefs"] = torch.where(received, graph.ndata["beliefs"], prior)
+
     def messagefn(self):
         """
         Message function
@@ -68,7 +97,12 @@ class BalaGoyalOp(core.PolyGraphOp):
         """
 
         def function(nodes):
-            return {"payoffs": torch.sum(nodes.mailbox["payoffs"], dim=1)}
+            payoffs = nodes.mailbox["payoffs"]
+            mask = core.mailboxmask(nodes)
+            if mask is not None:
+                # Ignore messages from nodes with no evidence to report
+                payoffs = payoffs * mask.unsqueeze(-1)
+            return {"payoffs": torch.sum(payoffs, dim=1)}
 
         return function
 
@@ -89,7 +123,9 @@ class BalaGoyalOp(core.PolyGraphOp):
             prior = nodes.data["beliefs"]
 
             # Posterior, P(H|E)
-            posterior = math.bayes(prior, math.Evidence(logits, values, trials))
+            posterior = math.bayes(
+                prior, math.Evidence(logits, values, trials), config=self._bayes
+            )
 
             # Update node attribute
             return {"beliefs": posterior}
@@ -102,6 +138,9 @@ class OConnorWeatherallOp(core.PolyGraphOp):
     Scientific polarisation (O'Connor & Weatherall, 2018)
     """
 
+    # Evidence of each neighbour is considered separately
+    aggregated = False
+
     def __init__(self, graph, params):
         super().__init__(graph, params)
 
@@ -112,6 +151,13 @@ class OConnorWeatherallOp(core.PolyGraphOp):
         # Whether to discount evidence with unti-updating or not
         self.antiupdating = params.antiupdating
 
+    def sourcemask(self, graph):
+        """
+        Returns a 1-D boolean tensor indicating whether each node has evidence
+        to report (the node-level equivalent of `filterfn`).
+        """
+        return torch.gt(graph.ndata["payoffs"][:, 1], 0.0)
+
     def filterfn(self):
         """
         # Filters out edges whose source has no evidence to report
@@ -132,11 +178,11 @@ class OConnorWeatherallOp(core.PolyGraphOp):
 
         return function
 
-    def _distancefn(self, delta):
+    def _distancefn(self):
         """
-        Distance function
+        Distance function, scale * delta ^ exponent, as a (scale, exponent) pair
         """
-        return delta * self.mistrust
+        return self.mistrust, 1.0
 
     def reducefn(self):
         """
@@ -149,51 +195,47 @@ class OConnorWeatherallOp(core.PolyGraphOp):
             # Prior, P(H) (aka. belief)
             prior = nodes.data["beliefs"]
 
-            # Number of nodes and number of neighbours per node (incoming messages)
-            _, neighbours = nodes.mailbox["beliefs"].shape
-            for i in range(neighbours):
-                # A node receives evidence E from its i-th neighbour, say Jill,
-                # denoting the number of successful trials and the total number
-                # of trials she observed
-                values = nodes.mailbox["payoffs"][:, i, 0]
-                trials = nodes.mailbox["payoffs"][:, i, 1]
-
-                # Evidence, E
-                evidence = math.Evidence(logits, values, trials)
-
-                # The difference in belief between an agent
-                # and its i-th neighbour
-                delta = torch.abs(prior - nodes.mailbox["beliefs"][:, i])
-
-                # Compute belief that the evidence E is real, P(E)(d)
-                if self.antiupdating:
-                    certainty = torch.max(
-                        1.0
-                        - self._distancefn(delta)
-                        * (1.0 - math.marginal(prior, evidence)),
-                        torch.zeros((len(nodes),)),
-                    )
-                else:
-                    # Consider an agent u and one of its neighbours, v. As
-                    # beliefs between u and v diverge (delta towards 1),
-                    # agent u simply ignores the evidence of agent v.
-                    #
-                    # If delta becomes 1, uncertainty ~ marginal. In other
-                    # words, agent u's belief remains unchanged in light of
-                    # agent v's evidence.
-                    #
-                    # The multiplier simply determines how far apart beliefs
-                    # have to become before agent u begins to ignore the
-                    # evidence of its neighbour, v (since delta never becomes 1)
-                    certainty = 1.0 - torch.min(
-                        torch.ones((len(nodes),)), self._distancefn(delta)
-                    ) * (1.0 - math.marginal(prior, evidence))
-
-                # Compute posterior belief, in light of soft uncertainty
-                posterior = math.jeffrey(prior, evidence, certainty)
-
-                # Consider next neighbour
-                prior = posterior
+            # A node receives evidence E from each neighbour, say Jill, denoting
+            # the number of successful trials and the total number of trials she
+            # observed
+            values = nodes.mailbox["payoffs"][:, :, 0]
+            trials = nodes.mailbox["payoffs"][:, :, 1]
+
+            # Evidence, E
+            evidence = math.Evidence(logits, values, trials)
+
+            # Consider an agent u and one of its neighbours, v. The certainty
+            # that the evidence E of agent v is real, P(E)(d), depends on the
+            # difference in belief, delta, between u and v (see `math.Mistrust`).
+            #
+            # Without anti-updating, as beliefs between u and v diverge (delta
+            # towards 1), agent u simply ignores the evidence of agent v.
+            #
+            # If delta becomes 1, uncertainty ~ marginal. In other words, agent
+            # u's belief remains unchanged in light of agent v's evidence.
+            #
+            # The multiplier simply determines how far apart beliefs have to
+            # become before agent u begins to ignore the evidence of its
+            # neighbour, v (since delta never becomes 1)
+            #
+            # With anti-updating, evidence is discounted further (down to 0).
+            scale, exponent = self._distancefn()
+            certainty = math.Mistrust(
+                nodes.mailbox["beliefs"],
+                scale,
+                exponent,
+                float("inf") if self.antiupdating else 1.0,
+            )
+
+            # Compute posterior belief, neighbour by neighbour,
+            # in light of soft uncertainty
+            posterior = math.sequential(
+                prior,
+                evidence,
+                certainty,
+                mask=core.mailboxmask(nodes),
+                config=self._bayes,
+            )
 
             # Return posterior beliefs for each neighbour
             return {"beliefs": posterior}
@@ -206,8 +248,9 @@ class OConnorWeatherallSquareRootDistanceOp(OConnorWeatherallOp):
     Scientific polarisation (O'Connor & Weatherall, 2018), but with a twist.
     """
 
-    def _distancefn(self, delta):
-        return torch.sqrt(delta)
+    def _distancefn(self):
+        # Square root of delta
+        return 1.0, 0.5
 
 
 class OConnorWeatherallSquareDistanceOp(OConnorWeatherallOp):
@@ -215,8 +258,9 @@ class OConnorWeatherallSquareDistanceOp(OConnorWeatherallOp):
     Scientific polarisation (O'Connor & Weatherall, 2018), but with a twist.
     """
 
-    def _distancefn(self, delta):
-        return torch.pow(delta, 2)
+    def _distancefn(self):
+        # Square of delta
+        return 1.0, 2.0
 
 
 class BalaGoyalWeightedOp(BalaGoyalOp):
@@ -5,6 +5,7 @@ Complex ops that contain unreliable nodes
 import torch
 from . import math
 from .. import init
+from .core import mailboxmask
 from .common import BalaGoyalOp
 from ..logger import getlogger
 
@@ -36,8 +37,11 @@ class UnreliableOp(BalaGoyalOp):
         self._reliability = torch.bernoulli(torch.ones(self._size) * params.reliability)
 
         # Given a list of unreliable nodes, make them unreliable
-        for node in params.unreliablenodes:
-            self._reliability[node] = 0
+        # (in every graph of a batch of graphs)
+        offsets = torch.cumsum(graph.batch_num_nodes(), 0) - graph.batch_num_nodes()
+        for offset in offsets.tolist():
+            for node in params.unreliablenodes:
+                self._reliability[offset + node] = 0
 
         # Store network reliability
         graph.ndata["reliability"] = self._reliability.to(device=self._device)
@@ -72,6 +76,15 @@ class UnreliableNetworkIdealOp(UnreliableOp):
         # Draw a single sample from the reliable sampler
         return self._sampler.sample()
 
+    def sourcemask(self, graph):
+        """
+        Only reliable nodes with evidence to report send messages.
+        """
+        return (
+            torch.gt(graph.ndata["payoffs"][:, 1], 0.0)
+            & graph.ndata["reliability"].bool()
+        )
+
     def filterfn(self):
         """
         Filter out messages sent by unreliable nodes.
@@ -93,6 +106,9 @@ class UnreliableNetworkBasicGullibleUniformOp(UnreliableOp):
     Unreliable nodes draw from a uniform distribution
     """
 
+    # Unreliable nodes observe non-integer evidence
+    integral = False
+
     def __init__(self, graph, params):
         super().__init__(graph, params)
         # Create uniform sampler for unreliable nodes
@@ -159,6 +175,12 @@ class AlignedOp(UnreliableOp):
     Upon receipt, all nodes apply Jeffrey's rule.
     """
 
+    # Evidence of each neighbour is considered separately
+    aggregated = False
+    # Jeffrey's rule is applied to each message in turn, so evidence cannot
+    # be summed (i.e. aggregated with sparse matrix products)
+    engines = ("udf", "masked")
+
     def __init__(self, graph, params):
         super().__init__(graph, params)
         # Store network reliability in the graph
@@ -188,29 +210,24 @@ class AlignedOp(UnreliableOp):
             # Prior, P(H) (aka. belief)
             prior = nodes.data["beliefs"]
 
-            # Number of nodes and number of neighbours per node (incoming messages)
-            _, neighbours = nodes.mailbox["reliability"].shape
-            for i in range(neighbours):
-                # A node receives evidence E from its i-th neighbour, say Jill,
-                # denoting the number of successful trials and the total number
-                # of trials she observed
-                values = nodes.mailbox["payoffs"][:, i, 0]
-                trials = nodes.mailbox["payoffs"][:, i, 1]
-
-                # Evidence, E
-                evidence = math.Evidence(logits, values, trials)
+            # A node receives evidence E from each neighbour, say Jill, denoting
+            # the number of successful trials and the total number of trials she
+            # observed
+            values = nodes.mailbox["payoffs"][:, :, 0]
+            trials = nodes.mailbox["payoffs"][:, :, 1]
 
-                # Get i-th neighbour reliability
-                reliability = nodes.mailbox["reliability"][:, i]
-
-                # log.info(f"Neighbour {i:2d}: reliability {reliability}")
-
-                # Compute posterior belief, in light of soft uncertainty
-                # (i.e., network unreliability)
-                posterior = math.jeffrey(prior, evidence, reliability)
-
-                # Consider next neighbour
-                prior = posterior
+            # Evidence, E
+            evidence = math.Evidence(logits, values, trials)
+
+            # Compute posterior belief, neighbour by neighbour, in light of soft
+            # uncertainty (i.e., network unreliability)
+            posterior = math.sequential(
+                prior,
+                evidence,
+                nodes.mailbox["reliability"],
+                mask=mailboxmask(nodes),
+                config=self._bayes,
+            )
 
             # Return posterior beliefs for each neighbour
             return {"beliefs": posterior}
@@ -223,6 +240,9 @@ class UnreliableNetworkBasicAlignedUniformOp(AlignedOp):
     Aligned op where unreliable nodes draw from a uniform distibution
     """
 
+    # Unreliable nodes observe non-integer evidence
+    integral = False
+
     def __init__(self, graph, params):
         super().__init__(graph, params)
         # Create uniform sampler
@@ -318,29 +338,24 @@ class UnalignedOp(AlignedOp):
             # Prior, P(H) (aka. belief)
             prior = nodes.data["beliefs"]
 
-            # Number of nodes and number of neighbours per node (incoming messages)
-            _, neighbours = nodes.mailbox["trust"].shape
-            for i in range(neighbours):
-                # A node receives evidence E from its i-th neighbour, say Jill,
-                # denoting the number of successful trials and the total number
-                # of trials she observed
-                values = nodes.mailbox["payoffs"][:, i, 0]
-                trials = nodes.mailbox["payoffs"][:, i, 1]
-
-                # Evidence, E
-                evidence = math.Evidence(logits, values, trials)
+            # A node receives evidence E from each neighbour, say Jill, denoting
+            # the number of successful trials and the total number of trials she
+            # observed
+            values = nodes.mailbox["payoffs"][:, :, 0]
+            trials = nodes.mailbox["payoffs"][:, :, 1]
 
-                # Get i-th neighbour reliability
-                trust = nodes.mailbox["trust"][:, i]
-
-                # log.info(f"Neighbour {i:2d}: reliability {reliability}")
-
-                # Compute posterior belief, in light of soft uncertainty
-                # (i.e., network unreliability)
-                posterior = math.jeffrey(prior, evidence, trust)
-
-                # Consider next neighbour
-                prior = posterior
+            # Evidence, E
+            evidence = math.Evidence(logits, values, trials)
+
+            # Compute posterior belief, neighbour by neighbour, in light of soft
+            # uncertainty (i.e., network unreliability)
+            posterior = math.sequential(
+                prior,
+                evidence,
+                nodes.mailbox["trust"],
+                mask=mailboxmask(nodes),
+                config=self._bayes,
+            )
 
             # Return posterior beliefs for each neighbour
             return {"beliefs": posterior}
@@ -353,6 +368,9 @@ class UnreliableNetworkBasicUnalignedUniformOp(UnalignedOp):
     Unreliable nodes' evidence follow a uniform distribution.
     """
 
+    # Unreliable nodes observe non-integer evidence
+    integral = False
+
     def __init__(self, graph, params):
         super().__init__(graph, params)
         # Create uniform sampler
@@ -370,9 +388,35 @@ class ModifiedAlignedOp(AlignedOp):
     Jeffrey's rule without the for loop
     """
 
+    # Evidence of all neighbours is aggregated
+    aggregated = True
+    engines = ("udf", "masked", "spmm", "implicit")
+
     def __init__(self, graph, params):
         super().__init__(graph, params)
 
+    def aggregate(self, graph):
+        """
+        Sums the payoffs of valid neighbours (see `gather`), then updates
+        beliefs using Jeffrey's rule, followed by `applyfn` (as with message
+        passing).
+        """
+        # Prior, P(H) (aka. belief)
+        prior = graph.ndata["beliefs"]
+        # Only nodes with evidence to report send messages
+        mask = self.sourcemask(graph).unsqueeze(1)
+        evidence = self.gather(graph, graph.ndata["payoffs"] * mask)
+        # Evidence, E
+        evidence = math.Evidence(graph.ndata["logits"], evidence[:, 0], evidence[:, 1])
+        # Compute posterior belief using Jeffrey's rule
+        graph.ndata["beliefs"] = math.jeffrey(
+            prior, evidence, self._network_reliability, config=self._bayes
+        )
+        graph.apply_nodes(self.applyfn())
+        # Nodes that received no messages keep their prior
+        received = torch.gt(evidence.trials, 0.0)
+        graph.ndata["beliefs"] = torch.where(received, graph.ndata["beliefs"], prior)
+
     def reducefn(self):
         """
         Reduce function
@@ -384,15 +428,23 @@ class ModifiedAlignedOp(AlignedOp):
             # Prior, P(H) (aka. belief)
             prior = nodes.data["beliefs"]
 
+            # Ignore invalid messages, if any
+            payoffs = nodes.mailbox["payoffs"]
+            mask = mailboxmask(nodes)
+            if mask is not None:
+                payoffs = payoffs * mask.unsqueeze(-1)
+
             # Aggregate evidence from all neighbors
-            aggregated_values = torch.sum(nodes.mailbox["payoffs"][:, :, 0], dim=1)
-            aggregated_trials = torch.sum(nodes.mailbox["payoffs"][:, :, 1], dim=1)
+            aggregated_values = torch.sum(payoffs[:, :, 0], dim=1)
+            aggregated_trials = torch.sum(payoffs[:, :, 1], dim=1)
 
             # Evidence, E
             evidence = math.Evidence(logits, aggregated_values, aggregated_trials)
 
             # Compute posterior belief using Jeffrey's rule
-            posterior = math.jeffrey(prior, evidence, self._network_reliability)
+            posterior = math.jeffrey(
+                prior, evidence, self._network_reliability, config=self._bayes
+            )
 
             # Return posterior beliefs for each neighbour
             return {"beliefs": posterior}
@@ -405,6 +457,9 @@ class UnreliableNetworkModifiedAlignedUniformOp(ModifiedAlignedOp):
     Unreliable nodes' evidence follow a uniform distribution.
     """
 
+    # Unreliable nodes observe non-integer evidence
+    integral = False
+
     def __init__(self, graph, params):
         super().__init__(graph, params)
         # Create uniform sampler
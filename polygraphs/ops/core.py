@@ -4,8 +4,11 @@ PolyGraph basic operator
 
 import abc
 import torch
+import dgl
+import dgl.function as fn
 
 from .. import init
+from . import math
 
 
 class PolyGraphOp(torch.nn.Module, metaclass=abc.ABCMeta):
@@ -13,17 +16,52 @@ class PolyGraphOp(torch.nn.Module, metaclass=abc.ABCMeta):
     Base operator from which all other operators are derived.
     """
 
+    # Whether evidence values are integers (i.e. not drawn from a uniform distribution)
+    integral = True
+    # Whether nodes observe the sum of the evidence of their neighbours, rather
+    # than the evidence of each neighbour separately
+    aggregated = True
+    # Supported message-passing engines; "spmm" and "implicit" require ops
+    # to implement `aggregate`
+    engines = ("udf", "masked")
+
     def __init__(self, graph, params):
         super().__init__()
 
         # Set device for experimentation
         self._device = params.device
 
+        # Message-passing engine: user-defined functions on filtered edges
+        # ("udf"), on all edges with masked messages ("masked"), or built-in
+        # sparse matrix operations ("spmm")
+        self._engine = params.engine
+        if self._engine not in ("udf", "masked", "spmm"):
+            raise ValueError(f"Invalid engine: {self._engine}")
+
+        # Implicit complete networks have no edges: every node is a neighbour
+        # of every other node, so ops aggregate evidence with global sums
+        # ("implicit") instead of message passing
+        if params.network.implicit:
+            self._engine = "implicit"
+        if self._engine not in self.engines:
+            raise ValueError(
+                f"{self.__class__.__name__} does not support the '{self._engine}' engine"
+            )
+        # Whether each node is also its own neighbour
+        self._selfloop = params.network.selfloop
+
+        # Configuration of belief updates (e.g. eager or compiled kernels)
+        self._bayes = math.configure(params.bayes, self._maxtrials(graph, params))
+
         # The shape of all node attributes
         size = (graph.num_nodes(),)
 
-        # Node beliefs that action B is better
-        graph.ndata["beliefs"] = init.init(size, params.init).to(device=self._device)
+        # Node beliefs that action B is better, initialised separately
+        # for each graph in a batch of graphs
+        beliefs = [
+            init.init((n,), params.init) for n in graph.batch_num_nodes().tolist()
+        ]
+        graph.ndata["beliefs"] = torch.cat(beliefs).to(device=self._device)
 
         # Action B yields Bernoulli payoff of 1 (success) with probability p (= 0.5 + e)
         probs = init.halfs(size) + params.epsilon
@@ -40,6 +78,23 @@ class PolyGraphOp(torch.nn.Module, metaclass=abc.ABCMeta):
         # Store action B's probability of success as a graph node attribute
         graph.ndata["logits"] = self._sampler.logits.to(device=self._device)
 
+    def _maxtrials(self, graph, params):
+        """
+        Returns the largest number of trials of any evidence a node observes,
+        or None if evidence values (or trials) may not be integers.
+        """
+        if not self.integral or not float(params.trials).is_integer():
+            return None
+        trials = int(params.trials)
+        if not self.aggregated:
+            return trials
+        if self._engine == "implicit":
+            # Every node of a graph is a neighbour
+            neighbours = int(graph.batch_num_nodes().max())
+        else:
+            neighbours = int(graph.in_degrees().max()) if graph.num_edges() else 0
+        return trials * neighbours
+
     def sample(self):
         """
         Draws a sample from the binomial distribution.
@@ -68,6 +123,13 @@ class PolyGraphOp(torch.nn.Module, metaclass=abc.ABCMeta):
         # Store per-node payoffs as a graph node attribute
         graph.ndata["payoffs"] = result.T
 
+    def sourcemask(self, graph):  # pylint: disable=no-self-use
+        """
+        Returns a 1-D boolean tensor indicating whether each node should send
+        messages or not (the node-level equivalent of `filterfn`).
+        """
+        return torch.ones((graph.num_nodes(),), device=self._device).type(torch.bool)
+
     def filterfn(self):  # pylint: disable=no-self-use
         """
         Filters edges from graph; Returns a 1-D boolean tensor indicating
@@ -103,15 +165,100 @@ class PolyGraphOp(torch.nn.Module, metaclass=abc.ABCMeta):
 
         return function
 
+    def aggregate(self, graph):
+        """
+        Aggregates evidence from neighbours and updates beliefs using built-in,
+        sparse matrix operations instead of user-defined functions.
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not support the '{self._engine}' engine"
+        )
+
+    def gather(self, graph, values):
+        """
+        Returns the sum of given node values over each node's neighbours.
+        """
+        if self._engine == "implicit":
+            # Sum over all nodes (of each graph in a batch of graphs)
+            graph.ndata["gather"] = values
+            result = dgl.broadcast_nodes(graph, dgl.sum_nodes(graph, "gather"))
+            del graph.ndata["gather"]
+            if not self._selfloop:
+                # Exclude each node's own values
+                result = result - values
+            return result
+        # Sparse adjacency matrix times values
+        graph.ndata["gather"] = values
+        graph.update_all(fn.copy_u("gather", "message"), fn.sum("message", "gather"))
+        return graph.ndata.pop("gather")
+
+    def _sendmasked(self, graph):
+        """
+        Sends messages along all edges, rather than filtered ones. Each message
+        carries a mask denoting whether its source should have sent it, and
+        reduce functions ignore invalid messages (see `mailboxmask`). Nodes that
+        received no valid messages keep their attributes.
+        """
+        messagefn = self.messagefn()
+        reducefn = self.reducefn()
+        applyfn = self.applyfn()
+
+        def message(edges):
+            result = messagefn(edges)
+            result["mask"] = edges.src["mask"]
+            return result
+
+        def reduce(nodes):
+            result = reducefn(nodes)
+            result["received"] = torch.any(nodes.mailbox["mask"], dim=1)
+            return result
+
+        def apply(nodes):
+            result = dict(applyfn(nodes))
+            result["received"] = nodes.data["received"]
+            return result
+
+        # Node attributes before receiving any messages
+        previous = dict(graph.ndata)
+        graph.ndata["mask"] = self.sourcemask(graph)
+        graph.update_all(message, reduce, apply)
+        # Nodes with no in-edges receive no messages at all
+        received = graph.ndata.pop("received").bool()
+        del graph.ndata["mask"]
+        for key, value in previous.items():
+            current = graph.ndata[key]
+            if current is value:
+                continue
+            mask = received.view((-1,) + (1,) * (current.dim() - 1))
+            graph.ndata[key] = torch.where(mask, current, value)
+
     def forward(self, graph, *args, **kwargs):  # pylint: disable=unused-argument
         """
         Forward function
         """
         # Generate a local signal (message to be sent)
         self.experiment(graph)
+        if self._engine in ("spmm", "implicit"):
+            # Aggregate messages with a sparse matrix product; DGL builds
+            # the graph's sparse adjacency format once and caches it. Or
+            # with global sums, if the network is implicit
+            self.aggregate(graph)
+            return graph.ndata["beliefs"]
+        if self._engine == "masked":
+            # Send messages along all edges of the graph
+            self._sendmasked(graph)
+            return graph.ndata["beliefs"]
         # Filter valid edges along which messages will be sent
         edges = graph.filter_edges(self.filterfn())
         # Send messages along valid edges; and receive them at
         # edge destination nodes
         graph.send_and_recv(edges, self.messagefn(), self.reducefn(), self.applyfn())
         return graph.ndata["beliefs"]
+
+
+def mailboxmask(nodes):
+    """
+    Returns a 2-D boolean tensor indicating whether each message in the mailbox
+    is valid, or None if all messages are (i.e. edges have been filtered).
+    """
+    return nodes.mailbox.get("mask")
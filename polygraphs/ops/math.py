@@ -3,11 +3,20 @@ PolyGraph mathematical operations
 """
 
 from collections import namedtuple
-import torch
+from typing import Optional
 
+import torch
 
 Evidence = namedtuple("Evidence", ["logits", "values", "trials"])
 
+# Certainty of the evidence E of each neighbour, as a function of the
+# difference, delta, between the belief of an agent and that of its neighbour:
+#
+#   max(1 - min(scale * delta ^ exponent, bound) * (1 - P(E)), 0)
+#
+# where beliefs of neighbours are of shape (n, k)
+Mistrust = namedtuple("Mistrust", ["beliefs", "scale", "exponent", "bound"])
+
 
 def _tologits(probabilities):
     """
@@ -38,13 +47,9 @@ def probs(logits, values, trials):
     #
     # Given k successes and n - k failures out of n trials:
     #
-    #   + log(n! / (k! (n - k)!)) =
-    #   + log(n!) - log(k!) - log((n - k)!)
+    #   + log(n! / (k! (n - k)!))
     #
-    # lgamma(x + 1) = log x!
-    logp += torch.lgamma(trials + 1)
-    logp -= torch.lgamma(values + 1)
-    logp -= torch.lgamma(trials - values + 1)
+    logp += lnbinomial(values, trials)
 
     return torch.exp(logp)
 
@@ -85,7 +90,256 @@ def marginal(prior, evidence):
     return clamped
 
 
-def bayes(prior, evidence, occurred=True):
+# Log-binomial coefficient tables, log C(n, k), by dtype and device
+_tables = {}
+# Largest number of trials, n, in a table (i.e. tables have at most ~1M entries)
+_tablesize = 1024
+
+
+def _lnbinomialtable(size, dtype, device):
+    """
+    Returns a table of log-binomial coefficients, log C(n, k), for all
+    0 <= k <= n <= size. Tables are cached and grown on demand.
+    """
+    table = _tables.get((dtype, device))
+    if table is None or table.shape[0] <= size:
+        # Computed in double precision, then cast
+        x = torch.arange(size + 1, dtype=torch.float64)
+        # lgamma(x + 1) = log x!
+        lnfactorial = torch.lgamma(x + 1)
+        # Invalid entries (k > n) are never gathered
+        difference = (x.unsqueeze(1) - x).clamp(min=0).long()
+        table = lnfactorial.unsqueeze(1) - lnfactorial - lnfactorial[difference]
+        table = table.to(dtype=dtype, device=device)
+        _tables[(dtype, device)] = table
+    return table
+
+
+def lnbinomial(values, trials, lookup=None):
+    """
+    Computes log C(n, k) = log(n!) - log(k!) - log((n - k)!).
+
+    Coefficients are gathered from a lookup table of given size, if any (see
+    `configure`), without further checks. Otherwise, they are computed with
+    `lgamma`.
+
+    Args:
+        values: Number of positive samples observed, k
+        trials: Total number of trials, n
+        lookup: Size of lookup table (optional), i.e. the largest n
+    """
+    if lookup is not None:
+        table = _lnbinomialtable(lookup, trials.dtype, trials.device)
+        return table[trials.long(), values.long()]
+    # lgamma(x + 1) = log x!
+    result = torch.lgamma(trials + 1)
+    result -= torch.lgamma(values + 1)
+    result -= torch.lgamma(trials - values + 1)
+    return result
+
+
+def _loglikelihoods(logits, values, trials, coefficients):
+    """
+    Computes log P(E|H) and log P(E|~H) (see `probs`) for the same evidence at
+    once. Both share the normalising term and the binomial coefficient, since
+    C(n, k) = C(n, n - k).
+    """
+    norm = trials * logits.clamp(min=0) + trials * torch.log1p(
+        torch.exp(-torch.abs(logits))
+    )
+    # Evidence of k positive samples
+    positive = values * logits - norm + coefficients
+    # Evidence of n - k positive samples
+    negative = (trials - values) * logits - norm + coefficients
+    return positive, negative
+
+
+def _likelihoods(logits, values, trials, coefficients, epsilon: float):
+    """
+    Computes P(E|H) and P(E|~H) (see `likelihood`) for the same evidence at once.
+    """
+    positive, negative = _loglikelihoods(logits, values, trials, coefficients)
+    positive = torch.exp(positive).clamp(min=epsilon, max=1 - epsilon)
+    negative = torch.exp(negative).clamp(min=epsilon, max=1 - epsilon)
+    return positive, negative
+
+
+def _bayes(prior, logits, values, trials, coefficients, epsilon: float):
+    """
+    Fused kernel for `bayes`, when evidence E occured.
+    """
+    positive, negative = _likelihoods(logits, values, trials, coefficients, epsilon)
+    # Marginal likelihood, P(E)
+    total = (prior * positive + (1.0 - prior) * negative).clamp(
+        min=epsilon, max=1 - epsilon
+    )
+    return prior * positive / total
+
+
+def _misbayes(prior, logits, values, trials, coefficients, epsilon: float):
+    """
+    Fused kernel for `bayes`, when evidence E did not occur.
+    """
+    positive, negative = _likelihoods(logits, values, trials, coefficients, epsilon)
+    # Marginal likelihood, P(E)
+    total = (prior * positive + (1.0 - prior) * negative).clamp(
+        min=epsilon, max=1 - epsilon
+    )
+    return prior * (1.0 - positive) / (1.0 - total)
+
+
+def _jeffrey(prior, logits, values, trials, coefficients, certainty, epsilon: float):
+    """
+    Fused kernel for `jeffrey`.
+    """
+    positive, negative = _likelihoods(logits, values, trials, coefficients, epsilon)
+    # Marginal likelihood, P(E)
+    total = (prior * positive + (1.0 - prior) * negative).clamp(
+        min=epsilon, max=1 - epsilon
+    )
+    # Posterior beliefs, P(H|E) and P(H|~E)
+    belief = prior * positive / total
+    misbelief = prior * (1.0 - positive) / (1.0 - total)
+    # Update posterior belief, in light of uncertainty
+    return belief * certainty + misbelief * (1.0 - certainty)
+
+
+def _ratio(logits, values, trials):
+    """
+    Computes the log-likelihood ratio, log P(E|H) - log P(E|~H). Both binomial
+    coefficients and normalising terms cancel out, so that:
+
+        k logits - (n - k) logits = (2k - n) logits
+    """
+    return (2.0 * values - trials) * logits
+
+
+def _misratio(positive, negative, epsilon: float):
+    """
+    Computes the log-likelihood ratio, log P(~E|H) - log P(~E|~H), given the
+    log-likelihoods log P(E|H) and log P(E|~H), as:
+
+        log((1 - exp(x)) / (1 - exp(y))) = log(expm1(x) / expm1(y))
+
+    `expm1` is accurate (relative to its result) for all x < 0, so the ratio
+    is accurate to a few ulps, and its logarithm to a few eps (absolute); that
+    is all that adding it to the log-odds of a prior requires.
+    """
+    # Likelihoods are at most 1 - eps, and log(1 - eps) ~ -eps
+    positive = positive.clamp(max=-epsilon)
+    negative = negative.clamp(max=-epsilon)
+    return torch.log(torch.expm1(positive) / torch.expm1(negative))
+
+
+def _logodds(prior):
+    """
+    Computes the log-odds of a prior, log P(H) - log P(~H). Priors are clamped
+    to [0, 1] (e.g. initial beliefs weighted by centrality may exceed 1), so
+    that log-odds are never NaN.
+    """
+    return torch.logit(prior.clamp(min=0.0, max=1.0))
+
+
+def _stablebayes(prior, logits, values, trials):
+    """
+    Numerically stable kernel for `bayes`, when evidence E occured.
+    """
+    return torch.sigmoid(_logodds(prior) + _ratio(logits, values, trials))
+
+
+def _stablemisbayes(prior, logits, values, trials, coefficients, epsilon: float):
+    """
+    Numerically stable kernel for `bayes`, when evidence E did not occur.
+    """
+    positive, negative = _loglikelihoods(logits, values, trials, coefficients)
+    return torch.sigmoid(_logodds(prior) + _misratio(positive, negative, epsilon))
+
+
+def _stablejeffrey(
+    prior, logits, values, trials, coefficients, certainty, epsilon: float
+):
+    """
+    Numerically stable kernel for `jeffrey`.
+    """
+    positive, negative = _loglikelihoods(logits, values, trials, coefficients)
+    # Prior odds, in log space
+    logodds = _logodds(prior)
+    # Posterior beliefs, P(H|E) and P(H|~E); the likelihood ratio of E is
+    # the difference of log-likelihoods (see `_ratio`)
+    belief = torch.sigmoid(logodds + (positive - negative))
+    misbelief = torch.sigmoid(logodds + _misratio(positive, negative, epsilon))
+    # Update posterior belief, in light of uncertainty
+    return torch.lerp(misbelief, belief, certainty)
+
+
+# Kernels used by `bayes` and `jeffrey`, by backend
+_eager = {
+    # Posterior updates in probability space, with clamped likelihoods
+    "classic": {"bayes": _bayes, "misbayes": _misbayes, "jeffrey": _jeffrey},
+    # Posterior updates in log-odds space, with likelihood ratios
+    "stable": {
+        "bayes": _stablebayes,
+        "misbayes": _stablemisbayes,
+        "jeffrey": _stablejeffrey,
+    },
+}
+# Compiled kernels, by compiler and backend
+_compiled = {}
+
+
+def compilekernels(backend, compiler=None):
+    """
+    Returns the fused kernels of `bayes` and `jeffrey` for given backend,
+    compiled with TorchScript ("script") or `torch.compile` ("inductor"). If
+    compiler is None, eager kernels are returned instead.
+    """
+    if compiler is None:
+        return _eager[backend]
+    if (compiler, backend) not in _compiled:
+        if compiler == "script":
+            function = torch.jit.script
+        elif compiler == "inductor":
+            function = lambda kernel: torch.compile(kernel, dynamic=True)
+        else:
+            raise ValueError(f"Invalid compiler: {compiler}")
+        _compiled[(compiler, backend)] = {
+            key: function(value) for key, value in _eager[backend].items()
+        }
+    return _compiled[(compiler, backend)]
+
+
+# Configuration of belief updates: the backend, its (either eager or compiled)
+# kernels, and the size of the log-binomial table to look up (or None)
+Config = namedtuple("Config", ["backend", "kernels", "lookup"])
+
+
+def configure(params, trials=None):
+    """
+    Returns the configuration of belief updates (see `BayesHyperParameters`),
+    to be passed to `bayes`, `jeffrey`, and `sequential`.
+
+    Log-binomial coefficients are looked up in a table (if `params.lookup` is
+    set) only if the evidence is known to be valid: `trials` is the largest
+    number of trials of any evidence, given only if all evidence values and
+    trials are integers (which is not the case if unreliable nodes draw
+    evidence from a uniform distribution), and it must be at most `_tablesize`
+    (which may not be the case when evidence is aggregated).
+    """
+    if params.backend not in _eager:
+        raise ValueError(f"Invalid Bayes backend: {params.backend}")
+    lookup = None
+    if params.lookup and trials is not None and 0 <= trials <= _tablesize:
+        lookup = int(trials)
+    return Config(
+        params.backend, compilekernels(params.backend, params.compile), lookup
+    )
+
+
+# Default configuration (eager stable kernels, without lookups)
+_default = Config("stable", _eager["stable"], None)
+
+
+def bayes(prior, evidence, occurred=True, config=None):
     """
     Updates prior with Bayes' rule.
 
@@ -93,20 +347,22 @@ def bayes(prior, evidence, occurred=True):
         prior: P(H)
         evidence: E
         occurred: Whether evidence E occured or not
+        config: Configuration of belief updates (see `configure`)
 
     Returns:
         Posterior, P(H|E) ~ P(H)P(E|H) / P(E)
     """
-    if occurred:
-        result = prior * likelihood(evidence) / marginal(prior, evidence)
-    else:
-        result = (
-            prior * (1.0 - likelihood(evidence)) / (1.0 - marginal(prior, evidence))
-        )
-    return result
+    config = config or _default
+    if occurred and config.backend == "stable":
+        # Binomial coefficients cancel out in the likelihood ratio
+        return config.kernels["bayes"](prior, *evidence)
+    epsilon = torch.finfo(prior.dtype).eps
+    coefficients = lnbinomial(evidence.values, evidence.trials, config.lookup)
+    kernel = config.kernels["bayes"] if occurred else config.kernels["misbayes"]
+    return kernel(prior, *evidence, coefficients, epsilon)
 
 
-def jeffrey(prior, evidence, certainty):
+def jeffrey(prior, evidence, certainty, config=None):
     """
     Updates prior with Jeffrey's rule.
 
@@ -114,10 +370,140 @@ def jeffrey(prior, evidence, certainty):
         prior: P(H)
         evidence: E
         certainty: Certainty of observed evidence, E
+        config: Configuration of belief updates (see `configure`)
     """
-    # Posterior belief, P(H|E), obtained via strict conditionalization on evidence, E
-    belief = bayes(prior, evidence)
-    # Posterior belief if evidence E did not occur, P(H|~E) = P(H)P(~E|H)/P(~E)
-    misbelief = bayes(prior, evidence, occurred=False)
-    # Update posterior belief, in light of uncertainty
-    return belief * certainty + misbelief * (1.0 - certainty)
+    config = config or _default
+    epsilon = torch.finfo(prior.dtype).eps
+    # Certainty may be a scalar (e.g. network reliability)
+    certainty = torch.as_tensor(certainty, dtype=prior.dtype, device=prior.device)
+    coefficients = lnbinomial(evidence.values, evidence.trials, config.lookup)
+    return config.kernels["jeffrey"](prior, *evidence, coefficients, certainty, epsilon)
+
+
+def _scan(
+    prior,
+    positive,
+    negative,
+    occurred: Optional[torch.Tensor],
+    misoccurred: Optional[torch.Tensor],
+    certainty: Optional[torch.Tensor],
+    beliefs: Optional[torch.Tensor],
+    scale: float,
+    exponent: float,
+    bound: float,
+    mask: Optional[torch.Tensor],
+    epsilon: float,
+):
+    """
+    Kernel for `sequential`, when certainties are neither 0 nor 1. Jeffrey's
+    rule is not associative, so updates are applied in order; the kernel is
+    compiled with TorchScript, so that the loop does not run in Python.
+    """
+    for i in range(positive.shape[-1]):
+        # Marginal likelihood, P(E) = P(H)P(E|H) + P(-H)P(E|-H)
+        total = prior * positive[:, i] + (1.0 - prior) * negative[:, i]
+        total = total.clamp(min=epsilon, max=1 - epsilon)
+        # Certainty of i-th evidence
+        if beliefs is not None:
+            distance = torch.pow(torch.abs(prior - beliefs[:, i]), exponent) * scale
+            weight = (1.0 - distance.clamp(max=bound) * (1.0 - total)).clamp(min=0.0)
+        else:
+            assert certainty is not None
+            weight = certainty[:, i]
+        # Posterior beliefs, P(H|E) and P(H|~E)
+        if occurred is not None and misoccurred is not None:
+            logodds = _logodds(prior)
+            belief = torch.sigmoid(logodds + occurred[:, i])
+            misbelief = torch.sigmoid(logodds + misoccurred[:, i])
+        else:
+            belief = prior * positive[:, i] / total
+            misbelief = prior * (1.0 - positive[:, i]) / (1.0 - total)
+        # Update posterior belief, in light of uncertainty
+        posterior = belief * weight + misbelief * (1.0 - weight)
+        if mask is not None:
+            # Invalid evidence leaves prior unchanged
+            posterior = torch.where(mask[:, i], posterior, prior)
+        # Consider next piece of evidence
+        prior = posterior
+    return prior
+
+
+# Compiled `_scan` kernel (compiled on first use)
+_scans = []
+
+
+def sequential(prior, evidence, certainty, mask=None, config=None):
+    """
+    Updates prior with Jeffrey's rule, once for each piece of evidence along
+    the last dimension (in order). It is equivalent to:
+
+        for i in range(k):
+            prior = jeffrey(prior, evidence[..., i], certainty[..., i])
+
+    Likelihoods, P(E|H) and P(E|~H), are computed once for all evidence. If
+    all certainties are either 0 or 1, every update simply multiplies the odds
+    of the prior by a likelihood ratio, so the sequence of updates reduces to
+    a sum in log-odds space. Otherwise, updates are applied in order by a
+    compiled kernel (see `_scan`).
+
+    Args:
+        prior: P(H), of shape (n,)
+        evidence: E, whose values and trials are of shape (n, k)
+        certainty: Certainty of observed evidence, either a tensor of shape
+            (n, k) or `Mistrust`, in which case the certainty of each piece
+            of evidence depends on the current prior (see `Mistrust`)
+        mask: Whether each piece of evidence is valid (optional); invalid
+            evidence is ignored
+        config: Configuration of belief updates (see `configure`)
+    """
+    config = config or _default
+    # Broadcast logits to the shape of evidence
+    logits = evidence.logits.unsqueeze(-1).expand_as(evidence.values)
+    evidence = Evidence(logits, evidence.values, evidence.trials)
+    # Log-likelihoods of all evidence, log P(E|H) and log P(E|~H)
+    epsilon = torch.finfo(prior.dtype).eps
+    coefficients = lnbinomial(evidence.values, evidence.trials, config.lookup)
+    logpositive, lognegative = _loglikelihoods(*evidence, coefficients)
+    # Likelihoods of all evidence, P(E|H) and P(E|~H)
+    positive = torch.exp(logpositive).clamp(min=epsilon, max=1 - epsilon)
+    negative = torch.exp(lognegative).clamp(min=epsilon, max=1 - epsilon)
+    occurred, misoccurred = None, None
+    if config.backend == "stable":
+        # Log-likelihood ratios when evidence E did (or did not) occur
+        occurred = _ratio(*evidence)
+        misoccurred = _misratio(logpositive, lognegative, epsilon)
+    if not isinstance(certainty, Mistrust) and torch.all(
+        torch.eq(certainty, 0.0) | torch.eq(certainty, 1.0)
+    ):
+        if config.backend != "stable":
+            occurred = torch.log(positive) - torch.log(negative)
+            misoccurred = torch.log1p(-positive) - torch.log1p(-negative)
+        # Evidence with certainty 1 occurred; evidence with certainty 0 did not
+        ratio = torch.where(certainty.bool(), occurred, misoccurred)
+        if mask is not None:
+            ratio = torch.where(mask, ratio, torch.zeros_like(ratio))
+        return torch.sigmoid(_logodds(prior) + torch.sum(ratio, dim=-1))
+    if not _scans:
+        _scans.append(torch.jit.script(_scan))
+    if isinstance(certainty, Mistrust):
+        beliefs, scale, exponent, bound = certainty
+        certainty = None
+    else:
+        beliefs, scale, exponent, bound = None, 1.0, 1.0, 1.0
+        certainty = torch.as_tensor(certainty, dtype=prior.dtype, device=prior.device)
+        certainty = certainty.expand_as(positive)
+
+    return _scans[0](
+        prior,
+        positive,
+        negative,
+        occurred,
+        misoccurred,
+        certainty,
+        beliefs,
+        float(scale),
+        float(exponent),
+        float(bound),
+        mask,
+        epsilon,
+    )
@@ -6,6 +6,22 @@ from .. import init
 from . import common
 
 
+def _centrality(graph, implicit=False):
+    """
+    Returns the degree centrality of each node, computed separately
+    for each graph in a batch of graphs.
+    """
+    if implicit:
+        # Implicit complete graphs have no edges, but every node is connected
+        # to every other node (in both directions)
+        return torch.full((graph.num_nodes(),), 2.0)
+    weights = []
+    for G in dgl.unbatch(graph):  # pylint: disable=invalid-name
+        centrality = nx.degree_centrality(dgl.to_networkx(dgl.remove_self_loop(G)))
+        weights.append(torch.Tensor(list(centrality.values())))
+    return torch.cat(weights)
+
+
 class BalaGoyalWeightedOp(common.BalaGoyalOp):
     """
     Initial beliefs weighted by centrality.
@@ -18,9 +34,7 @@ class BalaGoyalWeightedOp(common.BalaGoyalOp):
         # Modify weights
         size = (graph.num_nodes(),)
 
-        G = dgl.to_networkx(dgl.remove_self_loop(graph))
-        centrality = nx.degree_centrality(G)
-        weights = torch.Tensor(list(centrality.values()))
+        weights = _centrality(graph, implicit=self._engine == "implicit")
 
         graph.ndata["beliefs"] = init.ones(size) * weights
 
@@ -37,8 +51,6 @@ class BalaGoyalWeighted2Op(common.BalaGoyalOp):
         # Modify weights
         size = (graph.num_nodes(),)
 
-        G = dgl.to_networkx(dgl.remove_self_loop(graph))
-        centrality = nx.degree_centrality(G)
-        weights = torch.Tensor(list(centrality.values()))
+        weights = _centrality(graph, implicit=self._engine == "implicit")
 
         graph.ndata["beliefs"] = init.halfs(size) * weights
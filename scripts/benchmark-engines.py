@@ -0,0 +1,129 @@
+"""
+Benchmarks message-passing engines (steps/s) of PolyGraph ops.
+
+Example:
+
+    python scripts/benchmark-engines.py -o BalaGoyalOp -s 1024 4096 10000
+"""
+import argparse
+
+import torch
+
+import polygraphs as pg
+from polygraphs import hyperparameters as hp
+from polygraphs import graphs
+from polygraphs import ops
+from polygraphs import timer
+
+
+def cli(argv=None):
+    """
+    Parses command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark PolyGraph engines")
+
+    parser.add_argument(
+        "-o",
+        "--op",
+        type=str,
+        default="BalaGoyalOp",
+        metavar="",
+        dest="op",
+        help="operator name",
+    )
+
+    parser.add_argument(
+        "-k",
+        "--kind",
+        type=str,
+        default="complete",
+        metavar="",
+        dest="kind",
+        help="network kind",
+    )
+
+    parser.add_argument(
+        "-s",
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[128, 1024],
+        metavar="",
+        dest="sizes",
+        help="network sizes",
+    )
+
+    parser.add_argument(
+        "-e",
+        "--engines",
+        type=str,
+        nargs="+",
+        default=["udf", "masked", "spmm"],
+        metavar="",
+        dest="engines",
+        help="engines to compare",
+    )
+
+    parser.add_argument(
+        "-n",
+        "--steps",
+        type=int,
+        default=20,
+        metavar="",
+        dest="steps",
+        help="number of steps per measurement",
+    )
+
+    parser.add_argument(
+        "-d",
+        "--device",
+        type=str,
+        default="cpu",
+        metavar="",
+        dest="device",
+        help="target device",
+    )
+
+    return parser.parse_args(argv)
+
+
+@torch.no_grad()
+def benchmark(params, steps):
+    """
+    Returns the throughput (steps/s) of an op with given hyper-parameters.
+    """
+    # Use the same seed for every engine
+    pg.random(123)
+    graph = graphs.create(params.network).to(device=params.device)
+    model = ops.getbyname(params.op)(graph, params)
+    model.eval()
+    # Warm-up step (e.g. to build sparse formats)
+    _ = model(graph)
+    clock = timer.Timer()
+    clock.start()
+    for _ in range(steps):
+        _ = model(graph)
+    if params.device != "cpu":
+        torch.cuda.synchronize()
+    return steps / clock.dt()
+
+
+def main():
+    args = cli()
+    print(f"{'size':>8s} " + " ".join(f"{engine:>10s}" for engine in args.engines))
+    for size in args.sizes:
+        row = []
+        for engine in args.engines:
+            params = hp.PolyGraphHyperParameters()
+            params.op = args.op
+            params.device = args.device
+            params.epsilon = 0.01
+            params.network.kind = args.kind
+            params.network.size = size
+            params.engine = engine
+            row.append(benchmark(params, args.steps))
+        print(f"{size:8d} " + " ".join(f"{value:10.2f}" for value in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Checks that the stable (log-odds) Bayes backend agrees with the classic one
+on the evidence that PolyGraph ops in `ops.common` and `ops.complex` observe.
+
+Every belief update (`bayes`, `jeffrey`, or `sequential`) is evaluated with
+both backends on the same inputs. Entries where the classic backend clamps
+likelihoods (e.g. because they underflow) are expected to differ, so they are
+counted but not compared.
+
+Example:
+
+    python scripts/check-bayes-backends.py -k complete random -n 50
+"""
+
+import argparse
+import sys
+
+import torch
+
+import polygraphs as pg
+from polygraphs import hyperparameters as hp
+from polygraphs import graphs
+from polygraphs import ops
+from polygraphs.ops import math
+
+
+def cli(argv=None):
+    """
+    Parses command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Check PolyGraph Bayes backends")
+
+    parser.add_argument(
+        "-k",
+        "--kinds",
+        type=str,
+        nargs="+",
+        default=["complete", "random"],
+        metavar="",
+        dest="kinds",
+        help="network kinds",
+    )
+
+    parser.add_argument(
+        "-s",
+        "--size",
+        type=int,
+        default=32,
+        metavar="",
+        dest="size",
+        help="network size",
+    )
+
+    parser.add_argument(
+        "-t",
+        "--trials",
+        type=int,
+        default=10,
+        metavar="",
+        dest="trials",
+        help="number of trials",
+    )
+
+    parser.add_argument(
+        "-n",
+        "--steps",
+        type=int,
+        default=25,
+        metavar="",
+        dest="steps",
+        help="number of steps per op",
+    )
+
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1e-4,
+        metavar="",
+        dest="tolerance",
+        help="maximum absolute difference between posteriors",
+    )
+
+    return parser.parse_args(argv)
+
+
+def _operators():
+    """
+    Returns all (non-trivial) operators defined in `ops.common` and `ops.complex`.
+    """
+    modules = ("polygraphs.ops.common", "polygraphs.ops.complex")
+    result = []
+    for name in ops.__all__:
+        operator = getattr(ops, name)
+        if operator.__module__ in modules and operator is not ops.NoOp:
+            result.append(name)
+    return result
+
+
+def _wellconditioned(prior, evidence, mask=None):
+    """
+    Returns True for entries where the classic backend does not clamp
+    likelihoods, P(E|H) and P(E|~H), or the marginal likelihood, P(E).
+    """
+    logits = evidence.logits
+    # Whether evidence is a sequence (see `sequential`)
+    sequence = evidence.values.dim() > prior.dim()
+    if sequence:
+        # Broadcast logits and prior to the shape of evidence
+        logits = logits.unsqueeze(-1).expand_as(evidence.values)
+        prior = prior.unsqueeze(-1).expand_as(evidence.values)
+    epsilon = torch.finfo(prior.dtype).eps
+    coefficients = math.lnbinomial(evidence.values, evidence.trials)
+    positive, negative = math._loglikelihoods(
+        logits, evidence.values, evidence.trials, coefficients
+    )
+    positive = torch.exp(positive)
+    negative = torch.exp(negative)
+    total = prior * positive + (1.0 - prior) * negative
+    result = torch.ones_like(positive, dtype=torch.bool)
+    for value in (positive, negative, total):
+        result &= torch.gt(value, epsilon) & torch.lt(value, 1 - epsilon)
+    # Evidence must be in range, i.e. 0 <= k <= n
+    result &= torch.ge(evidence.values, 0) & torch.le(evidence.values, evidence.trials)
+    if mask is not None:
+        # Invalid evidence is ignored anyway
+        result |= ~mask
+    if sequence:
+        # An update is compared only if all pieces of evidence are
+        result = torch.all(result, dim=-1)
+    return result
+
+
+class Checker:
+    """
+    Wraps belief updates so that each update is evaluated with both backends.
+    """
+
+    def __init__(self, params):
+        self._params = params
+        # Statistics
+        self.difference = 0.0
+        self.compared = 0
+        self.clamped = 0
+
+    def _evaluate(self, backend, function, *args, **kwargs):
+        self._params.backend = backend
+        kwargs["config"] = math.configure(self._params)
+        return function(*args, **kwargs)
+
+    def wrap(self, function):
+        """
+        Returns a belief update that records the difference between backends.
+        """
+
+        def wrapper(prior, evidence, *args, **kwargs):
+            classic = self._evaluate(
+                "classic", function, prior, evidence, *args, **kwargs
+            )
+            stable = self._evaluate(
+                "stable", function, prior, evidence, *args, **kwargs
+            )
+            valid = _wellconditioned(prior, evidence, mask=kwargs.get("mask"))
+            difference = torch.abs(classic - stable)[valid]
+            if difference.numel() > 0:
+                self.difference = max(self.difference, difference.max().item())
+            self.compared += int(valid.sum())
+            self.clamped += int((~valid).sum())
+            # Simulate with the stable backend
+            return stable
+
+        return wrapper
+
+
+@torch.no_grad()
+def check(name, kind, args):
+    """
+    Runs an op and returns the statistics of its belief updates.
+    """
+    params = hp.PolyGraphHyperParameters()
+    params.op = name
+    params.epsilon = 0.01
+    params.trials = args.trials
+    params.reliability = 0.7
+    params.trust = 0.6
+    params.mistrust = 1.5
+    params.network.kind = kind
+    params.network.size = args.size
+    params.network.random.probability = 0.15
+    # Wrap belief updates
+    checker = Checker(params.bayes)
+    functions = {key: getattr(math, key) for key in ("bayes", "jeffrey", "sequential")}
+    for key, function in functions.items():
+        setattr(math, key, checker.wrap(function))
+    try:
+        pg.random(123)
+        graph = graphs.create(params.network)
+        model = ops.getbyname(name)(graph, params)
+        model.eval()
+        for _ in range(args.steps):
+            _ = model(graph)
+    finally:
+        for key, function in functions.items():
+            setattr(math, key, function)
+    return checker
+
+
+def main():
+    args = cli()
+    failed = False
+    print(
+        f"{'op':<48s} {'kind':>10s} {'difference':>12s} {'compared':>10s} {'clamped':>10s}"
+    )
+    for name in _operators():
+        for kind in args.kinds:
+            checker = check(name, kind, args)
+            ok = checker.difference <= args.tolerance
+            failed = failed or not ok
+            print(
+                f"{name:<48s} {kind:>10s} {checker.difference:12.3e} "
+                f"{checker.compared:10d} {checker.clamped:10d}"
+                + ("" if ok else " FAIL")
+            )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Checks the dataset fetch pipeline against a local HTTP server that stands in
+for SNAP and OGB.
+
+The server supports range requests and delays each response, so that the
+check can observe concurrent and resumed downloads. All datasets are cached
+in a temporary directory.
+
+Example:
+
+    python scripts/check-dataset-fetch.py
+"""
+
+import io
+import os
+import sys
+import gzip
+import time
+import hashlib
+import zipfile
+import tempfile
+import threading
+import http.server
+
+from polygraphs.datasets import dataset
+from polygraphs.datasets import utils as datautils
+from polygraphs.datasets import snap
+from polygraphs.datasets import ogb
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves files from memory, with support for range requests.
+    """
+
+    # Files served, by path
+    files = {}
+    # Requests received, as (path, range) pairs
+    requests = []
+    # Delay per response (in seconds)
+    delay = 0.5
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Serves a file, or part of it.
+        """
+        content = self.files.get(self.path)
+        span = self.headers.get("Range")
+        self.requests.append((self.path, span))
+        time.sleep(self.delay)
+        if content is None:
+            self.send_error(404)
+            return
+        start = int(span[len("bytes=") : -1]) if span else 0
+        if start >= len(content):
+            self.send_error(416)
+            return
+        self.send_response(206 if span else 200)
+        self.send_header("Content-Length", str(len(content) - start))
+        self.end_headers()
+        self.wfile.write(content[start:])
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+def _gzip(text):
+    return gzip.compress(text.encode("utf-8"))
+
+
+def _collab():
+    """
+    Returns a tiny ZIP archive with the same layout as `collab.zip`.
+    """
+    stream = io.BytesIO()
+    with zipfile.ZipFile(stream, "w") as archive:
+        for name, text in (
+            ("num-node-list", "3\n"),
+            ("edge", "0,1\n1,2\n"),
+            ("edge_weight", "1\n2\n"),
+            ("edge_year", "2000\n2001\n"),
+        ):
+            archive.writestr(f"collab/raw/{name}.csv.gz", _gzip(text))
+    return stream.getvalue()
+
+
+def check(name, condition):
+    """
+    Prints the outcome of a check and returns it.
+    """
+    print(f"{name:<48s} {'ok' if condition else 'FAIL'}")
+    return condition
+
+
+def main():
+    edges = _gzip("# Comment\n0 1\n1 2\n2 0\n")
+    Handler.files = {
+        "/data/bigdata/communities/com-lj.ungraph.txt.gz": edges,
+        "/data/bigdata/communities/com-lj.top5000.cmty.txt.gz": _gzip("0 1\n2\n"),
+        "/data/email-Eu-core.txt.gz": edges,
+        "/ogb/data/linkproppred/collab.zip": _collab(),
+    }
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        # Stand-ins for SNAP, OGB, and the data cache
+        snap._SNAP = url
+        ogb._OGB = url + "ogb/"
+        dataset._DATACACHE = directory
+
+        # Constructing a dataset makes no requests
+        network = snap.LiveJournal()
+        ok &= check("Lazy validation", not Handler.requests)
+
+        # Both files of a dataset are downloaded at the same time
+        start = time.time()
+        graph = network.read()
+        duration = time.time() - start
+        ok &= check("Concurrent downloads", duration < 2 * Handler.delay)
+        ok &= check("Downloaded graph", graph.num_edges() == 3)
+
+        # Interrupted downloads resume from the end of the partial file
+        network = snap.EmailEUCore()
+        filename = os.path.join(network.folder, "email-Eu-core.txt.gz")
+        with open(f"{filename}.part", "wb") as stream:
+            stream.write(edges[:10])
+        Handler.requests.clear()
+        network.fetchall()
+        with open(filename, "rb") as stream:
+            ok &= check("Resumed download", stream.read() == edges)
+        ok &= check("Range request", Handler.requests[-1][1] == "bytes=10-")
+
+        # Downloads with an invalid checksum are discarded
+        path = "/data/email-Eu-core.txt.gz"
+        checksum = hashlib.sha256(edges).hexdigest()
+        for expected, valid in ((checksum, True), ("0" * 64, False)):
+            target = os.path.join(directory, f"{valid}.txt.gz")
+            try:
+                datautils.download(url + path[1:], target, checksum=expected)
+                outcome = valid
+            except Exception:  # pylint: disable=broad-except
+                outcome = not valid and not os.path.exists(f"{target}.part")
+            ok &= check(f"Checksum ({'valid' if valid else 'invalid'})", outcome)
+
+        # Invalid origins are reported upon fetch
+        network = snap.CollegeMsg()
+        try:
+            network.fetchall()
+            outcome = False
+        except Exception:  # pylint: disable=broad-except
+            outcome = True
+        ok &= check("Invalid origin", outcome)
+
+        # Archives are extracted once
+        network = ogb.Collab()
+        graph = network.read()
+        marker = os.path.join(network.folder, ".collab.zip.extracted")
+        ok &= check("Extracted archive", graph.num_edges() == 4)
+        extracted = os.path.join(network.folder, "collab", "raw", "edge.csv.gz")
+        before = os.stat(extracted).st_mtime_ns
+        graph = ogb.Collab().read()
+        ok &= check("Skipped extraction", os.stat(extracted).st_mtime_ns == before)
+        ok &= check("Completion marker", os.path.isfile(marker))
+    server.shutdown()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,7 @@ from fsspec.implementations.local import LocalFileSystem
 # Import polygraphs
 from polygraphs import hyperparameters as hp
 from polygraphs import metadata
+from polygraphs.analysis import GraphConverter
 
 # Progress bar(s) #####
 
@@ -491,9 +492,8 @@ for net, lst in networks.items():
             assert os.path.exists(filepath), f"File not found: {filepath}"
             
             if args.statistics:
-                # Load graph from file
-                graphs, _ = dgl.load_graphs(filepath)
-                graph = graphs[0]
+                # Load graph from file (restoring edges of implicit graphs)
+                graph = GraphConverter().get_graph_object(filepath)
 
                 # Remove self-loops
                 graph = dgl.remove_self_loop(graph)
@@ -0,0 +1,347 @@
+"""
+Tests of the analysis of PolyGraph simulation results.
+"""
+
+import json
+import os
+
+import dgl
+import h5py
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+import polygraphs as pg
+from polygraphs import hyperparameters as hp
+from polygraphs import monitors
+from polygraphs.analysis import BeliefProcessor, GraphConverter, Graphs, Processor
+from polygraphs.analysis.cache import CachedSequence, LRUCache
+from polygraphs.analysis.csr import CSRGraph
+from polygraphs.analysis import simulation_processor, statistics
+from polygraphs.analysis.statistics import COLUMNS
+
+
+def _simulate(results, repeats=2):
+    params = hp.PolyGraphHyperParameters()
+    params.op = "BalaGoyalOp"
+    params.network.kind = "complete"
+    params.network.size = 8
+    params.simulation.steps = 20
+    params.simulation.repeats = repeats
+    params.logging.enabled = False
+    params.snapshots.enabled = True
+    params.snapshots.interval = 5
+    params.simulation.results = str(results)
+    pg.random(0)
+    pg.simulate(params)
+    return params
+
+
+def test_manifest(tmp_path, monkeypatch):
+    """
+    Processors store a (JSON) manifest of scanned folders outside the results,
+    and reuse it to skip folders that have not changed.
+    """
+    root = tmp_path / "results"
+    os.makedirs(root)
+    _simulate(root / "a")
+    manifests = tmp_path / "manifests"
+    first = Processor(str(root), manifest=str(manifests)).sims
+    assert len(first) == 2
+    assert sorted(os.listdir(root)) == ["a"]
+    (filename,) = manifests.iterdir()
+    with open(filename, encoding="utf-8") as stream:
+        manifest = json.load(stream)
+    assert manifest["version"] == simulation_processor._MANIFEST_VERSION
+    assert list(manifest["entries"]) == [str(root / "a")]
+
+    def read_subfolder(self, *args):
+        raise AssertionError("Unchanged folder was rescanned")
+
+    monkeypatch.setattr(
+        simulation_processor.SimulationProcessor, "read_subfolder", read_subfolder
+    )
+    second = Processor(str(root), manifest=str(manifests)).sims
+    pd.testing.assert_frame_equal(first, second)
+    # Paths are restored with the types they are scanned with
+    for column, cls in simulation_processor._PATHS.items():
+        assert all(type(value) is type(first[column][0]) for value in second[column])
+        assert isinstance(second[column][0], cls)
+
+
+def test_invalid_manifest(tmp_path):
+    """
+    Invalid manifests are ignored (and replaced).
+    """
+    root = tmp_path / "results"
+    os.makedirs(root)
+    _simulate(root / "a")
+    processor = Processor(str(root), manifest=str(tmp_path / "manifests"))
+    filename = processor.manifest_path(processor.expand_path(str(root)))
+    for content in ("", "[]", '{"version": 2, "entries": {"a": {}}}', "\x80"):
+        with open(filename, "w", encoding="utf-8") as stream:
+            stream.write(content)
+        processor = Processor(str(root), manifest=str(tmp_path / "manifests"))
+        assert len(processor.sims) == 2
+
+
+@pytest.mark.parametrize("layout", ["rows", "groups"])
+def test_snapshot_roundtrip(layout, tmp_path):
+    """
+    Beliefs written by snapshot hooks (or in the layout of earlier versions,
+    one dataset per snapshot) are read back by belief processors.
+    """
+    generator = torch.Generator().manual_seed(0)
+    graph = dgl.graph(([0, 1, 2, 3], [1, 2, 3, 4]), num_nodes=6)
+    graph.ndata["beliefs"] = torch.rand(6, generator=generator)
+    # Beliefs at every step, starting with initial ones (step 0)
+    expected = {0: graph.ndata["beliefs"].numpy().copy()}
+    filename = str(tmp_path / "1.hd5")
+    if layout == "rows":
+        # A small queue, so that snapshots are written while others are pending
+        hook = monitors.SnapshotHook(
+            interval=3, location=str(tmp_path), filename="1.hd5", queuesize=2
+        )
+        for step in range(1, 11):
+            graph.ndata["beliefs"] = torch.rand(6, generator=generator)
+            hook.mayberun(step, graph)
+            if step == 1 or step % 3 == 0:
+                expected[step] = graph.ndata["beliefs"].numpy().copy()
+        hook.conclude(10, graph)
+        hook.close()
+        expected[10] = graph.ndata["beliefs"].numpy().copy()
+        graph.ndata["beliefs"] = torch.from_numpy(expected[0])
+    else:
+        with h5py.File(filename, "w") as fp:
+            group = fp.create_group("beliefs")
+            for step in (1, 3, 10, 20):
+                expected[step] = torch.rand(6, generator=generator).numpy()
+                group.create_dataset(str(step), data=expected[step])
+    steps = sorted(expected)
+    processor = BeliefProcessor()
+    beliefs = processor.get_array(filename, graph)
+    assert beliefs.iterations.tolist() == steps
+    np.testing.assert_array_equal(
+        beliefs.values, np.stack([expected[step] for step in steps])
+    )
+    # Selected iterations and nodes
+    beliefs = processor.get_array(
+        filename, graph, iterations=slice(1, None, 2), nodes=[1, 4]
+    )
+    assert beliefs.iterations.tolist() == steps[1::2]
+    np.testing.assert_array_equal(
+        beliefs.values, np.stack([expected[step][[1, 4]] for step in steps[1::2]])
+    )
+    frame = processor.get_beliefs(filename, graph)
+    assert frame.index.names == ["iteration", "node"]
+    assert len(frame) == len(steps) * 6
+
+
+def test_processor_beliefs(tmp_path):
+    """
+    Processors read the snapshots of each simulation.
+    """
+    root = tmp_path / "results"
+    os.makedirs(root)
+    _simulate(root / "a")
+    processor = Processor(str(root), manifest=False)
+    for index in range(len(processor.sims)):
+        beliefs = processor.beliefs.array(index)
+        assert beliefs.iterations.tolist() == [0, 1, 5, 10, 15, 20]
+        assert beliefs.values.shape == (6, 8)
+        np.testing.assert_array_equal(
+            beliefs.values[0], processor.graphs[index].pg["ndata"]["beliefs"].numpy()
+        )
+
+
+def test_lru_cache_evicts_by_count_and_bytes():
+    """
+    Least-recently-used entries are evicted when either bound is exceeded;
+    the most recent entry is kept, even if it exceeds the size bound.
+    """
+    entries = LRUCache(maxsize=2)
+    for key in "abc":
+        entries.put(key, key.upper())
+    assert "a" not in entries and len(entries) == 2
+    # Accessing an entry marks it as most recently used
+    assert entries.get("b") == "B"
+    entries.put("d", "D")
+    assert "c" not in entries and "b" in entries and "d" in entries
+    entries = LRUCache(maxbytes=10)
+    entries.put("a", "A", nbytes=4)
+    entries.put("b", "B", nbytes=4)
+    assert entries.nbytes == 8
+    entries.put("c", "C", nbytes=4)
+    assert "a" not in entries and entries.nbytes == 8
+    entries.put("d", "D", nbytes=20)
+    assert list(entries._entries) == ["d"] and entries.nbytes == 20
+    assert entries.pop("d") == "D" and entries.nbytes == 0
+
+
+class _Sequence(CachedSequence):
+    def __init__(self, length, **kwargs):
+        super().__init__(length, **kwargs)
+        self.loaded = []
+
+    def load(self, index):
+        self.loaded.append(index)
+        return index * 10
+
+
+def test_cached_sequence_prefetches():
+    """
+    Accessing an item loads the next items on a background thread, and each
+    item is loaded once.
+    """
+    sequence = _Sequence(4, prefetch=2)
+    assert sequence[0] == 0
+    sequence._executor.shutdown(wait=True)
+    assert sorted(sequence.loaded) == [0, 1, 2]
+    assert 1 in sequence.cache and 2 in sequence.cache
+    sequence._executor = None
+    assert list(sequence) == [0, 10, 20, 30]
+    sequence._executor.shutdown(wait=True)
+    assert sorted(sequence.loaded) == [0, 1, 2, 3]
+    with pytest.raises(IndexError):
+        sequence.get(4)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_graphs_dedupe(lazy, tmp_path):
+    """
+    Only if asked to, simulations with identical topologies share one
+    read-only graph, with their own data of the graph without self-loops.
+    """
+    filenames = []
+    for index in range(2):
+        graph = dgl.graph(([0, 1, 2, 2], [1, 2, 0, 2]), num_nodes=4)
+        graph.ndata["beliefs"] = torch.full((4,), float(index))
+        graph.edata["weight"] = torch.arange(4.0)
+        filenames.append(str(tmp_path / f"{index + 1}.bin"))
+        dgl.save_graphs(filenames[-1], [graph])
+    dataframe = pd.DataFrame({"bin_file_path": filenames})
+    converter = GraphConverter(lazy=lazy)
+    for dedupe in (False, True):
+        graphs = Graphs(dataframe, converter, dedupe=dedupe)
+        first, second = graphs[0], graphs[1]
+        assert first.number_of_edges() == second.number_of_edges() == 3
+        for index, graph in enumerate((first, second)):
+            assert graph.pg["ndata"]["beliefs"].tolist() == [float(index)] * 4
+            assert graph.pg["edata"]["weight"].tolist() == [0.0, 1.0, 2.0]
+        if lazy:
+            continue
+        if dedupe:
+            assert nx.is_frozen(first) and nx.is_frozen(second)
+            with pytest.raises(nx.NetworkXError):
+                first.add_edge(0, 3)
+        else:
+            first.add_edge(0, 3)
+            assert not second.has_edge(0, 3)
+
+
+def _reference(frame, threshold=0.5, upperlower=0.5, lowerupper=0.99):
+    """
+    Returns belief statistics per iteration of a beliefs DataFrame (see
+    `BeliefArray.frame`), computed directly with pandas.
+    """
+    beliefs = frame["beliefs"].astype("float64").groupby(level="iteration")
+    return pd.DataFrame(
+        {
+            "fraction": beliefs.apply(lambda values: (values > threshold).mean()),
+            "mean": beliefs.mean(),
+            "variance": beliefs.var(ddof=0),
+            "gap": beliefs.apply(
+                lambda values: values[values > lowerupper].min()
+                - values[values <= upperlower].max()
+            ),
+        }
+    )
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_belief_statistics(workers, tmp_path):
+    """
+    Belief statistics of all simulations, read a chunk of iterations at a
+    time, agree with statistics computed with pandas.
+    """
+    root = tmp_path / "results"
+    os.makedirs(root)
+    _simulate(root / "a", repeats=3)
+    processor = Processor(str(root), manifest=False)
+    options = {"threshold": 0.6, "lowerupper": 0.7}
+    result = processor.belief_statistics("op", workers=workers, chunksize=4, **options)
+    assert list(result.columns) == ["simulation", "iteration", *COLUMNS, "op"]
+    assert (result["op"] == "BalaGoyalOp").all()
+    frames = []
+    for index in processor.sims.index:
+        frame = _reference(processor.beliefs[index], **options)
+        frames.append(frame.reset_index().assign(simulation=index))
+    expected = pd.concat(frames, ignore_index=True)
+    assert result["simulation"].tolist() == expected["simulation"].tolist()
+    assert result["iteration"].tolist() == expected["iteration"].tolist()
+    for column in COLUMNS:
+        np.testing.assert_allclose(result[column], expected[column], rtol=1e-6)
+    # Polarization gaps are compared (NaN gaps are covered by `test_statistics`)
+    assert result["gap"].notna().any()
+    # A single simulation
+    index = processor.sims.index[1]
+    row = processor.sims.loc[index]
+    iterations, values = statistics._simulation(
+        row.hd5_file_path, row.bin_file_path, BeliefProcessor(), 2, options
+    )
+    selected = result[result["simulation"] == index]
+    assert iterations.tolist() == selected["iteration"].tolist()
+    for column in COLUMNS:
+        np.testing.assert_allclose(values[column], selected[column])
+
+
+def test_statistics():
+    """
+    Statistics of an [iterations, nodes] array of beliefs, row by row.
+    """
+    values = np.array([[0.2, 0.4, 0.8, 1.0], [0.6, 0.6, 0.6, 0.6]], np.float32)
+    result = statistics.statistics(values, lowerupper=0.7)
+    np.testing.assert_allclose(result["fraction"], [0.5, 1.0])
+    np.testing.assert_allclose(result["mean"], [0.6, 0.6], rtol=1e-6)
+    np.testing.assert_allclose(result["variance"], [0.1, 0.0], atol=1e-7)
+    np.testing.assert_allclose(result["gap"], [0.4, np.nan], rtol=1e-6)
+
+
+def test_csr_graph():
+    """
+    CSR graphs agree with the networkx graphs of the same (directed) DGL
+    graph, with self-loops, parallel edges, and isolated nodes.
+    """
+    generator = torch.Generator().manual_seed(0)
+    src = torch.randint(0, 40, (120,), generator=generator)
+    dst = torch.randint(0, 40, (120,), generator=generator)
+    graph = dgl.graph((src, dst), num_nodes=48)
+    graph.ndata["beliefs"] = torch.rand(48, generator=generator)
+    csr = CSRGraph.fromdgl(graph)
+    expected = GraphConverter().convert_graph_networkx(graph)
+    assert csr.number_of_nodes() == expected.number_of_nodes()
+    assert csr.number_of_edges() == expected.number_of_edges()
+    nodes = list(range(48))
+    assert csr.degree().tolist() == [expected.degree(node) for node in nodes]
+    assert csr.degree([3, 1]).tolist() == [expected.degree(3), expected.degree(1)]
+    for node in nodes:
+        assert csr.neighbors(node).tolist() == sorted(expected.neighbors(node))
+    adjacency = nx.to_scipy_sparse_array(expected, nodelist=nodes)
+    assert (csr.to_scipy() != adjacency).nnz == 0
+    converted = csr.to_networkx()
+    assert list(converted.nodes) == list(expected.nodes)
+    assert nx.utils.edges_equal(converted.edges, expected.edges)
+    # Induced subgraphs, by position, with (sorted) node labels
+    selection = [30, 2, 7, 11, 19, 23, 41, 45, 5]
+    subgraph = csr.subgraph(selection)
+    induced = expected.subgraph(selection)
+    assert subgraph.nodes.tolist() == sorted(selection)
+    assert nx.utils.edges_equal(subgraph.to_networkx().edges, induced.edges)
+    assert subgraph.degree().tolist() == [
+        induced.degree(node) for node in sorted(selection)
+    ]
+    assert torch.equal(
+        subgraph.pg["ndata"]["beliefs"], graph.ndata["beliefs"][sorted(selection)]
+    )
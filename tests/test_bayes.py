@@ -0,0 +1,189 @@
+"""
+Tests that the stable (log-odds) Bayes backend agrees with the classic one
+on the evidence that PolyGraph ops in `ops.common` and `ops.complex` observe
+(see also scripts/check-bayes-backends.py).
+"""
+
+import pytest
+import torch
+
+import polygraphs as pg
+from polygraphs import hyperparameters as hp
+from polygraphs import graphs
+from polygraphs import ops
+from polygraphs.ops import math
+
+# Maximum absolute difference between posteriors of the two backends
+TOLERANCE = 1e-4
+
+
+def _operators():
+    """
+    Returns all (non-trivial) operators defined in `ops.common` and `ops.complex`.
+    """
+    modules = ("polygraphs.ops.common", "polygraphs.ops.complex")
+    return [
+        name
+        for name in ops.__all__
+        if getattr(ops, name).__module__ in modules
+        and getattr(ops, name) is not ops.NoOp
+    ]
+
+
+def _wellconditioned(prior, evidence, mask=None):
+    """
+    Returns True for entries where the classic backend does not clamp
+    likelihoods, P(E|H) and P(E|~H), or the marginal likelihood, P(E).
+    """
+    logits = evidence.logits
+    # Whether evidence is a sequence (see `sequential`)
+    sequence = evidence.values.dim() > prior.dim()
+    if sequence:
+        logits = logits.unsqueeze(-1).expand_as(evidence.values)
+        prior = prior.unsqueeze(-1).expand_as(evidence.values)
+    epsilon = torch.finfo(prior.dtype).eps
+    coefficients = torch.lgamma(evidence.trials + 1)
+    coefficients -= torch.lgamma(evidence.values + 1)
+    coefficients -= torch.lgamma(evidence.trials - evidence.values + 1)
+    positive, negative = math._loglikelihoods(
+        logits, evidence.values, evidence.trials, coefficients
+    )
+    positive = torch.exp(positive)
+    negative = torch.exp(negative)
+    total = prior * positive + (1.0 - prior) * negative
+    result = torch.ones_like(positive, dtype=torch.bool)
+    for value in (positive, negative, total):
+        result &= torch.gt(value, epsilon) & torch.lt(value, 1 - epsilon)
+    # Evidence must be in range, i.e. 0 <= k <= n
+    result &= torch.ge(evidence.values, 0) & torch.le(evidence.values, evidence.trials)
+    if mask is not None:
+        # Invalid evidence is ignored anyway
+        result |= ~mask
+    if sequence:
+        # An update is compared only if all pieces of evidence are
+        result = torch.all(result, dim=-1)
+    return result
+
+
+def _params(name, kind, backend="classic"):
+    params = hp.PolyGraphHyperParameters()
+    params.op = name
+    params.epsilon = 0.01
+    params.trials = 10
+    params.reliability = 0.7
+    params.trust = 0.6
+    params.mistrust = 1.5
+    params.bayes.backend = backend
+    params.network.kind = kind
+    params.network.size = 32
+    params.network.random.probability = 0.15
+    return params
+
+
+@pytest.mark.parametrize("kind", ["complete", "random"])
+@pytest.mark.parametrize("name", _operators())
+@torch.no_grad()
+def test_backends_agree(name, kind, monkeypatch):
+    """
+    Every belief update (`bayes`, `jeffrey`, or `sequential`) of an op is
+    evaluated with both backends; well-conditioned updates must agree.
+    """
+    params = _params(name, kind)
+    differences = []
+
+    def wrap(function):
+        def wrapper(prior, evidence, *args, **kwargs):
+            posteriors = {}
+            for backend in ("classic", "stable"):
+                params.bayes.backend = backend
+                kwargs["config"] = math.configure(params.bayes)
+                posteriors[backend] = function(prior, evidence, *args, **kwargs)
+            valid = _wellconditioned(prior, evidence, mask=kwargs.get("mask"))
+            assert not torch.any(torch.isnan(posteriors["stable"]))
+            differences.append(
+                torch.abs(posteriors["classic"] - posteriors["stable"])[valid]
+            )
+            return posteriors["stable"]
+
+        return wrapper
+
+    for key in ("bayes", "jeffrey", "sequential"):
+        monkeypatch.setattr(math, key, wrap(getattr(math, key)))
+    pg.random(123)
+    graph = graphs.create(params.network)
+    model = ops.getbyname(name)(graph, params)
+    model.eval()
+    for _ in range(10):
+        _ = model(graph)
+    assert differences
+    difference = torch.cat(differences)
+    assert difference.numel() > 0
+    assert difference.max().item() <= TOLERANCE
+
+
+@pytest.mark.parametrize("name", ["BalaGoyalWeightedOp", "BalaGoyalWeighted2Op"])
+@torch.no_grad()
+def test_stable_priors_out_of_range(name):
+    """
+    Initial beliefs weighted by (out-degree) centrality exceed 1 on complete
+    networks; the stable backend must not turn them into NaN.
+    """
+    params = _params(name, "complete", backend="stable")
+    pg.random(123)
+    graph = graphs.create(params.network)
+    model = ops.getbyname(name)(graph, params)
+    model.eval()
+    for _ in range(10):
+        _ = model(graph)
+    assert not torch.any(torch.isnan(graph.ndata["beliefs"]))
+
+
+def test_default_backend():
+    """
+    The stable backend is the default.
+    """
+    assert hp.BayesHyperParameters().backend == "stable"
+    assert math._default.backend == "stable"
+
+
+def _original(prior, evidence, certainty=None):
+    """
+    Belief updates as computed before kernels were fused, i.e. with Bayes'
+    rule in probability space.
+    """
+    belief = prior * math.likelihood(evidence) / math.marginal(prior, evidence)
+    if certainty is None:
+        return belief
+    misbelief = (
+        prior
+        * (1.0 - math.likelihood(evidence))
+        / (1.0 - math.marginal(prior, evidence))
+    )
+    return belief * certainty + misbelief * (1.0 - certainty)
+
+
+@torch.no_grad()
+def test_default_backend_agrees_with_original():
+    """
+    Well-conditioned updates of the default backend (without configuration)
+    agree with the original likelihood and marginal formulas.
+    """
+    pg.random(123)
+    size = 10000
+    prior = torch.rand(size)
+    trials = torch.full((size,), 10.0)
+    values = torch.randint(0, 11, (size,)).float()
+    logits = torch.full((size,), 0.04)
+    evidence = math.Evidence(logits, values, trials)
+    certainty = torch.rand(size)
+    valid = _wellconditioned(prior, evidence)
+    assert valid.sum() > size // 2
+    for expected, result in (
+        (_original(prior, evidence), math.bayes(prior, evidence)),
+        (
+            _original(prior, evidence, certainty),
+            math.jeffrey(prior, evidence, certainty),
+        ),
+    ):
+        difference = torch.abs(expected - result)[valid]
+        assert difference.max().item() <= TOLERANCE
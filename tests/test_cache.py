@@ -0,0 +1,42 @@
+"""
+Tests of the persistent cache of PolyGraph networks.
+"""
+
+import gzip
+import os
+
+import pytest
+
+from polygraphs import hyperparameters as hp
+from polygraphs import cache
+from polygraphs.datasets import dataset
+
+
+@pytest.mark.parametrize(
+    "kind, name, filename",
+    [
+        ("snap", "EgoFacebook", "ego-facebook/facebook_combined.txt.gz"),
+        ("ogb", "collab", "collab.zip"),
+    ],
+)
+def test_key_hashes_dataset_files(kind, name, filename, tmp_path, monkeypatch):
+    """
+    The cache key of a dataset-backed network depends on the contents of its
+    (fetched) dataset files.
+    """
+    monkeypatch.setattr(dataset, "_DATACACHE", str(tmp_path))
+    params = hp.PolyGraphHyperParameters().network
+    params.kind = kind
+    getattr(params, kind).name = name
+    # Files have not been fetched yet
+    assert cache.key(params) is None
+    filename = os.path.join(tmp_path, "snap" if kind == "snap" else "ogbl", filename)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with gzip.open(filename, "wt") as stream:
+        stream.write("0 1\n1 2\n")
+    first = cache.key(params)
+    assert first is not None
+    assert cache.key(params) == first
+    with gzip.open(filename, "wt") as stream:
+        stream.write("0 1\n1 3\n")
+    assert cache.key(params) != first
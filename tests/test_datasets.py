@@ -0,0 +1,223 @@
+"""
+Tests of PolyGraph datasets: normalised node identifiers (from 0 to N) are
+assigned in order of first appearance, as they were by earlier versions, and
+dataset files are fetched from a local HTTP server.
+"""
+
+import concurrent.futures
+import gzip
+import hashlib
+import http.server
+import os
+import threading
+import time
+import zipfile
+from collections import defaultdict
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from polygraphs.datasets import gml
+from polygraphs.datasets import utils as datautils
+from polygraphs.datasets.snap import SNAPDataset
+
+
+def _normalise(src, dst):
+    """
+    Returns normalised edges and original node identifiers, assigned with a
+    `defaultdict` to all source nodes, followed by all destination nodes.
+    """
+    table = defaultdict(lambda: len(table))
+    src = [table[node] for node in src]
+    dst = [table[node] for node in dst]
+    return [src, dst], list(table.keys())
+
+
+def test_snap(tmp_path):
+    """
+    Edges of SNAP datasets are normalised as before.
+    """
+    generator = np.random.default_rng(0)
+    src = generator.choice(10**6, size=500).tolist()
+    dst = generator.choice(src + generator.choice(10**6, size=50).tolist(), 500)
+    dst = dst.tolist()
+    filename = tmp_path / "edges.txt.gz"
+    with gzip.open(filename, "wt") as stream:
+        stream.write("# Comment\n# FromNodeId\tToNodeId\n")
+        for time, (u, v) in enumerate(zip(src, dst)):
+            # Temporal graphs have timestamps
+            stream.write(f"{u}\t{v}\t{time}\n")
+    dataset = SNAPDataset(folder=str(tmp_path), edges=str(filename))
+    graph = dataset.read()
+    edges, nodes = _normalise(src, dst)
+    assert [tensor.tolist() for tensor in graph.edges()] == edges
+    assert dataset.nodes.tolist() == nodes
+    assert (
+        dataset.index(np.array(nodes[::-1])).tolist() == list(range(len(nodes)))[::-1]
+    )
+
+
+def test_snap_cache(tmp_path):
+    """
+    Cached edges of SNAP datasets are invalidated when the dataset changes.
+    """
+    filename = tmp_path / "edges.txt.gz"
+    for src, dst in (([1, 2], [2, 3]), ([5, 6, 7], [6, 7, 5])):
+        with gzip.open(filename, "wt") as stream:
+            for u, v in zip(src, dst):
+                stream.write(f"{u}\t{v}\n")
+        graph = SNAPDataset(folder=str(tmp_path), edges=str(filename)).read()
+        edges, _ = _normalise(src, dst)
+        assert [tensor.tolist() for tensor in graph.edges()] == edges
+        assert os.path.isfile(f"{filename}.stamp.npy")
+
+
+def _reference(filename):
+    """
+    Returns normalised edges and original node identifiers of a GML file, as
+    read with networkx.
+    """
+    graph = nx.read_gml(filename, destringizer=int)
+    edges = [(int(u), int(v)) for u, v, _ in nx.to_edgelist(graph)]
+    # Identifiers are assigned edge by edge (source, then destination node)
+    table = defaultdict(lambda: len(table))
+    edges = [(table[u], table[v]) for u, v in edges]
+    return [[u for u, _ in edges], [v for _, v in edges]], list(table.keys())
+
+
+@pytest.mark.parametrize("kind", ["undirected", "directed", "multigraph"])
+def test_gml(kind, tmp_path):
+    """
+    Edges of GML files are normalised as before, i.e. as in `nx.to_edgelist`.
+    """
+    generator = np.random.default_rng(0)
+    graph = nx.gnm_random_graph(50, 200, seed=1, directed=kind == "directed")
+    if kind == "multigraph":
+        graph = nx.MultiGraph(graph)
+        graph.add_edges_from(list(graph.edges())[::5])
+    # Shuffle node labels (and their order of declaration)
+    labels = generator.choice(10**6, size=50, replace=False).tolist()
+    graph = nx.relabel_nodes(graph, dict(enumerate(labels)))
+    filename = str(tmp_path / "network.gml")
+    nx.write_gml(graph, filename)
+    (src, dst), nodes = _reference(filename)
+    for _ in range(2):
+        # Read file, then its cached copy
+        edges, ids = gml.read(filename)
+        assert edges.tolist() == [src, dst]
+        assert ids.tolist() == nodes
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves files from memory, with support for range requests.
+    """
+
+    # Files served, by path
+    files = {}
+    # Requests received, as (path, range) pairs
+    requests = []
+    # Delay per response (in seconds)
+    delay = 0.0
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        content = self.files.get(self.path)
+        span = self.headers.get("Range")
+        self.requests.append((self.path, span))
+        time.sleep(self.delay)
+        if content is None:
+            self.send_error(404)
+            return
+        start = int(span[len("bytes=") : -1]) if span else 0
+        if start >= len(content):
+            self.send_error(416)
+            return
+        self.send_response(206 if span else 200)
+        self.send_header("Content-Length", str(len(content) - start))
+        self.end_headers()
+        self.wfile.write(content[start:])
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture(name="server")
+def fixture_server():
+    """
+    Returns the URL of a local HTTP server (see `_Handler`).
+    """
+    _Handler.files = {"/edges.txt.gz": gzip.compress(b"0 1\n1 2\n2 0\n" * 100)}
+    _Handler.requests = []
+    _Handler.delay = 0.0
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_resumes(server, tmp_path):
+    """
+    Interrupted downloads resume from the end of the partial file.
+    """
+    content = _Handler.files["/edges.txt.gz"]
+    filename = str(tmp_path / "edges.txt.gz")
+    with open(f"{filename}.part", "wb") as stream:
+        stream.write(content[:10])
+    datautils.download(server + "edges.txt.gz", filename)
+    with open(filename, "rb") as stream:
+        assert stream.read() == content
+    assert _Handler.requests == [("/edges.txt.gz", "bytes=10-")]
+    assert not os.path.exists(f"{filename}.part")
+
+
+def test_download_checksum(server, tmp_path):
+    """
+    Downloads with an invalid checksum are discarded.
+    """
+    content = _Handler.files["/edges.txt.gz"]
+    filename = str(tmp_path / "edges.txt.gz")
+    with pytest.raises(Exception, match="Invalid checksum"):
+        datautils.download(server + "edges.txt.gz", filename, checksum="0" * 64)
+    assert not os.path.exists(filename)
+    assert not os.path.exists(f"{filename}.part")
+    checksum = hashlib.sha256(content).hexdigest()
+    datautils.download(server + "edges.txt.gz", filename, checksum=checksum)
+    assert datautils.sha256(filename) == checksum
+
+
+def test_concurrent_downloads(server, tmp_path):
+    """
+    Concurrent downloads of the same file download it once.
+    """
+    _Handler.delay = 0.2
+    filename = str(tmp_path / "edges.txt.gz")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        for _ in executor.map(
+            lambda _: datautils.download(server + "edges.txt.gz", filename), range(4)
+        ):
+            pass
+    with open(filename, "rb") as stream:
+        assert stream.read() == _Handler.files["/edges.txt.gz"]
+    assert len(_Handler.requests) == 1
+
+
+def test_unzip(tmp_path):
+    """
+    Archives are extracted once (see completion markers), and again when
+    they change.
+    """
+    filename = str(tmp_path / "archive.zip")
+    extracted = tmp_path / "archive" / "edges.csv"
+    for text in ("0,1\n", "0,1\n1,2\n"):
+        with zipfile.ZipFile(filename, "w") as archive:
+            archive.writestr("archive/edges.csv", text)
+        datautils.unzip(filename)
+        assert extracted.read_text() == text
+        assert os.path.isfile(tmp_path / ".archive.zip.extracted")
+        # Unchanged archives are not extracted again
+        os.remove(extracted)
+        datautils.unzip(filename)
+        assert not extracted.exists()
@@ -0,0 +1,196 @@
+"""
+Tests of PolyGraph networks.
+"""
+
+import os
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+import polygraphs as pg
+from polygraphs import hyperparameters as hp
+from polygraphs import graphs
+from polygraphs.analysis import GraphConverter, Graphs
+
+
+def test_implicit_complete_graph_is_stored_explicitly(tmp_path):
+    """
+    The stored graph of a simulation on an implicit complete network loads
+    with all its edges, as if the network were explicit.
+    """
+    graphs = {}
+    for implicit in (False, True):
+        params = hp.PolyGraphHyperParameters()
+        params.op = "BalaGoyalOp"
+        params.network.kind = "complete"
+        params.network.size = 8
+        params.network.implicit = implicit
+        params.simulation.steps = 2
+        params.simulation.repeats = 1
+        params.simulation.results = str(tmp_path / str(implicit))
+        pg.random(0)
+        pg.simulate(params)
+        converter = GraphConverter(lazy=True)
+        graph = converter.get_graph_object(
+            os.path.join(params.simulation.results, "1.bin")
+        )
+        graphs[implicit] = converter.convert_graph_csr(graph)
+    explicit, implicit = graphs[False], graphs[True]
+    assert implicit.number_of_edges() == 8 * 7 // 2
+    assert np.array_equal(implicit.indptr, explicit.indptr)
+    assert np.array_equal(implicit.indices, explicit.indices)
+    assert torch.equal(implicit.pg["ndata"]["beliefs"], explicit.pg["ndata"]["beliefs"])
+
+
+def test_implicit_complete_graph_edges_are_restored_on_demand(tmp_path):
+    """
+    Edges of an implicit complete graph are restored only when asked for,
+    and only once for all simulations that share its topology.
+    """
+    params = hp.PolyGraphHyperParameters()
+    params.op = "BalaGoyalOp"
+    params.network.kind = "complete"
+    params.network.size = 8
+    params.network.implicit = True
+    params.simulation.steps = 2
+    params.simulation.repeats = 2
+    params.simulation.results = str(tmp_path / "results")
+    pg.random(0)
+    pg.simulate(params)
+    converter = GraphConverter()
+    filepath = os.path.join(params.simulation.results, "1.bin")
+    graph = converter.get_graph_object(filepath, edges=False)
+    assert graph.num_nodes() == 8
+    assert graph.num_edges() == 0
+    assert "beliefs" in graph.ndata
+    assert converter.get_graph_object(filepath).num_edges() == 8 * 7
+    dataframe = pd.DataFrame(
+        {
+            "bin_file_path": [
+                os.path.join(params.simulation.results, f"{idx}.bin")
+                for idx in (1, 2)
+            ]
+        }
+    )
+    loaded = Graphs(dataframe, converter, dedupe=True)
+    first, second = loaded[0], loaded[1]
+    assert first.number_of_edges() == 8 * 7 // 2
+    # Both simulations share one restored graph
+    assert nx.utils.graphs_equal(first, second)
+    assert len(loaded._topologies) == 1
+
+
+def _edges(graph):
+    """
+    Returns the (sorted) edges of a DGL graph, as a list of node pairs.
+    """
+    return sorted(zip(*(nodes.tolist() for nodes in graph.edges())))
+
+
+@pytest.mark.parametrize(
+    "name, size",
+    [
+        (name, size)
+        for name in ("complete_", "cycle_", "line_", "star_", "wheel_", "grid_")
+        for size in (2, 4, 9, 16)
+        # Wheel graphs have at least 4 nodes; grid graphs are square
+        if not (name == "wheel_" and size < 4 or name == "grid_" and size == 2)
+    ],
+)
+def test_native_generators(name, size):
+    """
+    Native generators create the same graphs as networkx.
+    """
+    function = getattr(graphs, name)
+    for selfloop in (False, True):
+        native = function(size, selfloop=selfloop, engine="native")
+        expected = function(size, selfloop=selfloop, engine="networkx")
+        assert native.num_nodes() == expected.num_nodes() == size
+        assert _edges(native) == _edges(expected)
+
+
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("name", ["cycle_", "line_"])
+def test_native_directed_generators(name, directed):
+    """
+    Native generators create the same (directed) graphs as networkx.
+    """
+    function = getattr(graphs, name)
+    native = function(8, directed=directed, selfloop=False, engine="native")
+    expected = function(8, directed=directed, selfloop=False, engine="networkx")
+    assert _edges(native) == _edges(expected)
+
+
+def _check(graph, directed=False):
+    """
+    Checks that a graph (without self-loops) is simple and connected, and
+    bi-directed unless directed.
+    """
+    edges = _edges(graph)
+    assert all(src != dst for src, dst in edges)
+    assert len(set(edges)) == len(edges)
+    if not directed:
+        assert edges == sorted((dst, src) for src, dst in edges)
+    assert graphs._isconnected(graph)
+    return len(edges) if directed else len(edges) // 2
+
+
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("engine", ["native", "networkx"])
+def test_random(engine, directed):
+    """
+    Erdos-Renyi graphs are connected, with about p n (n - 1) edges (or half
+    as many, if undirected).
+    """
+    size, probability = 200, 0.1
+    pairs = size * (size - 1) if directed else size * (size - 1) // 2
+    counts = []
+    for seed in range(1, 6):
+        graph = graphs.random_(
+            size,
+            probability,
+            seed=seed,
+            directed=directed,
+            selfloop=False,
+            engine=engine,
+        )
+        counts.append(_check(graph, directed=directed))
+    # Within 5 standard deviations of the expected number of edges
+    deviation = 5 * np.sqrt(pairs * probability * (1 - probability) / len(counts))
+    assert abs(np.mean(counts) - pairs * probability) < deviation
+
+
+@pytest.mark.parametrize("engine", ["native", "networkx"])
+def test_wattsstrogatz(engine):
+    """
+    Watts-Strogatz graphs are connected, with (at most) k n / 2 edges.
+    """
+    size, knn = 100, 6
+    for seed in range(1, 6):
+        graph = graphs.wattsstrogatz_(
+            size, knn, 0.2, seed=seed, selfloop=False, engine=engine
+        )
+        count = _check(graph)
+        assert size * knn // 2 - size // 10 <= count <= size * knn // 2
+
+
+@pytest.mark.parametrize("engine", ["native", "networkx"])
+def test_barabasialbert(engine):
+    """
+    Barabasi-Albert graphs are connected, with (at most, and about) m (n - m)
+    edges.
+    """
+    size, attachments = 100, 3
+    for seed in range(1, 6):
+        graph = graphs.barabasialbert_(
+            size, attachments, seed=seed, selfloop=False, engine=engine
+        )
+        count = _check(graph)
+        expected = attachments * (size - attachments)
+        # Native generators drop duplicate attachments (see `generators`)
+        assert 0.85 * expected <= count <= expected
+        # Every node attaches to the graph
+        assert graph.in_degrees().min().item() >= 1
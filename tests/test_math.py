@@ -0,0 +1,94 @@
+"""
+Tests of PolyGraph mathematical operations.
+"""
+
+import pytest
+import torch
+
+import polygraphs as pg
+from polygraphs import hyperparameters as hp
+from polygraphs import graphs
+from polygraphs import ops
+from polygraphs.ops import math
+
+
+def _lgamma(values, trials):
+    result = torch.lgamma(trials + 1)
+    result -= torch.lgamma(values + 1)
+    result -= torch.lgamma(trials - values + 1)
+    return result
+
+
+@pytest.mark.parametrize("engine", ["udf", "spmm", "implicit"])
+@pytest.mark.parametrize(
+    "name", [name for name in ops.__all__ if name not in ("NoOp", "PolyGraphOp")]
+)
+@torch.no_grad()
+def test_lnbinomial_lookup(name, engine, monkeypatch):
+    """
+    Log-binomial coefficients looked up by an op equal those computed with
+    `lgamma`; ops whose evidence cannot be looked up compute them instead.
+    """
+    params = hp.PolyGraphHyperParameters()
+    params.op = name
+    params.trials = 10
+    params.reliability = 0.7
+    params.network.kind = "complete"
+    params.network.size = 16
+    # Stable Bayes updates need no coefficients (they cancel out)
+    params.bayes.backend = "classic"
+    if engine == "implicit":
+        params.network.implicit = True
+    else:
+        params.engine = engine
+    calls = []
+
+    def lnbinomial(values, trials, lookup=None):
+        result = lnbinomial.function(values, trials, lookup)
+        calls.append(lookup)
+        expected = _lgamma(values, trials)
+        assert torch.allclose(result, expected, atol=1e-4), name
+        return result
+
+    lnbinomial.function = math.lnbinomial
+    monkeypatch.setattr(math, "lnbinomial", lnbinomial)
+    pg.random(0)
+    graph = graphs.create(params.network)
+    if engine not in ops.getbyname(name).engines:
+        pytest.skip(f"{name} does not support the {engine} engine")
+    model = ops.getbyname(name)(graph, params)
+    model.eval()
+    for _ in range(5):
+        _ = model(graph)
+    assert calls
+    # Ops with uniform evidence must not look up coefficients
+    assert all((lookup is not None) == model.integral for lookup in calls)
+
+
+def test_lnbinomial_bounds():
+    """
+    Lookups are configured only for integer evidence within the table size.
+    """
+    params = hp.BayesHyperParameters()
+    assert math.configure(params, trials=10).lookup == 10
+    for trials in (None, math._tablesize + 1):
+        assert math.configure(params, trials=trials).lookup is None
+    params.lookup = False
+    assert math.configure(params, trials=10).lookup is None
+
+
+def test_configurations_are_independent():
+    """
+    Configuring an op does not change the belief updates of another op.
+    """
+    params = hp.PolyGraphHyperParameters()
+    params.network.kind = "complete"
+    params.network.size = 8
+    params.bayes.backend = "classic"
+    graph = graphs.create(params.network)
+    classic = ops.BalaGoyalOp(graph, params)
+    params.bayes.backend = "stable"
+    stable = ops.BalaGoyalOp(graphs.create(params.network), params)
+    assert classic._bayes.backend == "classic"
+    assert stable._bayes.backend == "stable"
+    assert classic._bayes.kernels["bayes"] is math._bayes
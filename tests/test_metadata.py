@@ -0,0 +1,54 @@
+"""
+Tests of PolyGraph simulation results.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import polygraphs as pg
+from polygraphs import hyperparameters as hp
+from polygraphs import metadata
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.mark.parametrize("flush", [None, 1])
+def test_parquet_result_is_a_directory(flush, tmp_path):
+    """
+    Parquet results are a directory of parts, whether or not results are
+    flushed to disk as repeats complete.
+    """
+    params = hp.PolyGraphHyperParameters()
+    params.op = "BalaGoyalOp"
+    params.network.kind = "complete"
+    params.network.size = 8
+    params.simulation.steps = 10
+    params.simulation.repeats = 3
+    params.simulation.format = "parquet"
+    params.simulation.flush = flush
+    params.simulation.results = str(tmp_path / "results")
+    pg.random(0)
+    result = pg.simulate(params)
+    filename = os.path.join(params.simulation.results, "data.parquet")
+    assert os.path.isdir(filename)
+    assert all(name.startswith("part-") for name in os.listdir(filename))
+    for frame in (pd.read_parquet(filename), metadata.read(filename)):
+        assert len(frame) == 3
+        assert frame["steps"].tolist() == result.frame["steps"].tolist()
+
+
+def test_parquet_writer(tmp_path):
+    """
+    Collections appended to a Parquet writer are parts of a single result.
+    """
+    filename = str(tmp_path / "data.parquet")
+    with metadata.ParquetWriter(filename) as writer:
+        for value in (1, 2):
+            result = metadata.PolyGraphSimulation(value=value)
+            result.add(value, 1.0, "B", False, True, False)
+            writer.append(result)
+    assert len(os.listdir(filename)) == 2
+    frame = metadata.read(str(tmp_path))
+    assert frame["value"].tolist() == [1, 2]
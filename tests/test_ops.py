@@ -0,0 +1,72 @@
+"""
+Tests of PolyGraph ops.
+"""
+
+import pytest
+import torch
+
+import polygraphs as pg
+from polygraphs import hyperparameters as hp
+from polygraphs import graphs
+from polygraphs import ops
+
+
+@pytest.mark.parametrize(
+    "name", ["OConnorWeatherallOp", "UnreliableNetworkBasicAlignedBinomialOp"]
+)
+@pytest.mark.parametrize("engine", ["spmm", "implicit"])
+def test_unsupported_engine(name, engine):
+    """
+    Ops raise a ValueError on creation if they do not support an engine.
+    """
+    params = hp.PolyGraphHyperParameters()
+    params.network.kind = "complete"
+    params.network.size = 8
+    if engine == "implicit":
+        params.network.implicit = True
+    else:
+        params.engine = engine
+    assert engine not in ops.getbyname(name).engines
+    graph = graphs.create(params.network)
+    with pytest.raises(ValueError, match=engine):
+        ops.getbyname(name)(graph, params)
+
+
+def _simulate(name, engine, kind, steps=10):
+    params = hp.PolyGraphHyperParameters()
+    params.op = name
+    params.trials = 10
+    params.epsilon = 0.01
+    params.reliability = 0.7
+    params.network.kind = kind
+    params.network.size = 16
+    params.network.random.probability = 0.5
+    if engine == "implicit":
+        params.network.implicit = True
+    else:
+        params.engine = engine
+    pg.random(1)
+    graph = graphs.create(params.network)
+    model = ops.getbyname(name)(graph, params)
+    model.eval()
+    with torch.no_grad():
+        for _ in range(steps):
+            beliefs = model(graph)
+    return beliefs
+
+
+@pytest.mark.parametrize("kind", ["complete", "random"])
+@pytest.mark.parametrize(
+    "name", [name for name in ops.__all__ if name != "PolyGraphOp"]
+)
+def test_engines_agree(name, kind):
+    """
+    All engines supported by an op yield the same beliefs, given the same
+    random evidence.
+    """
+    expected = _simulate(name, "udf", kind)
+    for engine in ops.getbyname(name).engines:
+        if engine == "implicit" and kind != "complete":
+            continue
+        beliefs = _simulate(name, engine, kind)
+        assert torch.allclose(beliefs, expected, atol=1e-5, equal_nan=True), engine
@@ -0,0 +1,160 @@
+"""
+Tests of PolyGraph simulations.
+"""
+
+import os
+
+import dgl
+import h5py
+import pytest
+import torch
+
+import polygraphs as pg
+from polygraphs import hyperparameters as hp
+from polygraphs import ops
+from polygraphs.cli import Explorable
+
+
+class ExpectedOp(ops.BalaGoyalOp):
+    """
+    Nodes observe the expected number of successful trials, so that the only
+    random numbers drawn are initial beliefs (in order of repeats).
+    """
+
+    def sample(self):
+        return torch.round(self.trials() * self._sampler.probs)
+
+
+def _params(results):
+    params = hp.PolyGraphHyperParameters()
+    params.trials = 100
+    params.epsilon = 0.01
+    params.network.kind = "wheel"
+    params.network.size = 16
+    params.logging.enabled = False
+    params.snapshots.enabled = True
+    params.snapshots.interval = 1
+    params.simulation.steps = 200
+    params.simulation.repeats = 5
+    params.simulation.results = str(results)
+    return params
+
+
+def _rows(params):
+    """
+    Returns the number of snapshots of each repeat.
+    """
+    rows = []
+    for idx in range(params.simulation.repeats):
+        filename = os.path.join(params.simulation.results, f"{idx + 1}.hd5")
+        with h5py.File(filename, "r") as fp:
+            rows.append(len(fp["iterations"]))
+    return rows
+
+
+def test_batch(tmp_path):
+    """
+    Repeats simulated as replicas of a batched graph have the same steps and
+    results (and snapshots) as repeats simulated one at a time.
+    """
+    frames, rows = {}, {}
+    for batch in (1, 2, 5):
+        params = _params(tmp_path / str(batch))
+        params.simulation.batch = batch
+        pg.random(0)
+        frames[batch] = pg.simulate(params, op=ExpectedOp).frame
+        rows[batch] = _rows(params)
+    expected = frames[1].drop(columns="duration")
+    # Repeats do not all converge at the same step
+    assert expected["steps"].nunique() > 1
+    # One snapshot per step
+    assert rows[1] == expected["steps"].tolist()
+    for batch in (2, 5):
+        assert frames[batch].drop(columns="duration").equals(expected)
+        assert rows[batch] == rows[1]
+
+
+def test_workers(tmp_path):
+    """
+    Configurations explored by a pool of worker processes have the same
+    results as configurations explored one at a time.
+    """
+    explorables = {"epsilon": Explorable("epsilon", [0.01, 0.05, 0.1])}
+    frames = {}
+    for workers in (1, 2):
+        params = _params(tmp_path / str(workers))
+        params.op = "BalaGoyalOp"
+        params.seed = 1
+        params.snapshots.enabled = False
+        params.simulation.repeats = 2
+        params.simulation.workers = workers
+        frames[workers] = pg.explore(params, explorables).frame
+    # Results directories (uid) and durations differ by run
+    columns = ["duration", "uid"]
+    expected = frames[1].drop(columns=columns)
+    assert len(expected) == 3 * 2
+    assert expected["epsilon"].tolist() == [0.01, 0.01, 0.05, 0.05, 0.1, 0.1]
+    assert frames[2].drop(columns=columns).equals(expected)
+
+
+@pytest.mark.parametrize("batch", [1, 2])
+def test_interval(batch, tmp_path):
+    """
+    Termination checked every few steps gives the same steps and results (and
+    snapshots) as termination checked every step.
+    """
+    frames, rows = {}, {}
+    for interval in (1, 7):
+        params = _params(tmp_path / str(interval))
+        params.snapshots.interval = 5
+        params.simulation.batch = batch
+        params.simulation.interval = interval
+        pg.random(0)
+        frames[interval] = pg.simulate(params, op=ExpectedOp).frame
+        rows[interval] = _rows(params)
+    expected = frames[1].drop(columns="duration")
+    # Repeats do not terminate at multiples of the interval
+    assert any(steps % 7 for steps in expected["steps"])
+    assert frames[7].drop(columns="duration").equals(expected)
+    assert rows[7] == rows[1]
+
+
+def test_topology(tmp_path, monkeypatch):
+    """
+    Repeats on a deterministic network share one topology: their edges are
+    the same, while beliefs (and payoffs) are initialised for each repeat, as
+    if each repeat created its own network.
+    """
+    frames, topologies = {}, []
+    topology = pg._topology
+
+    def _topology(params):
+        topologies.append(topology(params))
+        return topologies[-1]
+
+    for shared in (False, True):
+        params = _params(tmp_path / str(shared))
+        params.simulation.repeats = 3
+        if shared:
+            monkeypatch.setattr(pg, "_topology", _topology)
+        else:
+            monkeypatch.setattr(pg, "_topology", lambda params: None)
+        pg.random(0)
+        frames[shared] = pg.simulate(params, op=ExpectedOp).frame
+    assert frames[True].drop(columns="duration").equals(
+        frames[False].drop(columns="duration")
+    )
+    # The shared topology is left untouched by repeats
+    (shared,) = topologies
+    assert shared is not None and not shared.ndata
+    edges = [edge.tolist() for edge in shared.edges()]
+    beliefs = []
+    for idx in range(params.simulation.repeats):
+        filename = os.path.join(params.simulation.results, f"{idx + 1}.bin")
+        (graph,), _ = dgl.load_graphs(filename)
+        assert [edge.tolist() for edge in graph.edges()] == edges
+        # Payoffs of earlier repeats are not carried over
+        assert "payoffs" not in graph.ndata
+        beliefs.append(graph.ndata["beliefs"])
+    assert not torch.equal(beliefs[0], beliefs[1])
+    assert not torch.equal(beliefs[1], beliefs[2])